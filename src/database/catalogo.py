@@ -0,0 +1,91 @@
+import threading
+from bisect import bisect_right
+
+from database.colacion import nocase
+from database.conexion import crear_conexion
+
+# Posición de la columna de orden dentro de la tupla del producto
+# (id, clave, nombre, peso, kilataje, categoria, cantidad)
+INDICE_ORDEN = {"nombre": 2, "kilataje": 4, "categoria": 5}
+
+
+def _llave_orden(producto, orden):
+    # nocase pliega igual que COLLATE NOCASE (solo ASCII) y Python compara por
+    # punto de código, que es el orden de bytes UTF-8 de SQLite: el catálogo en
+    # memoria y buscar_productos (con sus índices) ordenan exactamente igual
+    return (nocase(producto[INDICE_ORDEN[orden]]), producto[0])
+
+
+class CatalogoProductos:
+    """
+    Caché en memoria de la tabla productos, compartida por todas las sesiones.
+    Se invalida con PRAGMA data_version: su valor cambia en cuanto cualquier
+    otra conexión (el hilo escritor, otro proceso) confirma cambios, así que
+    comprobar si la caché sigue vigente cuesta una sola consulta trivial.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._conexion = None
+        self._data_version = None
+        self._por_id = {}
+        self._por_clave = {}
+        self._ordenados = {}  # orden -> (productos, llaves) para paginar con bisect
+
+    def _vigente(self):
+        """Recarga los productos si la BD cambió. Debe llamarse con el candado tomado."""
+        if self._conexion is None:
+            # Conexión propia (nunca escribe) para que data_version detecte todo cambio externo
+            self._conexion = crear_conexion(check_same_thread=False)
+        version = self._conexion.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        productos = self._conexion.execute("SELECT * FROM productos ORDER BY id").fetchall()
+        self._por_id = {p[0]: p for p in productos}
+        self._por_clave = {p[1]: p for p in productos}
+        self._ordenados = {}
+        self._data_version = version
+
+    def _ordenado(self, orden):
+        if orden not in self._ordenados:
+            productos = sorted(self._por_id.values(), key=lambda p: _llave_orden(p, orden))
+            llaves = [_llave_orden(p, orden) for p in productos]
+            self._ordenados[orden] = (productos, llaves)
+        return self._ordenados[orden]
+
+    # --- CONSULTAS ---
+
+    def productos(self):
+        with self._candado:
+            self._vigente()
+            return list(self._por_id.values())
+
+    def por_id(self, id_producto):
+        with self._candado:
+            self._vigente()
+            return self._por_id.get(id_producto)
+
+    def por_clave(self, clave):
+        with self._candado:
+            self._vigente()
+            return self._por_clave.get(clave)
+
+    def pagina(self, after_key=None, limit=50, orden="nombre"):
+        """Misma semántica que obtener_productos_pagina, resuelta en memoria"""
+        if orden not in INDICE_ORDEN:
+            orden = "nombre"
+        with self._candado:
+            self._vigente()
+            productos, llaves = self._ordenado(orden)
+            inicio = 0
+            if after_key is not None:
+                inicio = bisect_right(llaves, (nocase(after_key[0]), after_key[1]))
+            resultado = productos[inicio:inicio + limit]
+        if not resultado or inicio + limit >= len(productos):
+            return resultado, None
+        ultimo = resultado[-1]
+        return resultado, (ultimo[INDICE_ORDEN[orden]], ultimo[0])
+
+
+# Instancia única del proceso
+catalogo = CatalogoProductos()
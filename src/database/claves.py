@@ -0,0 +1,59 @@
+def clave_base(kilataje, nombre, peso):
+    """
+    Clave sin sufijo: prefijo de kilataje + iniciales del nombre + peso sin punto.
+    Ej. ('10k', 'Cadena New York', '2.2') -> '10CNY22'
+    """
+    # A) Kilataje
+    k_raw = str(kilataje).lower()
+    if "italiano" in k_raw: prefijo = "ITA"
+    elif "k" in k_raw: prefijo = k_raw.replace("k", "").strip()
+    else: prefijo = k_raw[:2].upper()
+
+    # B) Iniciales
+    palabras = str(nombre).split()
+    iniciales = "".join([p[0].upper() for p in palabras if p])
+
+    # C) Peso
+    peso_clean = str(peso).replace(".", "").replace(",", "").strip()
+
+    return f"{prefijo}{iniciales}{peso_clean}"
+
+
+def _claves_con_prefijo(cursor, base):
+    """
+    Todas las claves que empiezan con 'base' en una sola consulta por rango,
+    resuelta con el índice UNIQUE de productos.clave (LIKE no lo usaría).
+    """
+    if not base:
+        return set(fila[0] for fila in cursor.execute("SELECT clave FROM productos"))
+    limite = base[:-1] + chr(ord(base[-1]) + 1)
+    cursor.execute("SELECT clave FROM productos WHERE clave >= ? AND clave < ?", (base, limite))
+    return set(fila[0] for fila in cursor.fetchall())
+
+
+def asignar_claves(cursor, bases, reservadas=()):
+    """
+    Asigna una clave libre por cada base de la lista (puede repetirse):
+    'base', 'base1', 'base2', ... sin chocar con productos existentes, con
+    'reservadas' (claves capturadas a mano en el mismo lote) ni entre sí.
+    Una consulta por base distinta; los sufijos se calculan en memoria.
+    Retorna las claves en el mismo orden que 'bases'.
+    """
+    ocupadas = {}  # base -> claves de la BD con ese prefijo
+    asignadas = set(reservadas)  # claves dadas en este lote (una base puede ser prefijo de otra)
+    siguiente = {}  # base -> primer sufijo que aún no se ha probado
+    claves = []
+    for base in bases:
+        if base not in ocupadas:
+            ocupadas[base] = _claves_con_prefijo(cursor, base)
+            siguiente[base] = 0
+        tomadas = ocupadas[base]
+        n = siguiente[base]
+        clave = f"{base}{n}" if n else base
+        while clave in tomadas or clave in asignadas:
+            n += 1
+            clave = f"{base}{n}"
+        asignadas.add(clave)
+        siguiente[base] = n + 1
+        claves.append(clave)
+    return claves
@@ -0,0 +1,10 @@
+_MINUSCULAS_ASCII = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def nocase(texto):
+    """
+    Texto plegado igual que COLLATE NOCASE (y lower()/LIKE) de SQLite: solo
+    A-Z pasan a minúsculas; 'Á', 'Ñ', etc. quedan igual. Comparar en Python
+    con esta llave da el mismo orden e igualdad que la base y sus índices.
+    """
+    return str(texto).translate(_MINUSCULAS_ASCII)
@@ -0,0 +1,67 @@
+import logging
+import sqlite3
+import threading
+
+# --- CONFIGURACIÓN ---
+RUTA_BD = 'inventario_joyeria.db'
+
+# PRAGMAs por conexión. journal_mode=WAL es persistente en el archivo,
+# el resto se aplica cada vez que se abre una conexión nueva.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",    # ~16 MB de caché de páginas
+    "PRAGMA mmap_size = 134217728",  # 128 MB mapeados en memoria
+    "PRAGMA busy_timeout = 5000",    # ms de espera antes de SQLITE_BUSY
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Estadísticas del planificador (sqlite_stat1): nunca se corre ANALYZE a mano.
+# PRAGMA optimize solo analiza las tablas que cambiaron mucho de tamaño desde
+# la última vez y analysis_limit lo mantiene en milisegundos aunque la base crezca.
+LIMITE_ANALISIS = 400
+
+_locales = threading.local()
+
+
+def crear_conexion(**kwargs):
+    """Abre una conexión nueva con los PRAGMAs de rendimiento ya aplicados"""
+    conexion = sqlite3.connect(RUTA_BD, **kwargs)
+    for pragma in PRAGMAS:
+        conexion.execute(pragma)
+    return conexion
+
+
+def optimizar(conexion, al_abrir=False):
+    """
+    PRAGMA optimize. Al cerrar una conexión revisa las tablas que usaron sus
+    consultas; al arrancar la app (al_abrir=True) revisa todas (SQLite >= 3.46,
+    las versiones anteriores ignoran esa opción).
+    """
+    try:
+        conexion.execute(f"PRAGMA analysis_limit = {LIMITE_ANALISIS}")
+        conexion.execute("PRAGMA optimize = 0x10002" if al_abrir else "PRAGMA optimize")
+    except sqlite3.Error as e:
+        logging.error(f"No se pudieron actualizar las estadísticas: {e}")
+
+
+def obtener_conexion():
+    """
+    Retorna la conexión persistente del hilo actual.
+    Se crea una sola vez por hilo y se reutiliza en todas las llamadas,
+    conservando la caché de páginas entre consultas.
+    """
+    conexion = getattr(_locales, "conexion", None)
+    if conexion is None:
+        conexion = crear_conexion()
+        _locales.conexion = conexion
+    return conexion
+
+
+def cerrar_conexion():
+    """Cierra la conexión del hilo actual (si existe), actualizando antes las estadísticas"""
+    conexion = getattr(_locales, "conexion", None)
+    if conexion is not None:
+        optimizar(conexion)
+        conexion.close()
+        _locales.conexion = None
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+from database.conexion import crear_conexion
+
+# Máximo de escrituras que se agrupan en un mismo COMMIT
+MAX_LOTE = 32
+
+
+class EscritorBD:
+    """
+    Hilo único de escritura.
+    Todas las escrituras de todas las sesiones se encolan aquí y se ejecutan
+    en orden sobre una sola conexión. Si llegan varias juntas se confirman con
+    un solo COMMIT (group commit); cada una corre dentro de su propio SAVEPOINT
+    para que el error de una no deshaga a las demás.
+    """
+
+    def __init__(self, max_lote=MAX_LOTE):
+        self._cola = queue.Queue()
+        self._max_lote = max_lote
+        self._hilo = None
+        self._candado = threading.Lock()
+
+    # --- API PÚBLICA ---
+
+    def enviar(self, funcion, *args, **kwargs) -> Future:
+        """
+        Encola funcion(cursor, *args, **kwargs) y retorna un Future con su resultado.
+        El Future se resuelve hasta que la transacción quedó confirmada en disco.
+        """
+        futuro = Future()
+        self._iniciar()
+        self._cola.put((funcion, args, kwargs, futuro))
+        return futuro
+
+    def ejecutar(self, funcion, *args, **kwargs):
+        """Versión bloqueante de enviar(): espera y retorna el resultado"""
+        if threading.current_thread() is self._hilo:
+            raise RuntimeError("No se puede esperar una escritura desde el propio hilo escritor")
+        return self.enviar(funcion, *args, **kwargs).result()
+
+    async def ejecutar_async(self, funcion, *args, **kwargs):
+        """Versión para handlers async de Flet: libera el hilo mientras se escribe"""
+        return await asyncio.wrap_future(self.enviar(funcion, *args, **kwargs))
+
+    # --- HILO ESCRITOR ---
+
+    def _iniciar(self):
+        with self._candado:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name="EscritorBD", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self):
+        # isolation_level=None: controlamos BEGIN/SAVEPOINT/COMMIT a mano
+        conexion = crear_conexion(isolation_level=None)
+        while True:
+            lote = [self._cola.get()]
+            # Juntamos lo que ya esté esperando para confirmarlo en un solo COMMIT
+            while len(lote) < self._max_lote:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._procesar_lote(conexion, lote)
+            except Exception as e:
+                # Nunca dejamos morir el hilo: fallamos lo pendiente y seguimos
+                logging.error(f"Escritor: error inesperado procesando lote: {e}")
+                if conexion.in_transaction:
+                    conexion.rollback()
+                for _, _, _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    def _procesar_lote(self, conexion, lote):
+        cursor = conexion.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            logging.error(f"Escritor: no se pudo iniciar transacción: {e}")
+            for _, _, _, futuro in lote:
+                if futuro.set_running_or_notify_cancel():
+                    futuro.set_exception(e)
+            return
+
+        completados = []
+        for funcion, args, kwargs, futuro in lote:
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            cursor.execute("SAVEPOINT escritura")
+            try:
+                resultado = funcion(cursor, *args, **kwargs)
+                cursor.execute("RELEASE escritura")
+                completados.append((futuro, resultado))
+            except Exception as e:
+                futuro.set_exception(e)
+                if not self._deshacer_savepoint(cursor, conexion):
+                    # La transacción completa se perdió: fallan también las anteriores
+                    for previo, _ in completados:
+                        previo.set_exception(e)
+                    completados = []
+                    cursor.execute("BEGIN IMMEDIATE")
+
+        try:
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            logging.error(f"Escritor: fallo en COMMIT: {e}")
+            if conexion.in_transaction:
+                cursor.execute("ROLLBACK")
+            for futuro, _ in completados:
+                futuro.set_exception(e)
+            return
+
+        for futuro, resultado in completados:
+            futuro.set_result(resultado)
+
+    @staticmethod
+    def _deshacer_savepoint(cursor, conexion):
+        """Deshace solo la escritura fallida. Retorna False si SQLite abortó toda la transacción."""
+        try:
+            cursor.execute("ROLLBACK TO escritura")
+            cursor.execute("RELEASE escritura")
+            return True
+        except sqlite3.Error:
+            if conexion.in_transaction:
+                cursor.execute("ROLLBACK")
+            return False
+
+
+# Instancia única del proceso (compartida por todas las sesiones de Flet)
+escritor = EscritorBD()
+
+
+def ejecutar_escritura(funcion, *args, **kwargs):
+    return escritor.ejecutar(funcion, *args, **kwargs)
+
+
+async def ejecutar_escritura_async(funcion, *args, **kwargs):
+    return await escritor.ejecutar_async(funcion, *args, **kwargs)
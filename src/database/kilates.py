@@ -0,0 +1,51 @@
+# Regla única para ligar un texto de kilataje con un renglón de kilates: por
+# código exacto o, si no, por el primer fragmento de REGLAS contenido en el
+# texto ("10k Italiano" -> '10k'). sql_kilate_id es la versión SQL (migraciones
+# y escrituras) y kilate_id_de la de Python (precios en pantalla); ambas salen
+# de REGLAS y pliegan mayúsculas igual que SQLite (colacion.nocase).
+from database.colacion import nocase
+
+
+# (fragmento contenido en el texto, código de kilate), en orden de prioridad
+REGLAS = (
+    ("10k", "10k"),
+    ("14k", "14k"),
+    ("ita", "Italiano"),
+)
+
+
+def sql_kilate_id(kilataje):
+    """
+    Expresión SQL con el id de kilates que corresponde al texto de kilataje
+    'kilataje' (una columna, ej. "detalles_venta.kilataje").
+    """
+    casos = "\n".join(
+        f"                WHEN lower({kilataje}) LIKE '%{fragmento}%' THEN '{codigo}'"
+        for fragmento, codigo in REGLAS
+    )
+    return f'''COALESCE(
+            (SELECT id FROM kilates WHERE codigo = {kilataje}),
+            (SELECT id FROM kilates WHERE codigo = CASE
+{casos}
+            END)
+        )'''
+
+
+# La misma expresión para un valor recibido como parámetro (un solo '?')
+SQL_KILATE_ID_PARAMETRO = f"(SELECT {sql_kilate_id('entrada.kilataje')} FROM (SELECT ? AS kilataje) AS entrada)"
+
+
+def kilate_id_de(kilataje, por_codigo):
+    """
+    Versión en Python de sql_kilate_id.
+    por_codigo: {nocase(código): id} de la tabla kilates.
+    """
+    if kilataje is None:
+        return None
+    texto = nocase(kilataje)
+    if texto in por_codigo:
+        return por_codigo[texto]
+    for fragmento, codigo in REGLAS:
+        if fragmento in texto:
+            return por_codigo.get(nocase(codigo))
+    return None
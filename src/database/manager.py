@@ -1,236 +1,251 @@
+import asyncio
+import csv
+import json
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 import logging
+from database.conexion import obtener_conexion
+from database.catalogo import catalogo
+from database.claves import clave_base, asignar_claves
+from database.colacion import nocase
+from database.kilates import SQL_KILATE_ID_PARAMETRO
+from database.precios import tabla_precios, historial_precios
+from database.escritor import ejecutar_escritura, ejecutar_escritura_async
 
-def crear_tablas():
-    """Crea las tablas de productos y empleados si no existen"""
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
-
-    # Tabla productos (Fuente de verdad)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS productos (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        clave TEXT UNIQUE NOT NULL,
-        nombre TEXT NOT NULL,
-        peso REAL NOT NULL,
-        kilataje TEXT NOT NULL,
-        categoria TEXT NOT NULL,
-        cantidad INTEGER NOT NULL
-    )
-    ''')
-
-    # Tabla empleados (Fuente de verdad)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS empleados (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nombre TEXT NOT NULL,
-        password TEXT NOT NULL
-    )
-    ''')
-    
-    # Nueva tabla para registrar ventas maestras
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS ventas (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        folio INTEGER NOT NULL,
-        fecha TEXT NOT NULL,
-        total REAL NOT NULL,
-        metodo_pago TEXT NOT NULL DEFAULT 'Efectivo',
-        empleado_id INTEGER NOT NULL,
-        cliente_nombre TEXT,
-        cliente_direccion TEXT,
-        cliente_cp TEXT,
-        cliente_telefono TEXT,
-        FOREIGN KEY (empleado_id) REFERENCES empleados(id)
-    )
-    ''')
-    
-    # Nueva tabla para registrar los detalles de cada venta
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS detalles_venta (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        venta_id INTEGER NOT NULL,
-        producto_id_original INTEGER NOT NULL, 
-        nombre TEXT NOT NULL,
-        peso REAL NOT NULL,
-        kilataje TEXT NOT NULL,
-        categoria TEXT NOT NULL,
-        precio_venta REAL NOT NULL,
-        FOREIGN KEY (venta_id) REFERENCES ventas(id)
-    )
-    ''')
+# --- ESCRITURAS ---
+# Todas las escrituras corren en el hilo escritor (database.escritor).
+# Las funciones _privadas reciben el cursor de la transacción y lanzan
+# excepción si algo falla; las públicas esperan el resultado y traducen el
+# error al valor de fallo que la UI ya espera (False / (None, None)).
 
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS kilatajes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        diez REAL NOT NULL,
-        catorce REAL NOT NULL,
-        italiano REAL NOT NULL
-    )
-    ''')
+def _escribir(funcion, *args, fallo=False):
+    """Ejecuta 'funcion' en el hilo escritor y espera a que se confirme"""
+    try:
+        return ejecutar_escritura(funcion, *args)
+    except sqlite3.Error as e:
+        logging.error(f"Error en {funcion.__name__}: {e}")
+        return fallo
 
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS apartados (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        folio INTEGER NOT NULL,
-        fecha_inicio TEXT NOT NULL,
-        empleado_id INTEGER NOT NULL,
-        total_venta REAL NOT NULL,
-        total_abonado REAL NOT NULL,
-        total_pendiente REAL NOT NULL, 
-        estado TEXT NOT NULL, 
-        cliente_nombre TEXT,
-        cliente_telefono TEXT,
-        FOREIGN KEY (empleado_id) REFERENCES empleados(id)
-    )
-    ''')
+async def _escribir_async(funcion, *args, fallo=False):
+    """Igual que _escribir pero sin bloquear el hilo del handler de Flet"""
+    try:
+        return await ejecutar_escritura_async(funcion, *args)
+    except sqlite3.Error as e:
+        logging.error(f"Error en {funcion.__name__}: {e}")
+        return fallo
 
+def _siguiente_folio(cursor, serie, maximo=10000):
+    """
+    Asigna el siguiente folio cíclico (1 - maximo) de la serie en una sola sentencia.
+    Debe llamarse dentro de la transacción del documento para que el folio
+    se confirme o se deshaga junto con él. Una serie nueva se crea en 1.
+    """
     cursor.execute('''
-    CREATE TABLE IF NOT EXISTS detalles_apartado (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        apartado_id INTEGER NOT NULL,
-        producto_id_original INTEGER NOT NULL,
-        nombre TEXT NOT NULL,
-        peso REAL NOT NULL,
-        kilataje TEXT NOT NULL,
-        precio_unitario REAL NOT NULL,
-        FOREIGN KEY (apartado_id) REFERENCES apartados(id)
-    )
-    ''')
+        INSERT INTO folios (serie, ultimo, maximo) VALUES (?, 1, ?)
+        ON CONFLICT(serie) DO UPDATE
+        SET ultimo = CASE WHEN ultimo >= maximo THEN 1 ELSE ultimo + 1 END
+        RETURNING ultimo
+    ''', (serie, maximo))
+    return cursor.fetchone()[0]
 
+def _crear_empleado(cursor, nombre, password):
     cursor.execute('''
-    CREATE TABLE IF NOT EXISTS abonos (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        apartado_id INTEGER NOT NULL,
-        fecha TEXT NOT NULL,
-        monto_abonado REAL NOT NULL,
-        metodo_pago TEXT NOT NULL,
-        empleado_id INTEGER NOT NULL,
-        FOREIGN KEY (apartado_id) REFERENCES apartados(id),
-        FOREIGN KEY (empleado_id) REFERENCES empleados(id)
-    )
-    ''')
-
-    conexion.commit()
-    conexion.close()
+        INSERT INTO empleados (nombre, password)
+        VALUES (?, ?)
+    ''', (nombre, password))
+    return True
 
 def crear_empleado(nombre, password):
     """
     Crea un nuevo empleado.
     Se eliminó 'codigo_identificador' para coincidir con la tabla.
     """
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
-    
-    try:
-        cursor.execute('''
-            INSERT INTO empleados (nombre, password)
-            VALUES (?, ?)
-        ''', (nombre, password))
-        
-        conexion.commit()
-        return True
-    except sqlite3.IntegrityError:
-        # Podría fallar si 'nombre' se define como UNIQUE
-        return False
-    finally:
-        conexion.close()
+    # Podría fallar (False) si 'nombre' se define como UNIQUE
+    return _escribir(_crear_empleado, nombre, password)
 
 def validar_empleado(nombre: str, password: str):
     """
     Valida las credenciales de un empleado por nombre y password.
     Cambiado de 'codigo_identificador' a 'nombre'.
     """
-    conexion = sqlite3.connect('inventario_joyeria.db')
+    conexion = obtener_conexion()
     cursor = conexion.cursor()
     cursor.execute(
         "SELECT id, nombre FROM empleados WHERE nombre = ? AND password = ?",
         (nombre, password)
     )
     resultado = cursor.fetchone()
-    conexion.close()
     return resultado if resultado else None
 
-def obtener_precios_oro():
+# --- KILATES Y PRECIOS ---
+
+def precio_vigente(fecha, kilate_id=None):
     """
-    Obtiene los precios actuales. Si no existen, inicializa en 0.
-    Retorna una tupla: (diez, catorce, italiano)
+    Precio por gramo vigente en 'fecha' (datetime o texto) según el historial.
+    Con kilate_id retorna ese precio (o None); sin él, {kilate_id: precio_gramo}.
     """
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
-    
-    # Intentamos obtener la primera fila (configuración única)
-    cursor.execute("SELECT diez, catorce, italiano FROM kilatajes WHERE id = 1")
-    resultado = cursor.fetchone()
-    
+    if kilate_id is None:
+        return historial_precios.precios_vigentes(_fecha_sql(fecha))
+    return historial_precios.precio_vigente(_fecha_sql(fecha), kilate_id)
+
+def obtener_kilates():
+    """[(id, codigo, nombre, precio_gramo, mano_obra, margen)] de la versión vigente"""
+    return tabla_precios.vigentes().kilates
+
+def _siguiente_version_precios(cursor):
+    cursor.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM kilates")
+    return cursor.fetchone()[0]
+
+def _actualizar_precios_kilates(cursor, precios):
+    """precios: {kilate_id: precio_gramo}. Todos los cambios comparten una misma versión nueva."""
+    version = _siguiente_version_precios(cursor)
+    cursor.executemany(
+        "UPDATE kilates SET precio_gramo = ?, version = ? WHERE id = ?",
+        [(precio, version, kilate_id) for kilate_id, precio in precios.items()]
+    )
+    return version
+
+def actualizar_precios_kilates(precios):
+    """
+    Actualiza el precio por gramo de uno o varios kilates en una sola transacción
+    y avisa a todas las sesiones suscritas (ver suscribir_precios) con la nueva versión.
+    Retorna la versión nueva o False si falló.
+    """
+    resultado = _escribir(_actualizar_precios_kilates, precios)
     if resultado:
-        conexion.close()
-        return resultado
-    else:
-        # Si no existe configuración, creamos la fila inicial en 0
-        cursor.execute("INSERT INTO kilatajes (id, diez, catorce, italiano) VALUES (1, 0.0, 0.0, 0.0)")
-        conexion.commit()
-        conexion.close()
-        return (0.0, 0.0, 0.0)
-
-def actualizar_precio_oro(diez, catorce, italiano):
-    """Actualiza los valores en la base de datos"""
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
-    try:
-        # Usamos UPDATE asegurando que solo tocamos la fila con id=1
-        cursor.execute('''
-            UPDATE kilatajes 
-            SET diez = ?, catorce = ?, italiano = ? 
-            WHERE id = 1
-        ''', (diez, catorce, italiano))
-        conexion.commit()
-        return True
-    except sqlite3.Error as e:
-        logging.error(f"Error actualizando precios oro: {e}")
-        return False
-    finally:
-        conexion.close()
+        tabla_precios.refrescar()
+    return resultado
+
+def _agregar_kilate(cursor, codigo, nombre, precio_gramo, mano_obra, margen):
+    version = _siguiente_version_precios(cursor)
+    cursor.execute('''
+        INSERT INTO kilates (codigo, nombre, precio_gramo, mano_obra, margen, version)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (codigo, nombre, precio_gramo, mano_obra, margen, version))
+    return cursor.lastrowid
+
+def agregar_kilate(codigo, nombre, precio_gramo=0.0, mano_obra=0.0, margen=0.0):
+    """Da de alta un kilate nuevo (ej. '18k', 'Plata'). Retorna su id o False si el código ya existe."""
+    resultado = _escribir(_agregar_kilate, codigo, nombre, precio_gramo, mano_obra, margen)
+    if resultado:
+        tabla_precios.refrescar()
+    return resultado
+
+def obtener_precios_vigentes():
+    """Foto versionada de los precios (PreciosOro), compartida entre sesiones"""
+    return tabla_precios.vigentes()
+
+def suscribir_precios(callback):
+    """callback(precios) se llama cada vez que cambia la versión de precios"""
+    tabla_precios.suscribir(callback)
 
 def obtener_productos():
-    """Obtiene todos los productos de la base de datos"""
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
-    
-    cursor.execute("SELECT * FROM productos")
-    productos = cursor.fetchall()
-    
-    conexion.close()
-    return productos
+    """Obtiene todos los productos (desde la caché del catálogo)"""
+    return catalogo.productos()
 
 def obtener_producto_por_clave(clave):
     """
     Obtiene un producto por su clave.
     Cambiado de 'obtener_producto_por_barcode' a 'obtener_producto_por_clave'.
     """
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
-    cursor.execute("SELECT * FROM productos WHERE clave = ?", (clave,))
-    producto = cursor.fetchone()
-    conexion.close()
-    return producto
+    return catalogo.por_clave(clave)
 
-def agregar_producto(clave, nombre, peso, kilataje, categoria, cantidad):
-    
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
+# Columnas permitidas para ordenar (nunca se interpola texto del usuario)
+ORDEN_PRODUCTOS = {
+    "nombre": "p.nombre COLLATE NOCASE",
+    "kilataje": "p.kilataje COLLATE NOCASE",
+    "categoria": "p.categoria COLLATE NOCASE",
+}
+
+def _consulta_fts(texto):
+    """Convierte el texto del buscador en una consulta FTS5 por prefijos: 'cad 10' -> "cad"* "10"*"""
+    terminos = [t.replace('"', '') for t in str(texto).split()]
+    return " ".join(f'"{t}"*' for t in terminos if t)
+
+def buscar_productos(texto="", orden="nombre", limit=None, offset=0, cancelada=None):
+    """
+    Busca productos por nombre, kilataje, categoría o clave (coincidencia por prefijo).
+    orden: "nombre", "kilataje", "categoria" o "relevancia".
+    El filtrado, el ranking y el orden se resuelven dentro de SQLite.
+    cancelada: función opcional; si retorna True la consulta se interrumpe y se retorna None.
+    """
+    if cancelada is None:
+        return _buscar_productos(texto, orden, limit, offset)
+    if cancelada():
+        return None
+
+    conexion = obtener_conexion()
+    # SQLite llama al handler cada N instrucciones de la VM; retornar 1 aborta la consulta
+    conexion.set_progress_handler(lambda: 1 if cancelada() else 0, 1000)
     try:
-        cursor.execute('''
-            INSERT INTO productos (clave, nombre, peso, kilataje, categoria, cantidad)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (clave, nombre, peso, kilataje, categoria, cantidad))
-        conexion.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
+        return _buscar_productos(texto, orden, limit, offset)
+    except sqlite3.OperationalError:
+        if cancelada():
+            return None
+        raise
     finally:
-        conexion.close()
+        conexion.set_progress_handler(None, 0)
+
+def _buscar_productos(texto, orden, limit, offset):
+    conexion = obtener_conexion()
+    cursor = conexion.cursor()
+    consulta = _consulta_fts(texto)
+    limite = -1 if limit is None else limit
+
+    if not consulta:
+        columna = ORDEN_PRODUCTOS.get(orden, ORDEN_PRODUCTOS["nombre"])
+        cursor.execute(
+            f"SELECT p.* FROM productos p ORDER BY {columna}, p.id LIMIT ? OFFSET ?",
+            (limite, offset)
+        )
+        return cursor.fetchall()
+
+    if orden in ORDEN_PRODUCTOS:
+        orden_sql = f"{ORDEN_PRODUCTOS[orden]}, productos_fts.rank, p.id"
+    else:
+        orden_sql = "productos_fts.rank, p.id"
+
+    cursor.execute(f'''
+        SELECT p.*
+        FROM productos_fts
+        JOIN productos p ON p.id = productos_fts.rowid
+        WHERE productos_fts MATCH ?
+        ORDER BY {orden_sql}
+        LIMIT ? OFFSET ?
+    ''', (consulta, limite, offset))
+    return cursor.fetchall()
+
+def obtener_productos_pagina(after_key=None, limit=50, orden="nombre"):
+    """
+    Paginación por llave (keyset) del catálogo ordenado.
+    after_key: (valor_orden, id) del último producto de la página anterior, None para la primera.
+    Retorna (productos, siguiente_key). siguiente_key es None cuando ya no hay más páginas.
+    Se resuelve en memoria sobre la caché del catálogo (bisect sobre la lista ordenada).
+    """
+    return catalogo.pagina(after_key, limit, orden)
+
+def _agregar_producto(cursor, clave, nombre, peso, kilataje, categoria, cantidad):
+    cursor.execute(f'''
+        INSERT INTO productos (clave, nombre, peso, kilataje, categoria, cantidad, kilate_id)
+        VALUES (?, ?, ?, ?, ?, ?, {SQL_KILATE_ID_PARAMETRO})
+    ''', (clave, nombre, peso, kilataje, categoria, cantidad, kilataje))
+    return True
+
+def agregar_producto(clave, nombre, peso, kilataje, categoria, cantidad):
+    """Retorna False si la clave ya existe"""
+    return _escribir(_agregar_producto, clave, nombre, peso, kilataje, categoria, cantidad)
+
+async def agregar_producto_async(clave, nombre, peso, kilataje, categoria, cantidad):
+    return await _escribir_async(_agregar_producto, clave, nombre, peso, kilataje, categoria, cantidad)
+
+def _actualizar_producto(cursor, id_producto, clave, nombre, peso, kilataje, categoria, cantidad):
+    cursor.execute(f'''
+        UPDATE productos 
+        SET clave=?, nombre=?, peso=?, kilataje=?, categoria=?, cantidad=?,
+            kilate_id={SQL_KILATE_ID_PARAMETRO}
+        WHERE id=?
+    ''', (clave, nombre, peso, kilataje, categoria, cantidad, kilataje, id_producto))
+    return True
 
 def actualizar_producto(id_producto, clave, nombre, peso, kilataje, categoria, cantidad):
     """
@@ -238,253 +253,419 @@ def actualizar_producto(id_producto, clave, nombre, peso, kilataje, categoria, c
     Las columnas 'marca', 'precio', 'cantidad' y 'codigo_barras' 
     fueron reemplazadas por 'peso' y 'kilataje' para coincidir con la tabla.
     """
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
-    try:
-        cursor.execute('''
-            UPDATE productos 
-            SET clave=?, nombre=?, peso=?, kilataje=?, categoria=?, cantidad=?
-            WHERE id=?
-        ''', (clave, nombre, peso, kilataje, categoria, cantidad, id_producto))
-        conexion.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conexion.close()
+    return _escribir(_actualizar_producto, id_producto, clave, nombre, peso, kilataje, categoria, cantidad)
+
+async def actualizar_producto_async(id_producto, clave, nombre, peso, kilataje, categoria, cantidad):
+    return await _escribir_async(_actualizar_producto, id_producto, clave, nombre, peso, kilataje, categoria, cantidad)
+
+def _eliminar_producto(cursor, id_producto):
+    cursor.execute("DELETE FROM productos WHERE id = ?", (id_producto,))
+    return cursor.rowcount > 0  # Retorna True si se eliminó algún registro
 
 def eliminar_producto(id_producto):
-    conexion = sqlite3.connect('inventario_joyeria.db')
-    cursor = conexion.cursor()
-    try:
-        cursor.execute("DELETE FROM productos WHERE id = ?", (id_producto,))
-        conexion.commit()
-        return cursor.rowcount > 0  # Retorna True si se eliminó algún registro
-    except sqlite3.Error:
-        return False
-    finally:
-        conexion.close()
+    return _escribir(_eliminar_producto, id_producto)
+
+# --- IMPORTACIÓN MASIVA ---
+
+# Encabezado de CSV -> campo. Acepta el mismo formato que exportar_inventario_csv.
+ENCABEZADOS_IMPORTACION = {
+    "clave": "clave",
+    "nombre": "nombre",
+    "peso": "peso",
+    "peso (gr)": "peso",
+    "kilataje": "kilataje",
+    "categoria": "categoria",
+    "categoría": "categoria",
+    "cantidad": "cantidad",
+    "stock": "cantidad",
+}
+
+def _validar_filas_producto(filas):
+    """
+    Valida y normaliza las filas (dicts) antes de abrir la transacción.
+    Retorna (validas, errores): validas = [(numero, clave|None, nombre, peso, peso_texto,
+    kilataje, categoria, cantidad)], errores = [(numero, motivo)]. 'numero' empieza en 1.
+    """
+    codigos = {nocase(k[1]): k[1] for k in obtener_kilates()}
+    validas, errores = [], []
+    for numero, fila in enumerate(filas, start=1):
+        nombre = str(fila.get("nombre") or "").strip()
+        categoria = str(fila.get("categoria") or "").strip()
+        kilataje = codigos.get(nocase(str(fila.get("kilataje") or "").strip()))
+        peso_texto = str(fila.get("peso") or "").strip()
+        clave = str(fila.get("clave") or "").strip() or None
+
+        if not nombre or not categoria:
+            errores.append((numero, "Nombre y Categoría son obligatorios"))
+            continue
+        if kilataje is None:
+            errores.append((numero, f"Kilataje desconocido: {fila.get('kilataje')}"))
+            continue
+        try:
+            peso = float(peso_texto.replace(",", "."))
+            cantidad = int(fila.get("cantidad") or 1)
+        except ValueError:
+            errores.append((numero, "Peso o cantidad no numéricos"))
+            continue
+        if peso <= 0 or cantidad < 1:
+            errores.append((numero, "Peso y cantidad deben ser mayores a 0"))
+            continue
+        validas.append((numero, clave, nombre, peso, peso_texto, kilataje, categoria, cantidad))
+    return validas, errores
+
+def _importar_productos(cursor, filas):
+    """
+    Inserta las filas ya validadas en una sola transacción: genera las claves
+    faltantes (sin chocar con las del mismo lote) y escribe todo con un executemany.
+    """
+    # Claves capturadas: una sola consulta para saber cuáles ya existen
+    capturadas = [f[1] for f in filas if f[1] is not None]
+    cursor.execute(
+        "SELECT value FROM json_each(?) WHERE value IN (SELECT clave FROM productos)",
+        (json.dumps(capturadas),)
+    )
+    existentes = {fila[0] for fila in cursor.fetchall()}
+
+    usadas = set()
+    aceptadas, errores = [], []
+    for fila in filas:
+        clave = fila[1]
+        if clave is not None:
+            if clave in usadas or clave in existentes:
+                errores.append((fila[0], f"Clave duplicada: {clave}"))
+                continue
+            usadas.add(clave)
+        aceptadas.append(fila)
+
+    # Claves automáticas de todo el lote a la vez
+    sin_clave = [f for f in aceptadas if f[1] is None]
+    generadas = iter(asignar_claves(
+        cursor,
+        [clave_base(f[5], f[2], f[4]) for f in sin_clave],
+        reservadas=usadas
+    ))
+
+    registros = []
+    for numero, clave, nombre, peso, peso_texto, kilataje, categoria, cantidad in aceptadas:
+        if clave is None:
+            clave = next(generadas)
+        registros.append((clave, nombre, peso, kilataje, categoria, cantidad, kilataje))
+
+    cursor.executemany(f'''
+        INSERT INTO productos (clave, nombre, peso, kilataje, categoria, cantidad, kilate_id)
+        VALUES (?, ?, ?, ?, ?, ?, {SQL_KILATE_ID_PARAMETRO})
+    ''', registros)
+    return len(registros), errores
+
+def importar_productos(filas):
+    """
+    Alta masiva de productos en una sola transacción.
+    filas: dicts con nombre, peso, kilataje, categoria y opcionalmente clave y cantidad
+    (sin clave se genera una automática, igual que en el alta individual).
+    Retorna (insertados, errores) con errores = [(numero_fila, motivo)];
+    las filas con error se omiten y el resto se guarda.
+    """
+    validas, errores = _validar_filas_producto(filas)
+    if not validas:
+        return 0, errores
+    insertados, duplicadas = _escribir(_importar_productos, validas, fallo=(0, [(0, "Error al guardar")]))
+    return insertados, sorted(errores + duplicadas)
+
+async def importar_productos_async(filas):
+    validas, errores = await asyncio.to_thread(_validar_filas_producto, filas)
+    if not validas:
+        return 0, errores
+    insertados, duplicadas = await _escribir_async(_importar_productos, validas, fallo=(0, [(0, "Error al guardar")]))
+    return insertados, sorted(errores + duplicadas)
+
+def generar_clave(kilataje, nombre, peso):
+    """Siguiente clave libre para el producto (una sola consulta por rango de prefijo)"""
+    return asignar_claves(obtener_conexion().cursor(), [clave_base(kilataje, nombre, peso)])[0]
+
+def leer_csv_productos(ruta):
+    """Lee un CSV de productos (ver ENCABEZADOS_IMPORTACION) como lista de dicts para importar_productos"""
+    with open(ruta, newline='', encoding='utf-8-sig') as f:
+        lector = csv.reader(f)
+        encabezados = [ENCABEZADOS_IMPORTACION.get(h.strip().lower()) for h in next(lector, [])]
+        return [
+            {campo: valor for campo, valor in zip(encabezados, fila) if campo}
+            for fila in lector if any(celda.strip() for celda in fila)
+        ]
         
+def _descontar_stock(cursor, lineas):
+    """
+    Lógica de inventario híbrido: resta la cantidad vendida de cada línea y
+    elimina los productos que se quedan sin existencias.
+    lineas: [(producto_tuple, precio, cantidad), ...]
+    """
+    cursor.executemany(
+        "UPDATE productos SET cantidad = cantidad - ? WHERE id = ?",
+        [(cantidad, producto[0]) for producto, _, cantidad in lineas]
+    )
+    cursor.executemany(
+        "DELETE FROM productos WHERE id = ? AND cantidad <= 0",
+        [(producto[0],) for producto, _, _ in lineas]
+    )
+
+def _kilate_id(producto):
+    # Indices: [0]id, [1]key, [2]name, [3]weight, [4]karat, [5]category, [6]qty, [7]kilate_id
+    return producto[7] if len(producto) > 7 else None
+
+def _registrar_venta(cursor, empleado_id, productos_vendidos, total, metodo_pago, cliente_data):
+    fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    # --- LÓGICA DEL FOLIO CÍCLICO (1 - 10000) ---
+    nuevo_folio = _siguiente_folio(cursor, "ventas")
+
+    # 1. Registrar Venta con los datos del cliente y el nuevo folio
+    cursor.execute('''
+        INSERT INTO ventas (
+            folio, fecha, total, empleado_id, metodo_pago, 
+            cliente_nombre, cliente_direccion, cliente_cp, cliente_telefono,
+            version_precios
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) FROM kilates))
+    ''', (
+        nuevo_folio, 
+        fecha_actual, 
+        total, 
+        empleado_id, 
+        metodo_pago,
+        cliente_data.get('nombre', 'Público General'),
+        cliente_data.get('direccion', ''),
+        cliente_data.get('cp', ''),
+        cliente_data.get('telefono', '')
+    ))
+
+    venta_id = cursor.lastrowid # Este es el ID único interno de la BD
+
+    # 2. Procesar productos: una fila de detalle por línea del carrito, con el
+    # kilate del producto; si no lo tiene, se deduce del texto de kilataje
+    cursor.executemany(f'''
+        INSERT INTO detalles_venta 
+        (venta_id, producto_id_original, nombre, peso, kilataje, categoria, precio_venta, cantidad, kilate_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, {SQL_KILATE_ID_PARAMETRO}))
+    ''', [
+        (venta_id, producto[0], producto[2], producto[3], producto[4], producto[5], precio, cantidad,
+         _kilate_id(producto), producto[4])
+        for producto, precio, cantidad in productos_vendidos
+    ])
+
+    _descontar_stock(cursor, productos_vendidos)
+
+    return venta_id, nuevo_folio # Retornamos ambos para mostrar el folio al usuario
+
 def registrar_venta(empleado_id, productos_vendidos, total, metodo_pago, cliente_data):
     """
+    productos_vendidos: Líneas del carrito [(producto_tuple, precio_unitario, cantidad), ...]
     cliente_data: Diccionario con {nombre, direccion, cp, telefono}
+    Retorna (venta_id, folio) o (None, None) si falló.
     """
-    conexion = sqlite3.connect("inventario_joyeria.db")
-    cursor = conexion.cursor()
+    return _escribir(_registrar_venta, empleado_id, productos_vendidos, total, metodo_pago, cliente_data, fallo=(None, None))
+
+async def registrar_venta_async(empleado_id, productos_vendidos, total, metodo_pago, cliente_data):
+    return await _escribir_async(_registrar_venta, empleado_id, productos_vendidos, total, metodo_pago, cliente_data, fallo=(None, None))
+
+def _registrar_apartado(cursor, empleado_id, productos_apartados, total_venta, abono_inicial, metodo_pago_abono, cliente_data):
     fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    try:
-        # --- LÓGICA DEL FOLIO CÍCLICO (1 - 10000) ---
-        # Obtenemos el último folio registrado (ordenado por ID descendente)
-        cursor.execute("SELECT folio FROM ventas ORDER BY id DESC LIMIT 1")
-        resultado = cursor.fetchone()
-        
-        nuevo_folio = 1
-        if resultado:
-            ultimo_folio = resultado[0]
-            if ultimo_folio >= 10000:
-                nuevo_folio = 1 # Reiniciamos el ciclo
-            else:
-                nuevo_folio = ultimo_folio + 1
-        
-        # 1. Registrar Venta con los datos del cliente y el nuevo folio
-        cursor.execute('''
-            INSERT INTO ventas (
-                folio, fecha, total, empleado_id, metodo_pago, 
-                cliente_nombre, cliente_direccion, cliente_cp, cliente_telefono
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            nuevo_folio, 
-            fecha_actual, 
-            total, 
-            empleado_id, 
-            metodo_pago,
-            cliente_data.get('nombre', 'Público General'),
-            cliente_data.get('direccion', ''),
-            cliente_data.get('cp', ''),
-            cliente_data.get('telefono', '')
-        ))
-        
-        venta_id = cursor.lastrowid # Este es el ID único interno de la BD
-        
-        # 2. Procesar productos (Igual que antes)
-        for producto_tuple, precio_final in productos_vendidos:
-            p_id = producto_tuple[0]
-            
-            cursor.execute('''
-                INSERT INTO detalles_venta 
-                (venta_id, producto_id_original, nombre, peso, kilataje, categoria, precio_venta)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (venta_id, p_id, producto_tuple[2], producto_tuple[3], producto_tuple[4], producto_tuple[5], precio_final))
-            
-            # Lógica de inventario híbrido
-            cursor.execute("SELECT cantidad FROM productos WHERE id = ?", (p_id,))
-            res_stock = cursor.fetchone()
-            if res_stock:
-                stock_actual = res_stock[0]
-                if stock_actual > 1:
-                    cursor.execute("UPDATE productos SET cantidad = cantidad - 1 WHERE id = ?", (p_id,))
-                else:
-                    cursor.execute("DELETE FROM productos WHERE id = ?", (p_id,))
-        
-        conexion.commit()
-        return venta_id, nuevo_folio # Retornamos ambos para mostrar el folio al usuario
-    
-    except sqlite3.Error as e:
-        conexion.rollback()
-        logging.error(f"Error fatal en venta: {e}")
-        return None, None
-    finally:
-        conexion.close()
+    # 1. Generar Folio Cíclico para Apartados
+    nuevo_folio = _siguiente_folio(cursor, "apartados")
+
+    total_pendiente = total_venta - abono_inicial
+
+    # 2. Registrar el Apartado Maestro
+    cursor.execute('''
+        INSERT INTO apartados (
+            folio, fecha_inicio, empleado_id, total_venta, total_abonado, 
+            total_pendiente, estado, cliente_nombre, cliente_telefono
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        nuevo_folio, fecha_actual, empleado_id, total_venta, abono_inicial, 
+        total_pendiente, "Pendiente", 
+        cliente_data.get('nombre', 'Cliente Apartado'),
+        cliente_data.get('telefono', '')
+    ))
+
+    apartado_id = cursor.lastrowid
+
+    # 3. Registrar el primer abono
+    cursor.execute('''
+        INSERT INTO abonos (apartado_id, fecha, monto_abonado, metodo_pago, empleado_id)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (apartado_id, fecha_actual, abono_inicial, metodo_pago_abono, empleado_id))
+
+    # 4. Registrar detalles (con su kilate, igual que en ventas) y descontar stock
+    # NOTA: Recibimos las líneas del carrito [(prod, precio_unitario, cantidad)]
+    cursor.executemany(f'''
+        INSERT INTO detalles_apartado (apartado_id, producto_id_original, nombre, peso, kilataje, precio_unitario, cantidad, kilate_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, {SQL_KILATE_ID_PARAMETRO}))
+    ''', [
+        (apartado_id, producto[0], producto[2], producto[3], producto[4], precio, cantidad,
+         _kilate_id(producto), producto[4])
+        for producto, precio, cantidad in productos_apartados
+    ])
+
+    _descontar_stock(cursor, productos_apartados)
+
+    return apartado_id, nuevo_folio
 
 def registrar_apartado(empleado_id, productos_apartados, total_venta, abono_inicial, metodo_pago_abono, cliente_data):
-    conexion = sqlite3.connect("inventario_joyeria.db")
-    cursor = conexion.cursor()
-    fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    try:
-        # 1. Generar Folio Cíclico para Apartados
-        cursor.execute("SELECT folio FROM apartados ORDER BY id DESC LIMIT 1")
-        resultado = cursor.fetchone()
-        nuevo_folio = 1
-        if resultado:
-            nuevo_folio = 1 if resultado[0] >= 10000 else resultado[0] + 1
-
-        total_pendiente = total_venta - abono_inicial
-        
-        # 2. Registrar el Apartado Maestro
-        cursor.execute('''
-            INSERT INTO apartados (
-                folio, fecha_inicio, empleado_id, total_venta, total_abonado, 
-                total_pendiente, estado, cliente_nombre, cliente_telefono
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            nuevo_folio, fecha_actual, empleado_id, total_venta, abono_inicial, 
-            total_pendiente, "Pendiente", 
-            cliente_data.get('nombre', 'Cliente Apartado'),
-            cliente_data.get('telefono', '')
-        ))
-        
-        apartado_id = cursor.lastrowid
-        
-        # 3. Registrar el primer abono
-        cursor.execute('''
-            INSERT INTO abonos (apartado_id, fecha, monto_abonado, metodo_pago, empleado_id)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (apartado_id, fecha_actual, abono_inicial, metodo_pago_abono, empleado_id))
-        
-        # 4. Registrar detalles y descontar stock
-        for producto_dicc in productos_apartados:
-            # NOTA: Recibimos lista de tuplas [(prod, precio)] ya aplanada desde el modal
-            producto = producto_dicc[0] # Tupla DB
-            precio_unitario = producto_dicc[1] # Precio
-            
-            cursor.execute('''
-                INSERT INTO detalles_apartado (apartado_id, producto_id_original, nombre, peso, kilataje, precio_unitario)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (apartado_id, producto[0], producto[2], producto[3], producto[4], precio_unitario))
-            
-            # Descontar inventario (Lógica Híbrida)
-            cursor.execute("SELECT cantidad FROM productos WHERE id = ?", (producto[0],))
-            res = cursor.fetchone()
-            if res:
-                if res[0] > 1:
-                    cursor.execute("UPDATE productos SET cantidad = cantidad - 1 WHERE id = ?", (producto[0],))
-                else:
-                    cursor.execute("DELETE FROM productos WHERE id = ?", (producto[0],))
-        
-        conexion.commit()
-        return apartado_id, nuevo_folio
-    
-    except sqlite3.Error as e:
-        conexion.rollback()
-        logging.error(f"Error al registrar apartado: {e}")
-        return None, None
-    finally:
-        conexion.close()
+    """Retorna (apartado_id, folio) o (None, None) si falló."""
+    return _escribir(_registrar_apartado, empleado_id, productos_apartados, total_venta, abono_inicial, metodo_pago_abono, cliente_data, fallo=(None, None))
 
-def obtener_ventas_por_empleado_hoy():
-    """Retorna [(Nombre Empleado, Total Vendido), ...] del día actual"""
-    conexion = sqlite3.connect('inventario_joyeria.db')
+async def registrar_apartado_async(empleado_id, productos_apartados, total_venta, abono_inicial, metodo_pago_abono, cliente_data):
+    return await _escribir_async(_registrar_apartado, empleado_id, productos_apartados, total_venta, abono_inicial, metodo_pago_abono, cliente_data, fallo=(None, None))
+
+# --- REPORTES POR RANGO DE FECHAS ---
+# Las fechas se guardan como texto 'YYYY-MM-DD HH:MM:SS', que ordena igual que
+# el tiempo. Filtrar con un rango semiabierto [inicio, fin) sobre la columna
+# sin funciones permite usar idx_ventas_fecha en lugar de recorrer toda la tabla.
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+def _fecha_sql(valor):
+    """Acepta datetime, date o texto y lo convierte al formato guardado en la BD"""
+    if isinstance(valor, datetime):
+        return valor.strftime(FORMATO_FECHA)
+    if isinstance(valor, date):
+        return datetime.combine(valor, time.min).strftime(FORMATO_FECHA)
+    return str(valor)
+
+def rango_dia(dia=None):
+    """Retorna (inicio, fin) del día indicado (hoy por defecto) como rango semiabierto"""
+    dia = dia or date.today()
+    inicio = datetime.combine(dia, time.min)
+    return _fecha_sql(inicio), _fecha_sql(inicio + timedelta(days=1))
+
+def obtener_ventas_por_empleado(inicio, fin):
+    """Retorna [(Nombre Empleado, Total Vendido), ...] con fecha en [inicio, fin)"""
+    conexion = obtener_conexion()
     cursor = conexion.cursor()
-    fecha_hoy = datetime.now().strftime("%Y-%m-%d")
     
     cursor.execute('''
         SELECT e.nombre, SUM(v.total) 
         FROM ventas v
         JOIN empleados e ON v.empleado_id = e.id
-        WHERE date(v.fecha) = ?
+        WHERE v.fecha >= ? AND v.fecha < ?
         GROUP BY e.nombre
-    ''', (fecha_hoy,))
+    ''', (_fecha_sql(inicio), _fecha_sql(fin)))
     
     resultados = cursor.fetchall()
-    conexion.close()
     return resultados
 
-def obtener_total_ventas_hoy():
-    """Retorna el monto total de dinero ingresado hoy"""
-    conexion = sqlite3.connect('inventario_joyeria.db')
+def obtener_total_ventas(inicio, fin):
+    """Retorna el monto total de dinero ingresado en [inicio, fin)"""
+    conexion = obtener_conexion()
     cursor = conexion.cursor()
-    fecha_hoy = datetime.now().strftime("%Y-%m-%d")
     
-    cursor.execute("SELECT SUM(total) FROM ventas WHERE date(fecha) = ?", (fecha_hoy,))
+    cursor.execute(
+        "SELECT SUM(total) FROM ventas WHERE fecha >= ? AND fecha < ?",
+        (_fecha_sql(inicio), _fecha_sql(fin))
+    )
     resultado = cursor.fetchone()
-    conexion.close()
     return resultado[0] if resultado and resultado[0] else 0.0
 
-def obtener_detalle_ventas_hoy():
+def obtener_detalle_ventas(inicio, fin):
     """
-    Retorna los productos individuales vendidos hoy.
-    Devuelve: [(Folio, Clave, Nombre, Peso, PrecioVenta, Vendedor), ...]
+    Retorna las líneas de producto vendidas en [inicio, fin).
+    Devuelve: [(Folio, Clave, Nombre, Peso, ImporteLinea, Vendedor, Cantidad), ...]
     """
-    conexion = sqlite3.connect("inventario_joyeria.db")
+    conexion = obtener_conexion()
     cursor = conexion.cursor()
-    fecha_hoy = datetime.now().strftime("%Y-%m-%d")
     
     cursor.execute('''
-        SELECT v.folio, p.clave, dv.nombre, dv.peso, dv.precio_venta, e.nombre
+        SELECT v.folio, p.clave, dv.nombre, dv.peso, dv.precio_venta * dv.cantidad, e.nombre, dv.cantidad
         FROM ventas v
         JOIN detalles_venta dv ON v.id = dv.venta_id
         LEFT JOIN productos p ON dv.producto_id_original = p.id -- Ojo: Si se borró de productos, la clave podría no estar, pero el nombre sí en dv
         JOIN empleados e ON v.empleado_id = e.id
-        WHERE date(v.fecha) = ?
+        WHERE v.fecha >= ? AND v.fecha < ?
         ORDER BY v.folio DESC
-    ''', (fecha_hoy,))
+    ''', (_fecha_sql(inicio), _fecha_sql(fin)))
     
     resultados = cursor.fetchall()
-    conexion.close()
     return resultados
 
-def exportar_ventas_csv():
+def obtener_margen_ventas(inicio, fin):
+    """
+    Margen de cada línea vendida en [inicio, fin) contra el precio del oro
+    vigente cuando se hizo la venta (por versión de precios o, en ventas
+    anteriores al sellado de versión, por fecha).
+    Devuelve: [(Folio, Fecha, Nombre, Kilataje, Peso, Cantidad, Importe, CostoOro, Margen), ...]
+    CostoOro y Margen son None si no hay precio histórico para esa venta.
+    """
+    conexion = obtener_conexion()
+    cursor = conexion.cursor()
+
+    cursor.execute('''
+        SELECT v.folio, v.fecha, v.version_precios, dv.nombre, dv.kilataje, dv.peso,
+               dv.cantidad, dv.precio_venta * dv.cantidad, dv.kilate_id
+        FROM ventas v
+        JOIN detalles_venta dv ON v.id = dv.venta_id
+        WHERE v.fecha >= ? AND v.fecha < ?
+        ORDER BY v.fecha
+    ''', (_fecha_sql(inicio), _fecha_sql(fin)))
+
+    resultados = []
+    for folio, fecha, version, nombre, kilataje, peso, cantidad, importe, kilate_id in cursor.fetchall():
+        if version is not None:
+            precio_gramo = historial_precios.precio_version(version, kilate_id)
+        else:
+            precio_gramo = historial_precios.precio_vigente(fecha, kilate_id)
+        costo = margen = None
+        if precio_gramo is not None:
+            costo = peso * precio_gramo * cantidad
+            margen = importe - costo
+        resultados.append((folio, fecha, nombre, kilataje, peso, cantidad, importe, costo, margen))
+    return resultados
+
+def obtener_ventas_por_empleado_hoy():
+    """Retorna [(Nombre Empleado, Total Vendido), ...] del día actual"""
+    return obtener_ventas_por_empleado(*rango_dia())
+
+def obtener_total_ventas_hoy():
+    """Retorna el monto total de dinero ingresado hoy"""
+    return obtener_total_ventas(*rango_dia())
+
+def obtener_detalle_ventas_hoy():
+    """
+    Retorna las líneas de producto vendidas hoy.
+    Devuelve: [(Folio, Clave, Nombre, Peso, ImporteLinea, Vendedor, Cantidad), ...]
+    """
+    return obtener_detalle_ventas(*rango_dia())
+
+def exportar_ventas_csv(inicio=None, fin=None):
     """
     MODIFICADO: Ahora genera un reporte detallado ITEM POR ITEM.
+    Sin fechas exporta el día actual.
     """
-    conexion = sqlite3.connect("inventario_joyeria.db")
+    if inicio is None or fin is None:
+        inicio, fin = rango_dia()
+
+    conexion = obtener_conexion()
     cursor = conexion.cursor()
-    fecha_hoy = datetime.now().strftime("%Y-%m-%d")
     
     # Consulta detallada plana
     cursor.execute('''
         SELECT v.folio, time(v.fecha), e.nombre, v.cliente_nombre, 
-        dv.nombre, dv.kilataje, dv.peso, dv.precio_venta
+        dv.nombre, dv.kilataje, dv.peso, dv.precio_venta, dv.cantidad
         FROM ventas v
         JOIN detalles_venta dv ON v.id = dv.venta_id
         JOIN empleados e ON v.empleado_id = e.id
-        WHERE date(v.fecha) = ?
+        WHERE v.fecha >= ? AND v.fecha < ?
         ORDER BY v.folio ASC
-    ''', (fecha_hoy,))
+    ''', (_fecha_sql(inicio), _fecha_sql(fin)))
     
     filas = cursor.fetchall()
-    conexion.close()
     
     # Cabeceras
-    datos = [["Folio", "Hora", "Vendedor", "Cliente", "Producto", "Kilataje", "Peso", "Precio Venta"]]
+    datos = [["Folio", "Hora", "Vendedor", "Cliente", "Producto", "Kilataje", "Peso", "Precio Venta", "Cantidad", "Importe"]]
     for f in filas:
         datos.append([
             str(f[0]), f[1], f[2], f[3] or "Publico", 
-            f[4], f[5], str(f[6]), f"${f[7]:.2f}"
+            f[4], f[5], str(f[6]), f"${f[7]:.2f}", str(f[8]), f"${f[7] * f[8]:.2f}"
         ])
         
     return datos
@@ -500,6 +681,3 @@ def exportar_inventario_csv():
         datos.append([p[1], p[2], str(p[3]), p[4], p[5], str(stock)])
         
     return datos
-
-# Crear tablas al importar este módulo
-crear_tablas()
\ No newline at end of file
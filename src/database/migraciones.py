@@ -0,0 +1,349 @@
+import logging
+
+from database.conexion import crear_conexion, optimizar
+from database.kilates import sql_kilate_id
+
+# Migraciones del esquema, numeradas por PRAGMA user_version.
+# Cada una corre una sola vez, en su propia transacción, y al terminar deja
+# user_version en su número. Reglas: nunca editar ni reordenar una migración
+# ya publicada; los cambios nuevos se agregan al final de MIGRACIONES.
+# Las primeras son idempotentes (IF NOT EXISTS) porque las bases anteriores
+# a este esquema versionado ya tienen parte de las tablas con user_version 0.
+
+def _agregar_columna_si_falta(cursor, tabla, columna, definicion):
+    """ALTER TABLE ... ADD COLUMN solo si la columna aún no existe (bases antiguas)"""
+    cursor.execute(f"PRAGMA table_info({tabla})")
+    if columna not in [fila[1] for fila in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+
+def _m001_esquema_inicial(cursor):
+    """Tablas originales del sistema"""
+    # Tabla productos (Fuente de verdad)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS productos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        clave TEXT UNIQUE NOT NULL,
+        nombre TEXT NOT NULL,
+        peso REAL NOT NULL,
+        kilataje TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        cantidad INTEGER NOT NULL
+    )
+    ''')
+
+    # Tabla empleados (Fuente de verdad)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS empleados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL,
+        password TEXT NOT NULL
+    )
+    ''')
+    
+    # Nueva tabla para registrar ventas maestras
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS ventas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        folio INTEGER NOT NULL,
+        fecha TEXT NOT NULL,
+        total REAL NOT NULL,
+        metodo_pago TEXT NOT NULL DEFAULT 'Efectivo',
+        empleado_id INTEGER NOT NULL,
+        cliente_nombre TEXT,
+        cliente_direccion TEXT,
+        cliente_cp TEXT,
+        cliente_telefono TEXT,
+        FOREIGN KEY (empleado_id) REFERENCES empleados(id)
+    )
+    ''')
+    
+    # Nueva tabla para registrar los detalles de cada venta
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS detalles_venta (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        venta_id INTEGER NOT NULL,
+        producto_id_original INTEGER NOT NULL, 
+        nombre TEXT NOT NULL,
+        peso REAL NOT NULL,
+        kilataje TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        precio_venta REAL NOT NULL,
+        cantidad INTEGER NOT NULL DEFAULT 1,
+        FOREIGN KEY (venta_id) REFERENCES ventas(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS kilatajes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        diez REAL NOT NULL,
+        catorce REAL NOT NULL,
+        italiano REAL NOT NULL
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS apartados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        folio INTEGER NOT NULL,
+        fecha_inicio TEXT NOT NULL,
+        empleado_id INTEGER NOT NULL,
+        total_venta REAL NOT NULL,
+        total_abonado REAL NOT NULL,
+        total_pendiente REAL NOT NULL, 
+        estado TEXT NOT NULL, 
+        cliente_nombre TEXT,
+        cliente_telefono TEXT,
+        FOREIGN KEY (empleado_id) REFERENCES empleados(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS detalles_apartado (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        apartado_id INTEGER NOT NULL,
+        producto_id_original INTEGER NOT NULL,
+        nombre TEXT NOT NULL,
+        peso REAL NOT NULL,
+        kilataje TEXT NOT NULL,
+        precio_unitario REAL NOT NULL,
+        cantidad INTEGER NOT NULL DEFAULT 1,
+        FOREIGN KEY (apartado_id) REFERENCES apartados(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS abonos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        apartado_id INTEGER NOT NULL,
+        fecha TEXT NOT NULL,
+        monto_abonado REAL NOT NULL,
+        metodo_pago TEXT NOT NULL,
+        empleado_id INTEGER NOT NULL,
+        FOREIGN KEY (apartado_id) REFERENCES apartados(id),
+        FOREIGN KEY (empleado_id) REFERENCES empleados(id)
+    )
+    ''')
+
+def _m002_cantidad_en_detalles(cursor):
+    """Columnas agregadas después de la primera versión del esquema"""
+    _agregar_columna_si_falta(cursor, "detalles_venta", "cantidad", "INTEGER NOT NULL DEFAULT 1")
+    _agregar_columna_si_falta(cursor, "detalles_apartado", "cantidad", "INTEGER NOT NULL DEFAULT 1")
+
+def _m003_folios(cursor):
+    # Contadores de folio por serie (ventas, apartados, ...)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS folios (
+        serie TEXT PRIMARY KEY,
+        ultimo INTEGER NOT NULL,
+        maximo INTEGER NOT NULL DEFAULT 10000
+    )
+    ''')
+    # En bases existentes arrancamos cada serie desde el último folio emitido
+    cursor.execute('''
+        INSERT OR IGNORE INTO folios (serie, ultimo)
+        VALUES ('ventas', COALESCE((SELECT folio FROM ventas ORDER BY id DESC LIMIT 1), 0))
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO folios (serie, ultimo)
+        VALUES ('apartados', COALESCE((SELECT folio FROM apartados ORDER BY id DESC LIMIT 1), 0))
+    ''')
+
+def _m004_busqueda_productos(cursor):
+    """
+    Índice FTS5 sobre productos, sincronizado por triggers.
+    Guarda solo el índice: las columnas se leen de la tabla productos.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'productos_fts'")
+    existia = cursor.fetchone() is not None
+
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+        nombre, kilataje, categoria, clave,
+        content='productos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts (rowid, nombre, kilataje, categoria, clave)
+        VALUES (new.id, new.nombre, new.kilataje, new.categoria, new.clave);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts (productos_fts, rowid, nombre, kilataje, categoria, clave)
+        VALUES ('delete', old.id, old.nombre, old.kilataje, old.categoria, old.clave);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE ON productos BEGIN
+        INSERT INTO productos_fts (productos_fts, rowid, nombre, kilataje, categoria, clave)
+        VALUES ('delete', old.id, old.nombre, old.kilataje, old.categoria, old.clave);
+        INSERT INTO productos_fts (rowid, nombre, kilataje, categoria, clave)
+        VALUES (new.id, new.nombre, new.kilataje, new.categoria, new.clave);
+    END
+    ''')
+
+    # En bases existentes indexamos el catálogo que ya estaba cargado
+    if not existia:
+        cursor.execute("INSERT INTO productos_fts (productos_fts) VALUES ('rebuild')")
+
+def _m005_kilates(cursor):
+    """
+    Un renglón por kilate con su precio por gramo, mano de obra (por gramo) y
+    margen (%). Los productos lo referencian por productos.kilate_id; agregar
+    18K o plata es insertar un renglón, sin tocar código.
+    'version' sube con cada cambio de precio; la versión de la tabla es MAX(version).
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS kilates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codigo TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        nombre TEXT NOT NULL,
+        precio_gramo REAL NOT NULL DEFAULT 0,
+        mano_obra REAL NOT NULL DEFAULT 0,
+        margen REAL NOT NULL DEFAULT 0,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    # Kilates originales, con los precios que ya estaban capturados en 'kilatajes'
+    cursor.execute('''
+        INSERT OR IGNORE INTO kilates (codigo, nombre, precio_gramo)
+        VALUES ('10k', 'Oro 10K', COALESCE((SELECT diez FROM kilatajes WHERE id = 1), 0)),
+               ('14k', 'Oro 14K', COALESCE((SELECT catorce FROM kilatajes WHERE id = 1), 0)),
+               ('Italiano', 'Oro Italiano', COALESCE((SELECT italiano FROM kilatajes WHERE id = 1), 0))
+    ''')
+
+    _agregar_columna_si_falta(cursor, "productos", "kilate_id", "INTEGER REFERENCES kilates(id)")
+    # Productos existentes: se ligan por código exacto o, si no, por el código contenido
+    # en el texto (la regla que antes se evaluaba en cada render)
+    cursor.execute(f"UPDATE productos SET kilate_id = {sql_kilate_id('productos.kilataje')} WHERE kilate_id IS NULL")
+
+def _m006_historial_precios(cursor):
+    """
+    Historial de solo inserción: una fila por kilate cada vez que cambia su precio,
+    escrita por triggers (también capta cambios hechos fuera de la app).
+    Nunca se actualiza ni se borra.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS precios_oro_historial (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        kilate_id INTEGER NOT NULL REFERENCES kilates(id),
+        precio_gramo REAL NOT NULL,
+        mano_obra REAL NOT NULL,
+        margen REAL NOT NULL
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_precios_historial_fecha ON precios_oro_historial(fecha)")
+
+    # Mismo formato de fecha que ventas ("%Y-%m-%d %H:%M:%S", hora local)
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS kilates_historial_ai AFTER INSERT ON kilates BEGIN
+        INSERT INTO precios_oro_historial (fecha, version, kilate_id, precio_gramo, mano_obra, margen)
+        VALUES (strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime'), new.version, new.id,
+                new.precio_gramo, new.mano_obra, new.margen);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS kilates_historial_au
+    AFTER UPDATE OF precio_gramo, mano_obra, margen ON kilates
+    WHEN old.precio_gramo IS NOT new.precio_gramo
+      OR old.mano_obra IS NOT new.mano_obra
+      OR old.margen IS NOT new.margen
+    BEGIN
+        INSERT INTO precios_oro_historial (fecha, version, kilate_id, precio_gramo, mano_obra, margen)
+        VALUES (strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime'), new.version, new.id,
+                new.precio_gramo, new.mano_obra, new.margen);
+    END
+    ''')
+
+    # Punto de partida: los precios actuales de los kilates que aún no tienen historial
+    cursor.execute('''
+        INSERT INTO precios_oro_historial (fecha, version, kilate_id, precio_gramo, mano_obra, margen)
+        SELECT strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime'), version, id, precio_gramo, mano_obra, margen
+        FROM kilates
+        WHERE id NOT IN (SELECT kilate_id FROM precios_oro_historial)
+    ''')
+
+    # Versión de precios vigente al registrar cada venta
+    _agregar_columna_si_falta(cursor, "ventas", "version_precios", "INTEGER")
+
+# Índices secundarios: nombre -> definición
+INDICES = {
+    # Recorrer el catálogo ordenado por páginas (keyset)
+    "idx_productos_nombre": "productos(nombre COLLATE NOCASE)",
+    "idx_productos_kilataje": "productos(kilataje COLLATE NOCASE)",
+    "idx_productos_categoria": "productos(categoria COLLATE NOCASE)",
+    # Reportes por rango de fechas (corte del día)
+    "idx_ventas_fecha": "ventas(fecha)",
+    # Llaves foráneas: joins de detalle y reportes por empleado
+    "idx_detalles_venta_venta": "detalles_venta(venta_id)",
+    "idx_detalles_apartado_apartado": "detalles_apartado(apartado_id)",
+    "idx_ventas_empleado": "ventas(empleado_id)",
+    # Búsquedas puntuales
+    "idx_empleados_nombre": "empleados(nombre)",  # validar_empleado
+}
+
+def _m007_indices(cursor):
+    """Índices secundarios (las estadísticas se mantienen con conexion.optimizar)"""
+    for nombre, definicion in INDICES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
+
+def _m008_kilate_en_detalles(cursor):
+    """
+    Kilate de cada línea vendida o apartada, fijado al momento de la operación:
+    el margen ya no depende de que el texto de kilataje coincida exacto con un
+    código. Las líneas existentes se ligan con la misma regla que _m005 usó para productos.
+    """
+    for tabla in ("detalles_venta", "detalles_apartado"):
+        _agregar_columna_si_falta(cursor, tabla, "kilate_id", "INTEGER REFERENCES kilates(id)")
+        cursor.execute(f"UPDATE {tabla} SET kilate_id = {sql_kilate_id(f'{tabla}.kilataje')} WHERE kilate_id IS NULL")
+
+# La posición en la lista (desde 1) es el número de versión
+MIGRACIONES = [
+    _m001_esquema_inicial,
+    _m002_cantidad_en_detalles,
+    _m003_folios,
+    _m004_busqueda_productos,
+    _m005_kilates,
+    _m006_historial_precios,
+    _m007_indices,
+    _m008_kilate_en_detalles,
+]
+
+def version_esquema(conexion):
+    return conexion.execute("PRAGMA user_version").fetchone()[0]
+
+def migrar():
+    """
+    Aplica las migraciones pendientes. Si la base ya está al día solo cuesta
+    leer PRAGMA user_version (más el PRAGMA optimize del arranque).
+    Debe llamarse una vez al arrancar (main.py). Retorna la versión final del esquema.
+    """
+    conexion = crear_conexion(isolation_level=None)
+    try:
+        if version_esquema(conexion) >= len(MIGRACIONES):
+            optimizar(conexion, al_abrir=True)
+            return version_esquema(conexion)
+
+        cursor = conexion.cursor()
+        for numero, migracion in enumerate(MIGRACIONES, start=1):
+            # BEGIN IMMEDIATE: si otro proceso está migrando esperamos y volvemos a leer la versión
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if version_esquema(conexion) < numero:
+                    migracion(cursor)
+                    cursor.execute(f"PRAGMA user_version = {numero}")
+                cursor.execute("COMMIT")
+            except Exception as e:
+                cursor.execute("ROLLBACK")
+                logging.error(f"Error en migración {numero} ({migracion.__name__}): {e}")
+                raise
+        optimizar(conexion, al_abrir=True)
+        return version_esquema(conexion)
+    finally:
+        conexion.close()
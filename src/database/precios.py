@@ -0,0 +1,249 @@
+import logging
+import threading
+import weakref
+from bisect import bisect_right
+from collections import OrderedDict
+
+from database.colacion import nocase
+from database.conexion import crear_conexion
+from database.kilates import kilate_id_de
+
+# Máximo de cotizaciones guardadas por versión de precios (se descartan las menos usadas)
+MAX_COTIZACIONES = 5000
+
+
+class PreciosOro:
+    """
+    Foto inmutable de la tabla de kilates (precio por gramo, mano de obra y
+    margen de cada uno) con su número de versión. Cada cambio de precios
+    produce una foto nueva, así una sesión nunca mezcla precios de dos
+    versiones distintas a mitad de un refresco.
+    El precio por gramo final de cada kilate se precalcula al crear la foto:
+    cotizar un producto es una búsqueda en diccionario por kilate_id.
+
+    Además cada foto guarda las cotizaciones ya calculadas por id de producto
+    (llave efectiva: producto + versión). Al cambiar los precios se crea una
+    foto nueva y la caché anterior se descarta completa con ella.
+    """
+
+    def __init__(self, version, kilates, max_cotizaciones=MAX_COTIZACIONES):
+        self.version = version
+        self.kilates = kilates  # [(id, codigo, nombre, precio_gramo, mano_obra, margen)]
+        # kilate_id -> precio por gramo con mano de obra y margen (%) aplicados
+        self._por_id = {k[0]: (k[3] + k[4]) * (1 + k[5] / 100) for k in kilates}
+        # Productos sin kilate_id (capturados por fuera de la app): con la regla de kilates.py
+        self._por_codigo = {nocase(k[1]): k[0] for k in kilates}
+        # id producto -> (peso, kilate_id, precio); peso y kilate_id detectan productos editados
+        self._cotizaciones = OrderedDict()
+        self._max_cotizaciones = max_cotizaciones
+        self._candado = threading.Lock()  # La foto se comparte entre las sesiones
+
+    def kilate_id(self, producto):
+        # Indices: [0]id, [1]key, [2]name, [3]weight, [4]karat, [5]category, [6]qty, [7]kilate_id
+        if len(producto) > 7 and producto[7] is not None:
+            return producto[7]
+        return kilate_id_de(producto[4], self._por_codigo)
+
+    def precio_gramo(self, kilate_id):
+        return self._por_id.get(kilate_id, 0.0)
+
+    def precio(self, producto):
+        """Precio sugerido de un producto: peso * precio por gramo de su kilate"""
+        kilate_id = self.kilate_id(producto)
+        precio = self._cotizacion_guardada(producto, kilate_id)
+        if precio is None:
+            precio = self._cotizar(producto[3], self.precio_gramo(kilate_id))
+            self._guardar([(producto, kilate_id, precio)])
+        return precio
+
+    def precios(self, productos):
+        """
+        Precios de muchos productos en una sola pasada: los que ya están en caché
+        se toman de ahí y el resto se agrupa por kilate para resolver cada precio
+        por gramo una vez y multiplicar el grupo entero.
+        Retorna {id producto: precio}.
+        """
+        resultado = {}
+        grupos = {}
+        for p in productos:
+            kilate_id = self.kilate_id(p)
+            precio = self._cotizacion_guardada(p, kilate_id)
+            if precio is None:
+                grupos.setdefault(kilate_id, []).append(p)
+            else:
+                resultado[p[0]] = precio
+
+        nuevas = []
+        for kilate_id, grupo in grupos.items():
+            precio_gramo = self.precio_gramo(kilate_id)
+            for p in grupo:
+                precio = self._cotizar(p[3], precio_gramo)
+                resultado[p[0]] = precio
+                nuevas.append((p, kilate_id, precio))
+        self._guardar(nuevas)
+        return resultado
+
+    # --- CACHÉ DE COTIZACIONES ---
+
+    @staticmethod
+    def _cotizar(peso, precio_gramo):
+        try:
+            return float(peso) * precio_gramo
+        except (ValueError, TypeError):
+            return 0.0
+
+    def _cotizacion_guardada(self, producto, kilate_id):
+        with self._candado:
+            guardada = self._cotizaciones.get(producto[0])
+            if guardada is None or guardada[0] != producto[3] or guardada[1] != kilate_id:
+                return None
+            self._cotizaciones.move_to_end(producto[0])
+            return guardada[2]
+
+    def _guardar(self, cotizaciones):
+        if not cotizaciones:
+            return
+        with self._candado:
+            for producto, kilate_id, precio in cotizaciones:
+                self._cotizaciones[producto[0]] = (producto[3], kilate_id, precio)
+                self._cotizaciones.move_to_end(producto[0])
+            while len(self._cotizaciones) > self._max_cotizaciones:
+                self._cotizaciones.popitem(last=False)
+
+
+class TablaPrecios:
+    """
+    Precios del oro vigentes, compartidos por todas las sesiones del proceso.
+    Las vistas se suscriben y reciben la foto nueva (PreciosOro) en cuanto
+    cualquier sesión cambia los precios; los cambios hechos por otro proceso
+    se detectan con PRAGMA data_version en la siguiente consulta.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._conexion = None
+        self._data_version = None
+        self._actual = None
+        self._suscriptores = []  # WeakMethod: una vista cerrada no queda viva por estar suscrita
+
+    def _recargar(self):
+        """Retorna True si la versión de precios cambió. Debe llamarse con el candado tomado."""
+        if self._conexion is None:
+            self._conexion = crear_conexion(check_same_thread=False)
+        data_version = self._conexion.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return False
+        self._data_version = data_version
+        # La versión de la tabla es la mayor de sus filas: cada cambio la sube
+        version = self._conexion.execute("SELECT COALESCE(MAX(version), 0) FROM kilates").fetchone()[0]
+        if self._actual is not None and version == self._actual.version:
+            return False  # Cambió otra tabla, no los precios
+        kilates = self._conexion.execute(
+            "SELECT id, codigo, nombre, precio_gramo, mano_obra, margen FROM kilates ORDER BY id"
+        ).fetchall()
+        self._actual = PreciosOro(version, kilates)
+        return True
+
+    def vigentes(self):
+        """Foto actual de los precios (revisa primero si cambiaron en la BD)"""
+        return self.refrescar()
+
+    def refrescar(self):
+        """Recarga si hubo cambios y avisa a los suscriptores con la foto nueva"""
+        with self._candado:
+            cambio = self._recargar()
+            actual = self._actual
+        if cambio:
+            self._notificar(actual)
+        return actual
+
+    def suscribir(self, callback):
+        """callback(precios) se llama con cada versión nueva de precios"""
+        referencia = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._candado:
+            self._suscriptores.append(referencia)
+
+    def _notificar(self, precios):
+        # La lista solo se lee y se poda con el candado tomado; los callbacks
+        # corren fuera de él (pueden volver a llamar a vigentes() o suscribir())
+        with self._candado:
+            referencias = list(self._suscriptores)
+        muertas = False
+        for referencia in referencias:
+            callback = referencia()
+            if callback is None:
+                muertas = True
+                continue
+            try:
+                callback(precios)
+            except Exception as e:
+                logging.error(f"Precios: error en suscriptor: {e}")
+        if muertas:
+            with self._candado:
+                self._suscriptores[:] = [r for r in self._suscriptores if r() is not None]
+
+
+class HistorialPrecios:
+    """
+    Copia en memoria de precios_oro_historial para consultas por fecha o versión.
+    Guarda, en orden, el estado completo de precios tras cada versión, así
+    saber qué precio regía en un momento es una búsqueda binaria.
+    Como la tabla es de solo inserción, ponerse al día es leer las filas con
+    id mayor a la última leída (solo si PRAGMA data_version cambió).
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._conexion = None
+        self._data_version = None
+        self._ultimo_id = 0
+        self._fechas = []     # fecha de cada versión (ordenadas)
+        self._versiones = []  # versión de precios (ordenadas)
+        self._estados = []    # {kilate_id: precio_gramo} vigente desde esa versión
+
+    def _al_dia(self):
+        """Agrega las filas nuevas del historial. Debe llamarse con el candado tomado."""
+        if self._conexion is None:
+            self._conexion = crear_conexion(check_same_thread=False)
+        data_version = self._conexion.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        filas = self._conexion.execute('''
+            SELECT id, fecha, version, kilate_id, precio_gramo
+            FROM precios_oro_historial WHERE id > ? ORDER BY id
+        ''', (self._ultimo_id,)).fetchall()
+        for id_fila, fecha, version, kilate_id, precio_gramo in filas:
+            if self._versiones and self._versiones[-1] == version:
+                # Varios kilates cambiados en la misma versión: un solo estado
+                self._estados[-1][kilate_id] = precio_gramo
+            else:
+                estado = dict(self._estados[-1]) if self._estados else {}
+                estado[kilate_id] = precio_gramo
+                # La lista debe seguir ordenada aunque el reloj se haya movido hacia atrás
+                self._fechas.append(max(fecha, self._fechas[-1]) if self._fechas else fecha)
+                self._versiones.append(version)
+                self._estados.append(estado)
+            self._ultimo_id = id_fila
+
+    def _estado(self, llaves, valor):
+        with self._candado:
+            self._al_dia()
+            i = bisect_right(llaves, valor) - 1
+            return self._estados[i] if i >= 0 else {}
+
+    def precios_vigentes(self, fecha):
+        """{kilate_id: precio_gramo} vigente en 'fecha' (texto "%Y-%m-%d %H:%M:%S")"""
+        return dict(self._estado(self._fechas, fecha))
+
+    def precio_vigente(self, fecha, kilate_id):
+        return self._estado(self._fechas, fecha).get(kilate_id)
+
+    def precio_version(self, version, kilate_id):
+        """Precio por gramo de un kilate en la versión de precios indicada"""
+        return self._estado(self._versiones, version).get(kilate_id)
+
+
+# Instancias únicas del proceso
+tabla_precios = TablaPrecios()
+historial_precios = HistorialPrecios()
@@ -1,5 +1,7 @@
 # src/main.py
 import flet as ft
+from database.conexion import cerrar_conexion
+from database.migraciones import migrar
 # Importa las vistas desde la subcarpeta
 from views.login_view import LoginView
 from views.main_view import MainView
@@ -26,6 +28,7 @@ def main(page: ft.Page):
 
     def yes_click(e):
         page.close(confirm_dialog)
+        cerrar_conexion()  # Al cerrar corre PRAGMA optimize
         page.window.destroy()
 
     confirm_dialog = ft.AlertDialog(
@@ -73,5 +76,8 @@ def main(page: ft.Page):
     page.on_view_pop = view_pop
     page.go("/login")
 
+# Pone el esquema de la BD al día antes de abrir cualquier vista
+migrar()
+
 # Inicia la aplicación. Asegúrate de que el path a assets_dir sea correcto si lo ejecutas desde afuera de src.
 ft.app(target=main, assets_dir="assets")
\ No newline at end of file
@@ -11,6 +11,7 @@ from database.manager import (
     exportar_inventario_csv
 )
 from utils.printer import imprimir_corte_caja, imprimir_inventario # <--- NUEVAS FUNCIONES
+from utils.cola_impresion import cola_impresion
 
 def show_modal_corte(page):
     
@@ -66,17 +67,57 @@ def show_modal_corte(page):
             print(ex)
 
     # --- ACCIONES DE IMPRESIÓN ---
-    def accion_imprimir_corte(e):
-        page.snack_bar = ft.SnackBar(ft.Text("Imprimiendo Corte..."), bgcolor="blue")
+    # Solo encolan (la cola imprime en otro hilo), así que el aviso va después
+    def avisar_impresion(trabajo, texto):
+        if trabajo is None:
+            page.snack_bar = ft.SnackBar(ft.Text("Cola de impresión llena, intente de nuevo"), bgcolor="red")
+        else:
+            page.snack_bar = ft.SnackBar(ft.Text(texto), bgcolor="blue")
         page.snack_bar.open = True
         page.update()
-        imprimir_corte_caja(ventas_por_empleado, total_ventas, detalle_vendidos)
+
+    def accion_imprimir_corte(e):
+        trabajo = imprimir_corte_caja(ventas_por_empleado, total_ventas, detalle_vendidos)
+        avisar_impresion(trabajo, "Imprimiendo Corte...")
 
     def accion_imprimir_inventario(e):
-        page.snack_bar = ft.SnackBar(ft.Text("Imprimiendo Inventario..."), bgcolor="blue")
+        trabajo = imprimir_inventario(inventario)
+        avisar_impresion(trabajo, "Imprimiendo Inventario...")
+
+    # --- IMPRESIONES FALLIDAS ---
+    # Trabajos que agotaron sus reintentos (impresora apagada, sin papel): la
+    # cola ya no los intenta sola, se reintentan o descartan desde aquí
+    txt_fallidos = ft.Text(color="red", expand=True)
+
+    def refrescar_fallidos():
+        fallidos = cola_impresion.fallidos()
+        nombres = ", ".join(sorted({t.nombre for t in fallidos}))
+        txt_fallidos.value = f"{len(fallidos)} impresiones fallidas ({nombres})"
+        aviso_fallidos.visible = bool(fallidos)
+
+    def accion_fallidos(e, reintentar):
+        atendidos = 0
+        for trabajo in cola_impresion.fallidos():
+            if reintentar:
+                atendidos += cola_impresion.reintentar(trabajo.id) is not None
+            else:
+                atendidos += cola_impresion.descartar(trabajo.id)
+        refrescar_fallidos()
+        texto = f"{atendidos} impresiones reenviadas" if reintentar else f"{atendidos} impresiones descartadas"
+        page.snack_bar = ft.SnackBar(ft.Text(texto), bgcolor="blue")
         page.snack_bar.open = True
         page.update()
-        imprimir_inventario(inventario)
+
+    aviso_fallidos = ft.Container(
+        padding=ft.padding.symmetric(horizontal=20),
+        content=ft.Row([
+            ft.Icon(ft.Icons.PRINT_DISABLED, color="red"),
+            txt_fallidos,
+            ft.TextButton("Reintentar", on_click=lambda e: accion_fallidos(e, True)),
+            ft.TextButton("Descartar", on_click=lambda e: accion_fallidos(e, False), style=ft.ButtonStyle(color="red")),
+        ])
+    )
+    refrescar_fallidos()
 
     # --- TABLAS VISUALES ---
     
@@ -123,7 +164,7 @@ def show_modal_corte(page):
             tabla.rows.append(
                 ft.DataRow(cells=[
                     ft.DataCell(ft.Text(str(item[0]))),
-                    ft.DataCell(ft.Container(content=ft.Text(item[2], size=12), width=180)),
+                    ft.DataCell(ft.Container(content=ft.Text(item[2] if item[6] == 1 else f"{item[6]} x {item[2]}", size=12), width=180)),
                     ft.DataCell(ft.Text(f"{item[3]}g")),
                     ft.DataCell(ft.Text(f"${item[4]:,.2f}")),
                 ])
@@ -244,6 +285,7 @@ def show_modal_corte(page):
                         ft.IconButton(ft.Icons.CLOSE, on_click=lambda e: page.close(dlg_modal))
                     ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
                 ),
+                aviso_fallidos,
                 tabs
             ])
         )
@@ -1,5 +1,21 @@
+import asyncio
 import flet as ft
-from database.manager import agregar_producto, actualizar_producto, obtener_producto_por_clave, eliminar_producto
+import logging
+from database.manager import agregar_producto_async, actualizar_producto_async, obtener_producto_por_clave, eliminar_producto, obtener_kilates, importar_productos_async, leer_csv_productos, generar_clave
+
+def _selector_csv(page):
+    """Un solo FilePicker por página (en page.overlay), reutilizado en cada apertura del modal"""
+    selector = page.session.get("selector_csv")
+    if selector is None or selector not in page.overlay:
+        selector = ft.FilePicker()
+        page.overlay.append(selector)
+        page.session.set("selector_csv", selector)
+    return selector
+
+def _registrar_omitidas(errores, origen):
+    """Deja en el log cada fila que la importación no pudo guardar"""
+    for numero, motivo in errores:
+        logging.warning(f"{origen}: se omitió la línea {numero}: {motivo}")
 
 def show_modal_editar_producto(page, actualizar_lista_callback):
     
@@ -28,11 +44,8 @@ def show_modal_editar_producto(page, actualizar_lista_callback):
     
     kilataje = ft.Dropdown(
         label="Kilataje",
-        options=[
-            ft.dropdown.Option("10k"),
-            ft.dropdown.Option("14k"),
-            ft.dropdown.Option("Italiano"),
-        ],
+        # Las opciones salen de la tabla 'kilates' (código de cada kilate)
+        options=[ft.dropdown.Option(k[1]) for k in obtener_kilates()],
     )
 
     categoria = ft.Dropdown(
@@ -126,33 +139,6 @@ def show_modal_editar_producto(page, actualizar_lista_callback):
 
     # --- 3. Lógica de Negocio (Claves) ---
 
-    def generar_clave_logica(k_val, nom_val, peso_val):
-        """Función auxiliar pura para crear la clave string"""
-        # A) Kilataje
-        k_raw = k_val.lower()
-        if "italiano" in k_raw: prefijo = "ITA"
-        elif "k" in k_raw: prefijo = k_raw.replace("k", "").strip()
-        else: prefijo = k_raw[:2].upper()
-
-        # B) Iniciales
-        palabras = nom_val.split()
-        iniciales = "".join([p[0].upper() for p in palabras if p])
-
-        # C) Peso
-        peso_clean = str(peso_val).replace(".", "").replace(",", "").strip()
-
-        # Base
-        base = f"{prefijo}{iniciales}{peso_clean}"
-        
-        # D) Anti-colisión
-        final = base
-        contador = 1
-        while obtener_producto_por_clave(final):
-            final = f"{base}{contador}"
-            contador += 1
-            
-        return final
-
     def generar_clave_automatica_ui(e):
         """Botón manual para el modo individual"""
         if not (nombre.value and peso.value and kilataje.value):
@@ -162,7 +148,8 @@ def show_modal_editar_producto(page, actualizar_lista_callback):
             return
         
         try:
-            nueva_clave = generar_clave_logica(kilataje.value, nombre.value, peso.value)
+            # Base (kilataje + iniciales + peso) con el primer sufijo libre
+            nueva_clave = generar_clave(kilataje.value, nombre.value, peso.value)
             clave.value = nueva_clave
             error_text.visible = False
             page.update()
@@ -208,7 +195,7 @@ def show_modal_editar_producto(page, actualizar_lista_callback):
             
         page.update()
 
-    def guardar_producto(e):
+    async def guardar_producto(e):
         nonlocal producto_actual
         
         # Validaciones comunes
@@ -228,38 +215,29 @@ def show_modal_editar_producto(page, actualizar_lista_callback):
                     page.update()
                     return
                 
-                # Separar por líneas
-                lista_pesos_raw = texto_pesos.split('\n')
-                guardados = 0
-                
-                for p_str in lista_pesos_raw:
-                    p_str = p_str.strip()
-                    if not p_str: continue # saltar lineas vacias
-                    
-                    try:
-                        peso_float = float(p_str)
-                        # 1. Generar clave única para este peso
-                        clave_gen = generar_clave_logica(kilataje.value, nombre.value, p_str)
-                        
-                        # 2. Guardar
-                        # Nota: En masivo asumimos cantidad 1 por item, ya que suelen ser piezas únicas con ese peso exacto.
-                        # Si quieres usar el campo cantidad, cámbialo aquí.
-                        agregar_producto(
-                            clave_gen,
-                            nombre.value,
-                            peso_float,
-                            kilataje.value,
-                            categoria.value,
-                            1 # Cantidad por defecto 1 en masivo
-                        )
-                        guardados += 1
-                    except ValueError:
-                        print(f"Saltando valor no numérico: {p_str}")
+                # Una fila por línea; las claves se generan dentro de la importación.
+                # Nota: En masivo asumimos cantidad 1 por item, ya que suelen ser piezas únicas con ese peso exacto.
+                filas = [
+                    {
+                        "nombre": nombre.value,
+                        "peso": p_str.strip(),
+                        "kilataje": kilataje.value,
+                        "categoria": categoria.value,
+                        "cantidad": 1
+                    }
+                    for p_str in texto_pesos.split('\n') if p_str.strip()
+                ]
+                # Todo el lote en una sola transacción
+                guardados, errores = await importar_productos_async(filas)
+                _registrar_omitidas(errores, "Ingreso masivo")
                 
                 if guardados > 0:
                     page.close(dialog)
                     actualizar_lista_callback()
-                    page.snack_bar = ft.SnackBar(ft.Text(f"¡{guardados} productos agregados!"), bgcolor="green")
+                    mensaje = f"¡{guardados} productos agregados!"
+                    if errores:
+                        mensaje += f" ({len(errores)} líneas omitidas)"
+                    page.snack_bar = ft.SnackBar(ft.Text(mensaje), bgcolor="green")
                     page.snack_bar.open = True
                     page.update()
                 else:
@@ -278,12 +256,12 @@ def show_modal_editar_producto(page, actualizar_lista_callback):
                 qty_val = int(cantidad.value) if cantidad.value else 1
                 
                 if producto_actual:
-                    success = actualizar_producto(
+                    success = await actualizar_producto_async(
                         producto_actual[0], clave.value, nombre.value,
                         float(peso.value), kilataje.value, categoria.value, qty_val
                     )
                 else:
-                    success = agregar_producto(
+                    success = await agregar_producto_async(
                         clave.value, nombre.value,
                         float(peso.value), kilataje.value, categoria.value, qty_val
                     )
@@ -330,6 +308,57 @@ def show_modal_editar_producto(page, actualizar_lista_callback):
         ],
     )
 
+    # --- Importación desde CSV (mismo formato que la exportación de inventario) ---
+    selector_csv = _selector_csv(page)
+
+    async def importar_csv(e: ft.FilePickerResultEvent):
+        if not e.files:
+            return
+        # En modo web el navegador no expone la ruta local del archivo
+        if not e.files[0].path:
+            error_text.value = "Importar CSV solo está disponible en la app de escritorio."
+            error_text.visible = True
+            page.update()
+            return
+        try:
+            # Leer y parsear el archivo fuera del event loop: un CSV grande no congela la UI
+            filas = await asyncio.to_thread(leer_csv_productos, e.files[0].path)
+        except Exception as ex:
+            error_text.value = f"Error al leer el CSV: {ex}"
+            error_text.visible = True
+            page.update()
+            return
+
+        # Todo el archivo en una sola transacción
+        guardados, errores = await importar_productos_async(filas)
+        _registrar_omitidas(errores, "Importación CSV")
+        if guardados > 0:
+            page.close(dialog)
+            actualizar_lista_callback()
+            mensaje = f"¡{guardados} productos importados!"
+            if errores:
+                mensaje += f" ({len(errores)} filas omitidas)"
+            page.snack_bar = ft.SnackBar(ft.Text(mensaje), bgcolor="green")
+            page.snack_bar.open = True
+            page.update()
+        else:
+            error_text.value = "No se importó ninguna fila."
+            if errores:
+                error_text.value += f" Fila {errores[0][0]}: {errores[0][1]}"
+            error_text.visible = True
+            page.update()
+
+    selector_csv.on_result = importar_csv
+
+    btn_importar_csv = ft.TextButton(
+        "Importar CSV",
+        icon=ft.Icons.UPLOAD_FILE,
+        style=ft.ButtonStyle(color=ft.Colors.BLUE_GREY),
+        on_click=lambda e: selector_csv.pick_files(
+            dialog_title="Importar productos", allowed_extensions=["csv"]
+        )
+    )
+
     btn_generar = ft.TextButton(
         "Generar Clave Auto", 
         icon=ft.Icons.AUTORENEW, 
@@ -343,7 +372,10 @@ def show_modal_editar_producto(page, actualizar_lista_callback):
         title=ft.Column([
             ft.Text("Gestión de Productos", weight=ft.FontWeight.BOLD),
             busqueda_clave, # Solo visible en individual
-            sw_modo_masivo, # EL SWITCH NUEVO
+            ft.Row(
+                [sw_modo_masivo, btn_importar_csv], # EL SWITCH NUEVO
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN
+            ),
             ft.Divider(height=10, thickness=1)
         ], spacing=10),
         
@@ -1,6 +1,6 @@
 import flet as ft
 from datetime import datetime
-from database.manager import registrar_venta, registrar_apartado
+from database.manager import registrar_venta_async, registrar_apartado_async
 from utils.printer import imprimir_ticket_venta, imprimir_ticket_apartado
 
 def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: float, empleado_id: int, on_venta_exitosa: callable):
@@ -112,12 +112,34 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
             txt_monto_recibido.focus()
         page.update()
 
+    # --- AVISOS DE IMPRESIÓN ---
+    def mostrar_aviso(texto, color):
+        page.snack_bar = ft.SnackBar(ft.Text(texto), bgcolor=color)
+        page.snack_bar.open = True
+        page.update()
+
+    def avisar_impresion(trabajo, titulo):
+        """Avisa al encolar y, desde la cola, solo si el trabajo termina en error"""
+        if trabajo is None:
+            mostrar_aviso("Cola de impresión llena, intente de nuevo", "red")
+            return
+        mostrar_aviso(f"Imprimiendo {titulo}...", "blue")
+
+        def al_terminar(t):
+            if t.estado == "fallido":
+                # Queda en fallidos/: se reintenta o descarta desde Reportes
+                mostrar_aviso(f"No se pudo imprimir {titulo}: {t.error}. Puede reintentarlo en Reportes.", "red")
+
+        # Aviso de este trabajo nada más; si ya terminó se llama de inmediato
+        trabajo.al_terminar(al_terminar)
+
     # --- FUNCIÓN DE TRANSICIÓN A PANTALLA DE ÉXITO ---
     def mostrar_opciones_impresion(folio, datos_cliente, recibido, cambio):
         
         # Función interna para imprimir según el botón presionado
         def imprimir_ticket(e, titulo):
-            exito = imprimir_ticket_venta(
+            # Solo encola: el clic no espera a la impresora
+            trabajo = imprimir_ticket_venta(
                 folio=folio,
                 fecha=datetime.now().strftime("%d/%m/%y %H:%M"),
                 productos=productos_con_precio,
@@ -130,13 +152,7 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
                 cliente_direccion=datos_cliente['direccion'],
                 titulo_ticket=titulo # Título dinámico (Original/Copia)
             )
-            if exito:
-                page.snack_bar = ft.SnackBar(ft.Text(f"Imprimiendo {titulo}..."), bgcolor="blue")
-            else:
-                page.snack_bar = ft.SnackBar(ft.Text("Error de comunicación con la impresora"), bgcolor="red")
-            
-            page.snack_bar.open = True
-            page.update()
+            avisar_impresion(trabajo, titulo)
 
         # Nuevo contenido que reemplazará al formulario
         contenido_exito = ft.Column(
@@ -191,7 +207,7 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
         dlg_modal.actions = [] 
         dlg_modal.update()
 
-    def accion_confirmar_venta(e):
+    async def accion_confirmar_venta(e):
         # Validar nombre
         if not txt_nombre.value:
             txt_nombre.error_text = "Requerido"
@@ -217,8 +233,8 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
         else:
             monto_recibido = total_venta
 
-        # Guardar en BD
-        venta_id, folio = registrar_venta(
+        # Guardar en BD (el hilo escritor confirma; aquí solo esperamos sin bloquear la UI)
+        venta_id, folio = await registrar_venta_async(
             empleado_id=empleado_id,
             productos_vendidos=productos_con_precio,
             total=total_venta,
@@ -242,7 +258,11 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
 
     # Eventos Venta
     txt_monto_recibido.on_change = validar_monto_venta
-    txt_monto_recibido.on_submit = lambda e: accion_confirmar_venta(e) if not btn_confirmar_venta.disabled else None
+    async def confirmar_con_enter(e):
+        if not btn_confirmar_venta.disabled:
+            await accion_confirmar_venta(e)
+
+    txt_monto_recibido.on_submit = confirmar_con_enter
     radio_metodo_venta.on_change = cambiar_metodo_venta
     btn_confirmar_venta.on_click = accion_confirmar_venta
 
@@ -305,7 +325,7 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
     def mostrar_impresion_apartado(folio, datos_cliente, abono, restante):
         # Función interna para imprimir
         def imprimir(e, titulo):
-            imprimir_ticket_apartado(
+            trabajo = imprimir_ticket_apartado(
                 folio=folio,
                 fecha=datetime.now().strftime("%d/%m/%y %H:%M"),
                 productos=productos_con_precio,
@@ -315,9 +335,7 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
                 cliente_nombre=datos_cliente['nombre'],
                 titulo_ticket=titulo
             )
-            page.snack_bar = ft.SnackBar(ft.Text("Imprimiendo ticket de apartado..."), bgcolor="blue")
-            page.snack_bar.open = True
-            page.update()
+            avisar_impresion(trabajo, "ticket de apartado")
 
         # Pantalla de éxito para apartado
         contenido_exito = ft.Column(
@@ -349,7 +367,7 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
         )
         dlg_modal.update()
 
-    def accion_apartado(e):
+    async def accion_apartado(e):
         if not txt_nombre.value:
             txt_nombre.error_text = "Nombre requerido para apartar"
             txt_nombre.update()
@@ -363,7 +381,7 @@ def show_modal_pago(page: ft.Page, productos_con_precio: list, total_venta: floa
         abono = float(txt_abono_inicial.value)
         
         # Llamada a la BD
-        apartado_id, folio = registrar_apartado(
+        apartado_id, folio = await registrar_apartado_async(
             empleado_id, productos_con_precio, total_venta, 
             abono, "Efectivo", datos_cliente # Asumimos efectivo por ahora en abono inicial
         )
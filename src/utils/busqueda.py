@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+
+
+class BusquedaDiferida:
+    """
+    Buscador con debounce y cancelación.
+    Cada tecla reprograma la búsqueda; solo se ejecuta cuando el usuario deja
+    de escribir 'retardo' segundos. Todas las consultas corren en un mismo hilo
+    de larga vida, así su conexión a la BD (y su caché) se reutiliza entre
+    búsquedas. Si llega una tecla nueva mientras corre una consulta, esta se
+    aborta y su resultado se descarta: a la pantalla solo llega el resultado
+    de la consulta más reciente.
+    Tras 'inactividad' segundos sin búsquedas el hilo termina (llamando antes
+    a al_terminar, ej. para cerrar su conexión) y la siguiente lo vuelve a crear.
+
+    buscar(texto, cancelada) -> resultado   (en el hilo del buscador; puede
+        consultar cancelada() para abortar y retornar None)
+    aplicar(texto, resultado)              (en el hilo del buscador, solo para la
+        búsqueda vigente; el estado que comparta con la UI debe ir bajo candado)
+    """
+
+    def __init__(self, buscar, aplicar, retardo=0.25, inactividad=300, al_terminar=None):
+        self._buscar = buscar
+        self._aplicar = aplicar
+        self.retardo = retardo
+        self.inactividad = inactividad
+        self._al_terminar = al_terminar
+        self._condicion = threading.Condition()
+        self._generacion = 0
+        self._pendiente = None  # (texto, generacion, momento en que vence el debounce)
+        self._hilo = None
+
+    def solicitar(self, texto):
+        """Programa una búsqueda, reemplazando la pendiente (si la hay)"""
+        with self._condicion:
+            self._generacion += 1
+            self._pendiente = (texto, self._generacion, time.monotonic() + self.retardo)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name="BusquedaDiferida", daemon=True)
+                self._hilo.start()
+            self._condicion.notify()
+
+    def cancelar(self):
+        """Descarta la búsqueda pendiente y la que esté en curso"""
+        with self._condicion:
+            self._generacion += 1
+            self._pendiente = None
+            self._condicion.notify()
+
+    def _vigente(self, generacion):
+        return generacion == self._generacion
+
+    # --- HILO DEL BUSCADOR ---
+
+    def _siguiente(self):
+        """Espera a que venza el debounce de la búsqueda pendiente; None tras 'inactividad'"""
+        with self._condicion:
+            limite = time.monotonic() + self.inactividad
+            while True:
+                ahora = time.monotonic()
+                if self._pendiente is None:
+                    if ahora >= limite:
+                        self._hilo = None  # La siguiente solicitud crea otro hilo
+                        return None
+                    self._condicion.wait(limite - ahora)
+                    continue
+                texto, generacion, vence = self._pendiente
+                if ahora >= vence:
+                    self._pendiente = None
+                    return texto, generacion
+                self._condicion.wait(vence - ahora)
+
+    def _bucle(self):
+        try:
+            while True:
+                siguiente = self._siguiente()
+                if siguiente is None:
+                    return
+                self._ejecutar(*siguiente)
+        finally:
+            if self._al_terminar is not None:
+                try:
+                    self._al_terminar()
+                except Exception as e:
+                    logging.error(f"Error al terminar el hilo de búsqueda: {e}")
+
+    def _ejecutar(self, texto, generacion):
+        if not self._vigente(generacion):
+            return
+        try:
+            resultado = self._buscar(texto, lambda: not self._vigente(generacion))
+        except Exception as e:
+            logging.error(f"Error en búsqueda '{texto}': {e}")
+            return
+
+        # Buscar y aplicar corren en el mismo hilo: un resultado viejo nunca
+        # llega después de uno más nuevo
+        if self._vigente(generacion):
+            try:
+                self._aplicar(texto, resultado)
+            except Exception as e:
+                logging.error(f"Error al mostrar la búsqueda '{texto}': {e}")
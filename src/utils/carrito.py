@@ -0,0 +1,154 @@
+import logging
+
+
+class LineaCarrito:
+    """Un producto dentro del carrito: precio unitario editable y cantidad"""
+
+    __slots__ = ("producto", "precio", "cantidad")
+
+    def __init__(self, producto, precio, cantidad=1):
+        self.producto = producto
+        self.precio = precio
+        self.cantidad = cantidad
+
+    @property
+    def id(self):
+        return self.producto[0]
+
+    @property
+    def stock(self):
+        # Indices: [0]id, [1]key, [2]name, [3]weight, [4]karat, [5]category, [6]qty
+        return self.producto[6] if len(self.producto) > 6 else 1
+
+    @property
+    def importe(self):
+        return self.precio * self.cantidad
+
+    def como_tupla(self):
+        """Formato que reciben el manager y la impresora: (producto, precio_unitario, cantidad)"""
+        return (self.producto, self.precio, self.cantidad)
+
+
+class Carrito:
+    """
+    Carrito de venta independiente de la interfaz.
+    Las líneas se indexan por id de producto (búsqueda O(1)) y el subtotal
+    se mantiene al día con cada cambio en vez de recalcularse sumando todo.
+    Quien muestre el carrito se suscribe con suscribir(callback) y recibe
+    callback(evento, linea) con evento en EVENTOS.
+    """
+
+    EVENTOS = ("agregado", "cantidad", "precio", "quitado", "vaciado")
+
+    def __init__(self):
+        self._lineas = {}  # id producto -> LineaCarrito (conserva orden de inserción)
+        self._subtotal = 0.0
+        self._suscriptores = []
+
+    # --- CONSULTAS ---
+
+    @property
+    def subtotal(self):
+        return self._subtotal
+
+    def __len__(self):
+        return len(self._lineas)
+
+    def __contains__(self, id_producto):
+        return id_producto in self._lineas
+
+    def __iter__(self):
+        return iter(list(self._lineas.values()))
+
+    def linea(self, id_producto):
+        return self._lineas.get(id_producto)
+
+    def reservado(self, id_producto):
+        """Piezas de ese producto que ya están en el carrito"""
+        linea = self._lineas.get(id_producto)
+        return linea.cantidad if linea else 0
+
+    def lineas(self):
+        """[(producto, precio_unitario, cantidad)] en el orden en que se agregaron"""
+        return [linea.como_tupla() for linea in self._lineas.values()]
+
+    # --- MODIFICACIONES ---
+
+    def agregar(self, producto, precio):
+        """
+        Agrega una pieza. Si el producto ya está solo sube la cantidad
+        (el precio ya capturado se respeta).
+        Retorna la línea, o None si no queda stock disponible.
+        """
+        linea = self._lineas.get(producto[0])
+        if linea is None:
+            linea = LineaCarrito(producto, precio)
+            self._lineas[linea.id] = linea
+            self._subtotal += linea.importe
+            self._notificar("agregado", linea)
+            return linea
+
+        if linea.cantidad >= linea.stock:
+            return None
+        self._cambiar(linea, linea.precio, linea.cantidad + 1)
+        self._notificar("cantidad", linea)
+        return linea
+
+    def fijar_cantidad(self, id_producto, cantidad):
+        """
+        Ajusta la cantidad dentro de [1, stock].
+        Retorna la cantidad aplicada (None si el producto no está en el carrito).
+        """
+        linea = self._lineas.get(id_producto)
+        if linea is None:
+            return None
+        cantidad = max(1, min(int(cantidad), linea.stock))
+        if cantidad != linea.cantidad:
+            self._cambiar(linea, linea.precio, cantidad)
+            self._notificar("cantidad", linea)
+        return cantidad
+
+    def fijar_precio(self, id_producto, precio):
+        linea = self._lineas.get(id_producto)
+        if linea is None:
+            return None
+        precio = float(precio)
+        if precio != linea.precio:
+            self._cambiar(linea, precio, linea.cantidad)
+            self._notificar("precio", linea)
+        return precio
+
+    def quitar(self, id_producto):
+        linea = self._lineas.pop(id_producto, None)
+        if linea is None:
+            return None
+        self._subtotal -= linea.importe
+        if not self._lineas:
+            self._subtotal = 0.0  # Sin líneas no arrastramos error de redondeo
+        self._notificar("quitado", linea)
+        return linea
+
+    def vaciar(self):
+        self._lineas = {}
+        self._subtotal = 0.0
+        self._notificar("vaciado", None)
+
+    def _cambiar(self, linea, precio, cantidad):
+        self._subtotal -= linea.importe
+        linea.precio = precio
+        linea.cantidad = cantidad
+        self._subtotal += linea.importe
+
+    # --- EVENTOS ---
+
+    def suscribir(self, callback):
+        """callback(evento, linea); retorna una función para cancelar la suscripción"""
+        self._suscriptores.append(callback)
+        return lambda: self._suscriptores.remove(callback)
+
+    def _notificar(self, evento, linea):
+        for callback in list(self._suscriptores):
+            try:
+                callback(evento, linea)
+            except Exception as e:
+                logging.error(f"Carrito: error en suscriptor ({evento}): {e}")
@@ -0,0 +1,352 @@
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+from utils.impresoras import obtener_transporte
+
+# --- CONFIGURACIÓN ---
+# Trabajos pendientes en disco (sobreviven a un reinicio); junto a main.py, no
+# relativa al directorio de trabajo, para que cada arranque vea la misma carpeta
+CARPETA_COLA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cola_impresion')
+CARPETA_FALLIDOS = 'fallidos'    # Subcarpeta de CARPETA_COLA: agotaron sus reintentos
+CAPACIDAD_COLA = 50              # Trabajos en espera como máximo
+REINTENTOS = 5                   # Intentos por trabajo antes de darlo por fallido
+ESPERA_INICIAL = 1.0             # Segundos antes del primer reintento (se duplica en cada uno)
+ESPERA_MAXIMA = 30.0
+
+EXTENSION = '.bin'
+
+
+class TrabajoImpresion:
+    """Un documento en la cola: bytes ESC/POS listos más su estado"""
+
+    ESTADOS = ("pendiente", "imprimiendo", "reintentando", "impreso", "fallido")
+
+    __slots__ = ("id", "nombre", "datos", "estado", "intentos", "error", "ruta", "_avisos", "_candado")
+
+    def __init__(self, nombre, datos, id_trabajo=None, ruta=None):
+        self.id = id_trabajo or uuid.uuid4().hex
+        self.nombre = nombre
+        self.datos = datos
+        self.estado = "pendiente"
+        self.intentos = 0
+        self.error = None
+        self.ruta = ruta  # Archivo en CARPETA_COLA mientras no se imprima (en fallidos/ si falló)
+        self._avisos = []  # Callbacks de al_terminar pendientes
+        self._candado = threading.Lock()
+
+    @property
+    def terminado(self):
+        return self.estado in ("impreso", "fallido")
+
+    def al_terminar(self, callback):
+        """
+        Llama callback(trabajo) una sola vez cuando el trabajo quede impreso o
+        fallido (desde el hilo de la cola), o de inmediato si ya terminó.
+        """
+        with self._candado:
+            if not self.terminado:
+                self._avisos.append(callback)
+                return
+        callback(self)
+
+    def _cambiar(self, estado):
+        """Fija el estado; si es final retorna (y consume) los avisos de al_terminar"""
+        with self._candado:
+            self.estado = estado
+            if not self.terminado:
+                return []
+            avisos, self._avisos = self._avisos, []
+            return avisos
+
+
+class ColaImpresion:
+    """
+    Imprime en un hilo aparte para que ninguna pantalla espere a la impresora.
+    encolar() guarda el trabajo en disco y regresa de inmediato; el hilo lo
+    manda al transporte configurado y, si falla (impresora apagada, sin papel),
+    reintenta con espera exponencial conservando el orden de los trabajos.
+    Al terminar bien se borra su archivo; los pendientes que quedan en disco se
+    vuelven a encolar la próxima vez que arranque la cola. Los que agotan sus
+    reintentos pasan a la subcarpeta fallidos/ y ahí se quedan hasta que la UI
+    los reintente o los descarte (ver fallidos, reintentar y descartar).
+    Quien quiera saber cómo va un trabajo se suscribe con suscribir(callback)
+    y recibe callback(trabajo) en cada cambio de estado (desde el hilo de la cola);
+    para un solo trabajo basta con trabajo.al_terminar(callback).
+    """
+
+    def __init__(self, transporte=obtener_transporte, carpeta=CARPETA_COLA, capacidad=CAPACIDAD_COLA,
+                 reintentos=REINTENTOS, espera_inicial=ESPERA_INICIAL, espera_maxima=ESPERA_MAXIMA):
+        self._transporte = transporte  # Función que regresa el Transporte (se resuelve en cada intento)
+        self.carpeta = carpeta
+        self.carpeta_fallidos = os.path.join(carpeta, CARPETA_FALLIDOS)
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._trabajos = {}  # id -> TrabajoImpresion (los de esta sesión)
+        self._suscriptores = []
+        self._candado = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._secuencia = 0
+
+    # --- CONSULTAS ---
+
+    def estado(self, id_trabajo):
+        trabajo = self._trabajos.get(id_trabajo)
+        return trabajo.estado if trabajo else None
+
+    def pendientes(self):
+        return [t for t in list(self._trabajos.values()) if not t.terminado]
+
+    def fallidos(self):
+        """Trabajos en fallidos/ (de esta sesión o anteriores), del más viejo al más nuevo"""
+        trabajos = []
+        for ruta in self._archivos(self.carpeta_fallidos):
+            try:
+                trabajo = self._leer(ruta)
+            except OSError as e:
+                logging.error(f"Cola de impresión: no se pudo leer {ruta}: {e}")
+                continue
+            trabajo.estado = "fallido"
+            trabajos.append(trabajo)
+        return trabajos
+
+    # --- TRABAJOS FALLIDOS ---
+
+    def _ruta_fallido(self, id_trabajo):
+        for ruta in self._archivos(self.carpeta_fallidos):
+            if self._id_de(ruta) == id_trabajo:
+                return ruta
+        return None
+
+    def reintentar(self, id_trabajo):
+        """
+        Vuelve a encolar un trabajo fallido con sus intentos en cero.
+        Retorna el TrabajoImpresion, o None si ya no existe o la cola está llena.
+        """
+        self._arrancar()
+        ruta = self._ruta_fallido(id_trabajo)
+        if ruta is None or self._cola.full():
+            return None
+        try:
+            trabajo = self._leer(ruta)
+            trabajo.ruta = os.path.join(self.carpeta, os.path.basename(ruta))
+            os.replace(ruta, trabajo.ruta)
+        except OSError as e:
+            logging.error(f"Cola de impresión: no se pudo reintentar {ruta}: {e}")
+            return None
+        self._trabajos[trabajo.id] = trabajo
+        try:
+            self._cola.put_nowait(trabajo)
+        except queue.Full:
+            logging.error(f"Cola de impresión llena, {trabajo.nombre} sigue pendiente en disco")
+            return None
+        return trabajo
+
+    def descartar(self, id_trabajo):
+        """Borra un trabajo fallido sin imprimirlo. Retorna True si se borró."""
+        ruta = self._ruta_fallido(id_trabajo)
+        if ruta is None:
+            return False
+        try:
+            os.remove(ruta)
+        except OSError as e:
+            logging.error(f"Cola de impresión: no se pudo descartar {ruta}: {e}")
+            return False
+        trabajo = self._trabajos.pop(id_trabajo, None)
+        if trabajo is not None:
+            trabajo.ruta = None
+        return True
+
+    # --- ENCOLAR ---
+
+    def encolar(self, datos, nombre="Ticket"):
+        """
+        Agrega un trabajo sin esperar a la impresora.
+        Retorna el TrabajoImpresion, o None si la cola está llena o no se pudo guardar.
+        """
+        self._arrancar()
+        if self._cola.full():
+            logging.error(f"Cola de impresión llena, se descartó: {nombre}")
+            return None
+        trabajo = TrabajoImpresion(nombre, bytes(datos))
+        try:
+            trabajo.ruta = self._guardar(trabajo)
+        except OSError as e:
+            # Se imprime igual, solo que no sobreviviría a un reinicio
+            logging.error(f"Cola de impresión: no se pudo guardar {nombre} en disco: {e}")
+        self._olvidar_terminados()
+        self._trabajos[trabajo.id] = trabajo
+        try:
+            self._cola.put_nowait(trabajo)
+        except queue.Full:
+            logging.error(f"Cola de impresión llena, se descartó: {nombre}")
+            self._borrar(trabajo)
+            del self._trabajos[trabajo.id]
+            return None
+        return trabajo
+
+    def _olvidar_terminados(self, maximo=200):
+        """El registro de estados no crece sin límite: se descartan los ya terminados"""
+        if len(self._trabajos) > maximo:
+            for id_trabajo, trabajo in list(self._trabajos.items()):
+                if trabajo.terminado:
+                    self._trabajos.pop(id_trabajo, None)
+
+    def _guardar(self, trabajo):
+        """Escribe el trabajo en la carpeta de la cola (atómico: .tmp + rename)"""
+        os.makedirs(self.carpeta, exist_ok=True)
+        with self._candado:
+            self._secuencia += 1
+            secuencia = self._secuencia
+        # time_ns + secuencia: el orden alfabético de los archivos es el orden de llegada
+        nombre = f"{time.time_ns():020d}-{secuencia:06d}-{trabajo.id}{EXTENSION}"
+        ruta = os.path.join(self.carpeta, nombre)
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(trabajo.nombre.encode("utf-8") + b"\n")
+            archivo.write(trabajo.datos)
+        os.replace(temporal, ruta)
+        return ruta
+
+    @staticmethod
+    def _archivos(carpeta):
+        """Rutas de los trabajos guardados en 'carpeta', en orden de llegada"""
+        if not os.path.isdir(carpeta):
+            return []
+        return [os.path.join(carpeta, nombre) for nombre in sorted(os.listdir(carpeta)) if nombre.endswith(EXTENSION)]
+
+    @staticmethod
+    def _id_de(ruta):
+        return os.path.basename(ruta)[:-len(EXTENSION)].rsplit("-", 1)[-1]
+
+    def _leer(self, ruta):
+        with open(ruta, "rb") as archivo:
+            nombre, _, datos = archivo.read().partition(b"\n")
+        return TrabajoImpresion(nombre.decode("utf-8", errors="replace"), datos, self._id_de(ruta), ruta)
+
+    def _recuperar(self):
+        """
+        Vuelve a encolar los pendientes que quedaron en disco (no los fallidos).
+        Los que ya conoce esta sesión (se detuvo y volvió a arrancar) se
+        encolan con el mismo TrabajoImpresion, así se imprimen una sola vez y
+        sus avisos siguen llegando.
+        """
+        for ruta in self._archivos(self.carpeta):
+            try:
+                trabajo = self._trabajos.get(self._id_de(ruta))
+                if trabajo is None or trabajo.terminado:
+                    trabajo = self._leer(ruta)
+                self._cola.put_nowait(trabajo)
+                self._trabajos[trabajo.id] = trabajo
+            except queue.Full:
+                logging.error("Cola de impresión llena al recuperar trabajos; el resto queda en disco")
+                return
+            except OSError as e:
+                logging.error(f"Cola de impresión: no se pudo leer {ruta}: {e}")
+
+    # --- HILO DE IMPRESIÓN ---
+
+    def _arrancar(self):
+        with self._candado:
+            if self._hilo is not None:
+                return
+            self._detener.clear()
+            self._recuperar()
+            self._hilo = threading.Thread(target=self._ejecutar, name="ColaImpresion", daemon=True)
+            self._hilo.start()
+
+    def detener(self, timeout=None):
+        """Termina el hilo; lo que no se imprimió sigue en disco para la próxima vez"""
+        self._detener.set()
+        hilo = self._hilo
+        if hilo is not None:
+            try:
+                self._cola.put_nowait(None)  # Despierta al hilo si está esperando trabajo
+            except queue.Full:
+                pass  # Con la cola llena el hilo no está esperando: verá _detener
+            hilo.join(timeout)
+        # Se vacía la cola: sus trabajos siguen en disco y _recuperar los vuelve
+        # a encolar al arrancar (si se quedaran aquí se imprimirían dos veces)
+        while True:
+            try:
+                self._cola.get_nowait()
+            except queue.Empty:
+                break
+        self._hilo = None
+
+    def _ejecutar(self):
+        while not self._detener.is_set():
+            trabajo = self._cola.get()
+            if trabajo is None:
+                continue
+            self._imprimir(trabajo)
+
+    def _imprimir(self, trabajo):
+        while not self._detener.is_set():
+            trabajo.intentos += 1
+            self._cambiar(trabajo, "imprimiendo")
+            try:
+                self._transporte().enviar(trabajo.datos, trabajo.nombre)
+            except Exception as e:
+                trabajo.error = str(e)
+                logging.error(f"Impresión de {trabajo.nombre} falló (intento {trabajo.intentos}): {e}")
+                if trabajo.intentos >= self.reintentos:
+                    # Ya no se reintenta solo: espera en fallidos/ a que la UI decida
+                    self._archivar(trabajo)
+                    self._cambiar(trabajo, "fallido")
+                    return
+                self._cambiar(trabajo, "reintentando")
+                espera = min(self.espera_inicial * 2 ** (trabajo.intentos - 1), self.espera_maxima)
+                self._detener.wait(espera)
+                continue
+
+            trabajo.error = None
+            self._borrar(trabajo)
+            self._cambiar(trabajo, "impreso")
+            return
+
+    def _archivar(self, trabajo):
+        """Mueve el archivo del trabajo a fallidos/"""
+        if trabajo.ruta is None:
+            return
+        destino = os.path.join(self.carpeta_fallidos, os.path.basename(trabajo.ruta))
+        try:
+            os.makedirs(self.carpeta_fallidos, exist_ok=True)
+            os.replace(trabajo.ruta, destino)
+            trabajo.ruta = destino
+        except OSError as e:
+            logging.error(f"Cola de impresión: no se pudo mover {trabajo.ruta} a fallidos: {e}")
+
+    def _borrar(self, trabajo):
+        if trabajo.ruta is None:
+            return
+        try:
+            os.remove(trabajo.ruta)
+        except OSError as e:
+            logging.error(f"Cola de impresión: no se pudo borrar {trabajo.ruta}: {e}")
+        trabajo.ruta = None
+
+    # --- EVENTOS ---
+
+    def suscribir(self, callback):
+        """callback(trabajo); retorna una función para cancelar la suscripción"""
+        self._suscriptores.append(callback)
+        return lambda: self._suscriptores.remove(callback) if callback in self._suscriptores else None
+
+    def _cambiar(self, trabajo, estado):
+        avisos = trabajo._cambiar(estado)
+        for callback in list(self._suscriptores) + avisos:
+            try:
+                callback(trabajo)
+            except Exception as e:
+                logging.error(f"Cola de impresión: error en suscriptor ({estado}): {e}")
+
+
+# Instancia única del proceso
+cola_impresion = ColaImpresion()
@@ -0,0 +1,277 @@
+"""
+Impresora ESC/POS virtual: interpreta los bytes que genera printer.py y los
+dibuja como texto a 32 columnas (papel de 58 mm) o 48 (80 mm).
+Sirve para ver un ticket sin la POS-58, para comparar la salida contra un
+archivo de referencia y, ejecutado como módulo, para medir cuántos tickets
+por segundo se generan:
+
+    python -m utils.emulador_escpos --columnas 48 --repeticiones 2000
+"""
+import argparse
+import time
+
+from utils.escpos import CODIFICACION
+from utils.impresoras import TransporteMemoria
+from utils.plantillas_ticket import PAPELES
+
+ESC = 0x1b
+GS = 0x1d
+LF = 0x0a
+
+COLUMNAS_58MM = PAPELES["58mm"]
+COLUMNAS_80MM = PAPELES["80mm"]
+PAPEL_POR_COLUMNAS = {columnas: papel for papel, columnas in PAPELES.items()}
+
+# Comandos que el emulador ignora pero debe saltar: byte de comando -> cantidad de parámetros
+_PARAMETROS_ESC = {ord('!'): 1, ord('-'): 1, ord('2'): 0, ord('3'): 1, ord('J'): 1, ord('M'): 1,
+                   ord('G'): 1, ord('t'): 1, ord('p'): 3, ord('R'): 1, ord('{'): 1}
+_PARAMETROS_GS = {ord('B'): 1, ord('L'): 2, ord('W'): 2, ord('h'): 1, ord('w'): 1, ord('H'): 1, ord('f'): 1}
+
+
+class Renglon:
+    """Una línea impresa: texto ya alineado al ancho del papel más su formato"""
+
+    __slots__ = ("texto", "negrita", "alto")
+
+    def __init__(self, texto, negrita=False, alto=1):
+        self.texto = texto
+        self.negrita = negrita
+        self.alto = alto
+
+    def __repr__(self):
+        return f"Renglon({self.texto!r}, negrita={self.negrita}, alto={self.alto})"
+
+
+class EmuladorESCPOS:
+    """
+    Interpreta ESC @ (inicio), ESC a (alineación), ESC E (negrita),
+    GS ! (tamaño), ESC d (avance), GS V (corte) y saltos de línea.
+    Los caracteres de doble ancho ocupan dos columnas (se dibujan seguidos
+    de un espacio) y el texto que no cabe pasa al siguiente renglón, igual
+    que en el papel. Los comandos no soportados se cuentan en 'ignorados'.
+    """
+
+    def __init__(self, columnas=COLUMNAS_58MM):
+        self.columnas = columnas
+        self.renglones = []
+        self.ignorados = 0
+        self.cortes = 0
+        self._reiniciar()
+        self._linea = []  # [(caracter, ancho)]
+        self._ocupado = 0
+        self._formato_linea = None  # (alineación, negrita, alto) al empezar el renglón
+
+    def _reiniciar(self):
+        self.alineacion = 0  # 0 izquierda, 1 centro, 2 derecha
+        self.negrita = False
+        self.ancho = 1
+        self.alto = 1
+
+    # --- INTERPRETACIÓN ---
+
+    def procesar(self, datos):
+        """Interpreta un flujo de bytes; se puede llamar varias veces. Regresa self."""
+        i = 0
+        n = len(datos)
+        while i < n:
+            b = datos[i]
+            if b == ESC and i + 1 < n:
+                i = self._esc(datos, i + 1)
+            elif b == GS and i + 1 < n:
+                i = self._gs(datos, i + 1)
+            elif b == LF:
+                self._emitir()
+                i += 1
+            elif b < 0x20:
+                i += 1  # CR y otros controles no mueven el papel
+            else:
+                # Corrida de texto hasta el siguiente byte de control
+                j = i
+                while j < n and datos[j] >= 0x20:
+                    j += 1
+                self._texto(bytes(datos[i:j]).decode(CODIFICACION, errors='replace'))
+                i = j
+        return self
+
+    def _esc(self, datos, i):
+        comando = datos[i]
+        parametro = datos[i + 1] if i + 1 < len(datos) else 0
+        if comando == ord('@'):
+            self._reiniciar()
+            return i + 1
+        if comando == ord('a'):
+            self.alineacion = parametro % 48 if parametro >= 48 else parametro  # acepta 0/1/2 y '0'/'1'/'2'
+            return i + 2
+        if comando == ord('E'):
+            self.negrita = bool(parametro & 1)
+            return i + 2
+        if comando == ord('d'):
+            self._emitir(vacio=False)  # Imprime lo pendiente y avanza n renglones
+            for _ in range(parametro):
+                self._emitir()
+            return i + 2
+        self.ignorados += 1
+        return i + 1 + _PARAMETROS_ESC.get(comando, 0)
+
+    def _gs(self, datos, i):
+        comando = datos[i]
+        parametro = datos[i + 1] if i + 1 < len(datos) else 0
+        if comando == ord('!'):
+            self.ancho = (parametro >> 4 & 0x07) + 1
+            self.alto = (parametro & 0x07) + 1
+            return i + 2
+        if comando == ord('V'):
+            self._emitir(vacio=False)
+            self.cortes += 1
+            # GS V m (0/1/48/49) o GS V m n (65/66)
+            return i + (3 if parametro in (65, 66) else 2)
+        self.ignorados += 1
+        return i + 1 + _PARAMETROS_GS.get(comando, 0)
+
+    def _texto(self, texto):
+        for caracter in texto:
+            if self._ocupado + self.ancho > self.columnas:
+                self._emitir()  # No cabe: sigue en el siguiente renglón
+            if self._formato_linea is None:
+                self._formato_linea = (self.alineacion, self.negrita, self.alto)
+            self._linea.append((caracter, self.ancho))
+            self._ocupado += self.ancho
+
+    def _emitir(self, vacio=True):
+        """Cierra el renglón actual (vacio=False: solo si tiene texto)"""
+        if not self._linea and not vacio:
+            return
+        alineacion, negrita, alto = self._formato_linea or (self.alineacion, self.negrita, self.alto)
+        texto = "".join(c + " " * (ancho - 1) for c, ancho in self._linea)
+        libre = self.columnas - self._ocupado
+        if alineacion == 1:
+            texto = " " * (libre // 2) + texto
+        elif alineacion == 2:
+            texto = " " * libre + texto
+        self.renglones.append(Renglon(texto.ljust(self.columnas), negrita, alto))
+        self._linea = []
+        self._ocupado = 0
+        self._formato_linea = None
+
+    # --- SALIDA ---
+
+    def texto(self, marco=True):
+        """
+        El papel como texto. Con marco cada renglón va entre '|' y los de
+        negrita llevan '*' a la derecha, para que se noten en una comparación.
+        """
+        self._emitir(vacio=False)
+        if not marco:
+            return "\n".join(r.texto.rstrip() for r in self.renglones) + "\n"
+        borde = "+" + "-" * self.columnas + "+"
+        lineas = [borde]
+        for r in self.renglones:
+            lineas.append(f"|{r.texto}|" + ("*" if r.negrita else ""))
+        lineas.append(borde)
+        return "\n".join(lineas) + "\n"
+
+
+def renderizar(datos, columnas=COLUMNAS_58MM, marco=True):
+    """Bytes ESC/POS -> texto del ticket impreso"""
+    return EmuladorESCPOS(columnas).procesar(datos).texto(marco)
+
+
+class TransporteEmulador(TransporteMemoria):
+    """
+    Impresora virtual para el selector de transportes ("emulador:48" o
+    "emulador:32:/ruta/tickets.txt"): guarda cada trabajo, su dibujo en
+    'renders' y, si se indica archivo, lo agrega ahí.
+    """
+
+    def __init__(self, columnas=COLUMNAS_58MM, ruta=None):
+        super().__init__()
+        self.columnas = columnas
+        self.ruta = ruta
+        self.renders = []
+
+    def _cerrar(self, completo):
+        super()._cerrar(completo)
+        if not completo:
+            return
+        nombre, datos = self.trabajos[-1]
+        render = renderizar(datos, self.columnas)
+        self.renders.append(render)
+        if self.ruta:
+            with open(self.ruta, "a", encoding="utf-8") as archivo:
+                archivo.write(f"{nombre}\n{render}\n")
+
+
+# --- BENCHMARK ---
+
+def _datos_ejemplo(renglones_corte=300):
+    productos = [
+        ((1, "10CNY22", "Cadena New York", 2.2, "10k", "Cadenas", 3), 3300.0, 2),
+        ((2, "14ACP10", "Anillo de compromiso con piedra", 1.0, "14k", "Anillos", 1), 2200.5, 1),
+        ((3, "ITAAC35", "Arracadas Italianas", 3.5, "Italiano", "Aretes", 4), 5950.0, 1),
+    ]
+    venta = dict(folio=1234, fecha="02/01/26 10:15", productos=productos, total=14750.5,
+                 metodo_pago="Efectivo", recibio=15000.0, cambio=249.5,
+                 cliente_nombre="Maria Guadalupe Hernandez", cliente_numero="4431234567",
+                 cliente_direccion="Av. Madero Poniente 123, Centro")
+    apartado = dict(folio=56, fecha="02/01/26 10:20", productos=productos, total=14750.5,
+                    abono_inicial=3000.0, restante=11750.5, cliente_nombre="Jose Luis Ramirez")
+    vendedores = [("Pedro", 42000.0), ("Lupita Hernandez", 18500.5), ("Mostrador", 900.0)]
+    detalle = [(1000 + i, "10CNY22", "Cadena New York", 2.2, 3300.0 * (1 + i % 3), "Pedro", 1 + i % 3)
+               for i in range(renglones_corte)]
+    corte = dict(ventas_empleado=vendedores, total_dia=61400.5, detalle_productos=detalle)
+    inventario = dict(lista_productos=[p[0] for p in productos] * 50)
+    return venta, apartado, corte, inventario
+
+
+def medir(repeticiones=1000, columnas=COLUMNAS_58MM, mostrar=True):
+    """
+    Genera cada tipo de ticket 'repeticiones' veces y reporta tickets/s y bytes.
+    Los tickets se generan para el papel de 'columnas' (32 -> 58mm, 48 -> 80mm).
+    """
+    from utils import printer  # printer importa la cola; solo se necesita aquí
+
+    papel = PAPEL_POR_COLUMNAS[columnas]
+    venta, apartado, corte, inventario = _datos_ejemplo()
+    casos = [
+        ("Ticket Venta", printer.generar_ticket_venta, venta),
+        ("Ticket Apartado", printer.generar_ticket_apartado, apartado),
+        ("Corte Caja (300)", printer.generar_corte_caja, corte),
+        ("Inventario (150)", printer.generar_inventario, inventario),
+    ]
+    resultados = []
+    for nombre, generar, argumentos in casos:
+        argumentos = dict(argumentos, papel=papel)
+        datos = generar(**argumentos)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            generar(**argumentos)
+        transcurrido = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        emulador = EmuladorESCPOS(columnas).procesar(datos)
+        render = emulador.texto()
+        tiempo_render = time.perf_counter() - inicio
+
+        resultados.append((nombre, repeticiones / transcurrido, len(datos), len(emulador.renglones), tiempo_render))
+        if mostrar:
+            print(f"{nombre}\n{render}")
+
+    print(f"{'Ticket':<18} {'tickets/s':>10} {'bytes':>7} {'renglones':>9} {'render ms':>9}")
+    for nombre, por_segundo, tamano, renglones, tiempo_render in resultados:
+        print(f"{nombre:<18} {por_segundo:>10,.0f} {tamano:>7} {renglones:>9} {tiempo_render * 1000:>9.2f}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Impresora ESC/POS virtual y medición de tickets")
+    parser.add_argument("--columnas", type=int, default=COLUMNAS_58MM, choices=(COLUMNAS_58MM, COLUMNAS_80MM))
+    parser.add_argument("--repeticiones", type=int, default=1000)
+    parser.add_argument("--archivo", help="Dibuja un archivo .bin con bytes ESC/POS en lugar de medir")
+    parser.add_argument("--sin-tickets", action="store_true", help="Solo la tabla de tiempos")
+    args = parser.parse_args()
+
+    if args.archivo:
+        with open(args.archivo, "rb") as archivo:
+            print(renderizar(archivo.read(), args.columnas), end="")
+    else:
+        medir(args.repeticiones, args.columnas, mostrar=not args.sin_tickets)
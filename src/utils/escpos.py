@@ -0,0 +1,80 @@
+# --- COMANDOS ESC/POS ---
+INIT = b'\x1b@'
+ALIGN_LEFT = b'\x1ba\x00'
+ALIGN_CENTER = b'\x1ba\x01'
+BOLD_ON = b'\x1bE\x01'
+BOLD_OFF = b'\x1bE\x00'
+SIZE_2X = b'\x1d!\x11'
+SIZE_NORMAL = b'\x1d!\x00'
+FEED_N = b'\x1bd\x04'  # Avanza 4 líneas antes del corte
+
+ANCHO_NORMAL = 32  # Caracteres por línea en papel de 58 mm
+CODIFICACION = 'cp437'
+
+
+def trans(txt):
+    """Texto -> bytes en la página de códigos de la impresora (lo que no exista sale como '?')"""
+    return str(txt).encode(CODIFICACION, errors='replace')
+
+
+# Cabecera de la tienda ya codificada: es igual en todos los tickets de venta
+CABECERA_TIENDA = b"".join([
+    SIZE_2X, BOLD_ON,
+    trans("JOYERIA\n"),
+    trans("3 HERMANOS\n"),
+    BOLD_OFF, SIZE_NORMAL,
+    trans("R.F.C DEPN850420N18\n"),
+    trans("PLAZA DE LA MUJER LOCAL 118\n"),
+    trans("443-312-64-14 COL. CENTRO\n"),
+    trans("C.P. 52800 MORELIA, MICH.\n\n"),
+    BOLD_ON,
+    trans("Extenso surtido en alhajas de oro de 10 y 14 kilates\n"),
+    BOLD_OFF,
+])
+
+
+class TicketBuilder:
+    """
+    Arma un documento ESC/POS completo en un solo bytearray para mandarlo a la
+    impresora en una sola escritura (antes era una llamada a WritePrinter por
+    cada línea y cada comando). Los comandos de formato (alineación, negrita,
+    tamaño) llegan ya codificados por crudo(): las plantillas de
+    utils.plantillas_ticket los precalculan al compilar. Los métodos regresan
+    el mismo builder para poder encadenarlos:
+
+        ticket = TicketBuilder().crudo(ALIGN_CENTER).linea("HOLA")
+        obtener_transporte().enviar(ticket.datos(), "Ticket")
+    """
+
+    __slots__ = ("_buffer", "ancho")
+
+    def __init__(self, ancho=ANCHO_NORMAL):
+        self._buffer = bytearray(INIT)
+        self.ancho = ancho
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def crudo(self, *datos):
+        """Bytes ya codificados (comandos o segmentos precalculados)"""
+        for d in datos:
+            self._buffer += d
+        return self
+
+    def texto(self, txt):
+        self._buffer += trans(txt)
+        return self
+
+    def linea(self, txt=""):
+        self._buffer += trans(f"{txt}\n")
+        return self
+
+    def dos_columnas(self, izq, der, max_izq=20, max_der=10):
+        """Texto a la izquierda y valor pegado al margen derecho"""
+        str_izq = str(izq)[:max_izq]
+        str_der = str(der)[:max_der]
+        espacios = max(self.ancho - len(str_izq) - len(str_der), 0)
+        return self.linea(str_izq + " " * espacios + str_der)
+
+    def datos(self):
+        return bytes(self._buffer)
@@ -0,0 +1,263 @@
+import abc
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+
+# --- CONFIGURACIÓN ---
+# Destino de impresión "tipo:parametros". Se puede cambiar por terminal con la
+# variable de entorno JOYERIA_IMPRESORA sin tocar el código:
+#   win32:POS-58              Cola de impresión de Windows (RAW)
+#   tcp:192.168.1.50:9100     Impresora de red (puerto RAW 9100)
+#   usb:/dev/usb/lp0          Archivo de dispositivo en Linux
+#   cups:POS-58               CUPS con 'lp -o raw'
+#   archivo:/tmp/tickets.bin  Agrega cada trabajo al archivo (pruebas)
+#   memoria                   Guarda los trabajos en memoria (pruebas/CI)
+#   emulador:48:/tmp/t.txt    Impresora virtual: dibuja cada ticket como texto
+NOMBRE_IMPRESORA = "POS-58"
+DESTINO_POR_DEFECTO = f"win32:{NOMBRE_IMPRESORA}" if sys.platform == "win32" else f"cups:{NOMBRE_IMPRESORA}"
+TIMEOUT_RED = 5  # segundos para conectar/enviar a una impresora de red
+
+
+class Transporte(abc.ABC):
+    """
+    Forma de hacer llegar los bytes ESC/POS a la impresora.
+    Cada backend implementa _escribir (y si los necesita _abrir y _cerrar); quien imprime usa:
+
+        with transporte.trabajo("Ticket Venta") as impresora:
+            impresora.escribir(datos)
+
+    Cualquier error se propaga como excepción (el llamador decide qué hacer).
+    Los trabajos de un mismo transporte se atienden de uno en uno.
+    """
+
+    def __init__(self):
+        self._ocupado = threading.Lock()
+
+    def _abrir(self, nombre_trabajo):
+        pass
+
+    @abc.abstractmethod
+    def _escribir(self, datos):
+        """Manda 'datos' (bytes) al destino; lanza excepción si no se pudo"""
+
+    def _cerrar(self, completo):
+        """completo=False si el trabajo se interrumpió por un error"""
+        pass
+
+    def escribir(self, datos):
+        self._escribir(bytes(datos))
+
+    @contextmanager
+    def trabajo(self, nombre_trabajo="Ticket"):
+        with self._ocupado:
+            self._abrir(nombre_trabajo)
+            completo = False
+            try:
+                yield self
+                completo = True
+            finally:
+                self._cerrar(completo)
+
+    def enviar(self, datos, nombre_trabajo="Ticket"):
+        """Un trabajo completo en una sola escritura"""
+        with self.trabajo(nombre_trabajo) as impresora:
+            impresora.escribir(datos)
+
+
+class TransporteWin32(Transporte):
+    """Cola de impresión de Windows en modo RAW (requiere pywin32)"""
+
+    def __init__(self, nombre_impresora=NOMBRE_IMPRESORA):
+        super().__init__()
+        self.nombre_impresora = nombre_impresora
+        self._win32print = None
+        self._impresora = None
+
+    def _abrir(self, nombre_trabajo):
+        if self._win32print is None:
+            import win32print  # Solo existe en Windows: se importa hasta que se usa
+            self._win32print = win32print
+        self._impresora = self._win32print.OpenPrinter(self.nombre_impresora)
+        try:
+            self._win32print.StartDocPrinter(self._impresora, 1, (nombre_trabajo, None, "RAW"))
+            self._win32print.StartPagePrinter(self._impresora)
+        except Exception:
+            self._win32print.ClosePrinter(self._impresora)
+            self._impresora = None
+            raise
+
+    def _escribir(self, datos):
+        self._win32print.WritePrinter(self._impresora, datos)
+
+    def _cerrar(self, completo):
+        if self._impresora is None:
+            return
+        try:
+            self._win32print.EndPagePrinter(self._impresora)
+            self._win32print.EndDocPrinter(self._impresora)
+        finally:
+            self._win32print.ClosePrinter(self._impresora)
+            self._impresora = None
+
+
+class TransporteRed(Transporte):
+    """Impresora de red: socket TCP al puerto RAW (9100 por defecto)"""
+
+    def __init__(self, host, puerto=9100, timeout=TIMEOUT_RED):
+        super().__init__()
+        self.host = host
+        self.puerto = int(puerto)
+        self.timeout = timeout
+        self._socket = None
+
+    def _abrir(self, nombre_trabajo):
+        self._socket = socket.create_connection((self.host, self.puerto), timeout=self.timeout)
+
+    def _escribir(self, datos):
+        self._socket.sendall(datos)
+
+    def _cerrar(self, completo):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class TransporteDispositivo(Transporte):
+    """Archivo de dispositivo (ej. /dev/usb/lp0) o cualquier archivo: escribe en modo binario"""
+
+    modo = "wb"
+
+    def __init__(self, ruta):
+        super().__init__()
+        self.ruta = ruta
+        self._archivo = None
+
+    def _abrir(self, nombre_trabajo):
+        self._archivo = open(self.ruta, self.modo)
+
+    def _escribir(self, datos):
+        self._archivo.write(datos)
+
+    def _cerrar(self, completo):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+
+class TransporteArchivo(TransporteDispositivo):
+    """Agrega cada trabajo al final del archivo (para revisar tickets sin impresora)"""
+
+    modo = "ab"
+
+
+class TransporteCups(Transporte):
+    """CUPS: el trabajo se junta en memoria y se manda completo con 'lp -o raw'"""
+
+    def __init__(self, nombre_impresora=NOMBRE_IMPRESORA, comando="lp"):
+        super().__init__()
+        self.nombre_impresora = nombre_impresora
+        self.comando = comando
+        self._nombre_trabajo = None
+        self._buffer = None
+
+    def _abrir(self, nombre_trabajo):
+        self._nombre_trabajo = nombre_trabajo
+        self._buffer = bytearray()
+
+    def _escribir(self, datos):
+        self._buffer += datos
+
+    def _cerrar(self, completo):
+        datos, self._buffer = self._buffer, None
+        if not completo or not datos:
+            return
+        comando = [self.comando, "-o", "raw", "-t", self._nombre_trabajo]
+        if self.nombre_impresora:
+            comando += ["-d", self.nombre_impresora]
+        resultado = subprocess.run(comando, input=bytes(datos), capture_output=True, timeout=30)
+        if resultado.returncode != 0:
+            error = resultado.stderr.decode(errors="replace").strip()
+            raise OSError(f"lp terminó con código {resultado.returncode}: {error}")
+
+
+class TransporteMemoria(Transporte):
+    """Guarda cada trabajo completo en 'trabajos' como (nombre, bytes)"""
+
+    def __init__(self):
+        super().__init__()
+        self.trabajos = []
+        self._actual = None
+
+    def _abrir(self, nombre_trabajo):
+        self._actual = (nombre_trabajo, bytearray())
+
+    def _escribir(self, datos):
+        self._actual[1].extend(datos)
+
+    def _cerrar(self, completo):
+        nombre, datos = self._actual
+        self._actual = None
+        if completo:
+            self.trabajos.append((nombre, bytes(datos)))
+
+
+def _crear_red(parametros):
+    host, _, puerto = parametros.partition(":")
+    return TransporteRed(host, puerto or 9100)
+
+
+def _crear_emulador(parametros):
+    # Se importa solo si se elige este destino
+    from utils.emulador_escpos import TransporteEmulador
+    columnas, _, ruta = parametros.partition(":")
+    return TransporteEmulador(int(columnas or 32), ruta or None)
+
+
+# tipo -> constructor que recibe el texto después de "tipo:"
+TRANSPORTES = {
+    "win32": lambda parametros: TransporteWin32(parametros or NOMBRE_IMPRESORA),
+    "tcp": _crear_red,
+    "usb": lambda parametros: TransporteDispositivo(parametros or "/dev/usb/lp0"),
+    "cups": lambda parametros: TransporteCups(parametros or NOMBRE_IMPRESORA),
+    "archivo": lambda parametros: TransporteArchivo(parametros or "tickets.bin"),
+    "memoria": lambda parametros: TransporteMemoria(),
+    "emulador": _crear_emulador,
+}
+
+
+def crear_transporte(destino):
+    """Construye el transporte descrito por 'destino' ("tipo:parametros")"""
+    tipo, _, parametros = destino.partition(":")
+    constructor = TRANSPORTES.get(tipo.strip().lower())
+    if constructor is None:
+        raise ValueError(f"Destino de impresión desconocido: {destino}")
+    return constructor(parametros.strip())
+
+
+_transporte = None
+_candado = threading.Lock()
+
+
+def obtener_transporte():
+    """Transporte configurado; se crea en el primer uso"""
+    global _transporte
+    with _candado:
+        if _transporte is None:
+            destino = os.environ.get("JOYERIA_IMPRESORA") or DESTINO_POR_DEFECTO
+            _transporte = crear_transporte(destino)
+            logging.info(f"Impresora: usando {destino}")
+        return _transporte
+
+
+def configurar_transporte(transporte):
+    """Reemplaza el transporte (un Transporte o un texto de destino); útil en pruebas"""
+    global _transporte
+    if isinstance(transporte, str):
+        transporte = crear_transporte(transporte)
+    with _candado:
+        _transporte = transporte
+    return transporte
@@ -0,0 +1,312 @@
+import abc
+import os
+import string
+import threading
+
+from utils.escpos import (
+    TicketBuilder, trans,
+    ALIGN_LEFT, ALIGN_CENTER, BOLD_ON, BOLD_OFF, SIZE_2X, SIZE_NORMAL, FEED_N,
+)
+
+# --- CONFIGURACIÓN ---
+# Caracteres por línea de cada papel. Las plantillas se diseñan a 58 mm y las
+# columnas marcadas como flexibles se quedan con el espacio extra en 80 mm.
+PAPELES = {"58mm": 32, "80mm": 48}
+ANCHO_BASE = PAPELES["58mm"]
+PAPEL_POR_DEFECTO = os.environ.get("JOYERIA_PAPEL", "58mm")
+
+_formateador = string.Formatter()
+
+
+def _tiene_campos(plantilla):
+    return any(campo is not None for _, campo, _, _ in _formateador.parse(plantilla))
+
+
+# --- ELEMENTOS ---
+# Cada elemento se compila para un ancho de papel y regresa una lista de
+# segmentos: bytes (parte fija, ya codificada) o funciones(datos, ticket)
+# que escriben la parte variable con los métodos de TicketBuilder.
+
+class Elemento(abc.ABC):
+    @abc.abstractmethod
+    def compilar(self, ancho):
+        """Lista de segmentos (bytes o funciones(datos, ticket)) para 'ancho' caracteres"""
+
+
+class Crudo(Elemento):
+    """Bytes ya codificados (comandos o bloques pre-armados como la cabecera de la tienda)"""
+
+    def __init__(self, datos):
+        self.datos = bytes(datos)
+
+    def compilar(self, ancho):
+        return [self.datos]
+
+
+class _Comando(Crudo):
+    def __init__(self, activo=True):
+        super().__init__(self.ENCENDIDO if activo else self.APAGADO)
+
+
+class Centrar(Crudo):
+    def __init__(self):
+        super().__init__(ALIGN_CENTER)
+
+
+class Izquierda(Crudo):
+    def __init__(self):
+        super().__init__(ALIGN_LEFT)
+
+
+class Negrita(_Comando):
+    ENCENDIDO, APAGADO = BOLD_ON, BOLD_OFF
+
+
+class Doble(_Comando):
+    ENCENDIDO, APAGADO = SIZE_2X, SIZE_NORMAL
+
+
+class Saltos(Crudo):
+    def __init__(self, n=1):
+        super().__init__(b"\n" * n)
+
+
+class Avance(Crudo):
+    def __init__(self):
+        super().__init__(FEED_N)
+
+
+class Divisoria(Elemento):
+    def compilar(self, ancho):
+        return [b"-" * ancho + b"\n"]
+
+
+class Texto(Elemento):
+    """
+    Una línea de texto. Puede llevar campos con formato de str.format
+    ("Folio: {folio}", "Cliente: {cliente:.22}", "${total:,.2f}"); si no lleva
+    ninguno se codifica una sola vez al compilar.
+    salto=False no agrega el fin de línea (para pegar otro texto después).
+    """
+
+    def __init__(self, plantilla, salto=True):
+        self.plantilla = plantilla + ("\n" if salto else "")
+
+    def compilar(self, ancho):
+        if not _tiene_campos(self.plantilla):
+            return [trans(self.plantilla)]
+        formato = self.plantilla.format_map
+        return [lambda datos, ticket: ticket.texto(formato(datos))]
+
+
+class DosColumnas(Elemento):
+    """Etiqueta a la izquierda y valor pegado al margen derecho ("Pago:      Efectivo")"""
+
+    def __init__(self, izquierda, derecha, max_izq=20, max_der=10):
+        self.izquierda = izquierda
+        self.derecha = derecha
+        self.max_izq = max_izq
+        self.max_der = max_der
+
+    def compilar(self, ancho):
+        izquierda, derecha = self.izquierda.format_map, self.derecha.format_map
+        max_izq, max_der = self.max_izq, self.max_der
+
+        def escribir(datos, ticket):
+            ticket.dos_columnas(izquierda(datos), derecha(datos), max_izq, max_der)
+        return [escribir]
+
+
+class Columna:
+    """
+    Columna de una Tabla. 'ancho' es el ancho a 58 mm; con flexible=True
+    crece con el papel. 'separacion' deja espacios libres a la derecha del
+    texto (recortado al ancho), 'formato' se aplica a números (",.0f") y
+    'prefijo' va antes del valor ("$").
+    """
+
+    __slots__ = ("ancho", "alinear", "formato", "prefijo", "separacion", "flexible")
+
+    def __init__(self, ancho, alinear="<", formato="", prefijo="", separacion=0, flexible=False):
+        self.ancho = ancho
+        self.alinear = alinear
+        self.formato = formato
+        self.prefijo = prefijo
+        self.separacion = separacion
+        self.flexible = flexible
+
+    def especificacion(self, indice, ancho):
+        if self.formato:
+            return f"{self.prefijo}{{{indice}:{self.alinear}{ancho}{self.formato}}}"
+        if self.separacion:
+            # Texto recortado para que siempre queden 'separacion' espacios
+            return f"{self.prefijo}{{{indice}!s:{self.alinear}{ancho}.{ancho - self.separacion}}}"
+        return f"{self.prefijo}{{{indice}!s:{self.alinear}{ancho}}}"
+
+
+def _anchos(columnas, ancho):
+    """Ancho real de cada columna: las flexibles se quedan con lo que sobra arriba de 58 mm"""
+    extra = ancho - ANCHO_BASE
+    return [c.ancho + extra if c.flexible else c.ancho for c in columnas]
+
+
+class Titulos(Elemento):
+    """
+    Renglón fijo con los títulos de una tabla: cada título arranca sobre el
+    valor de su columna (después del prefijo), alineado a la izquierda. Un
+    título más largo que su columna ("Folio" sobre 4) se come los espacios
+    iniciales de la siguiente en lugar de recorrerla.
+    """
+
+    def __init__(self, columnas, titulos):
+        self.columnas = columnas
+        self.titulos = titulos
+
+    def compilar(self, ancho):
+        renglon, fin_columna = "", 0
+        for columna, titulo, ancho_columna in zip(self.columnas, self.titulos, _anchos(self.columnas, ancho)):
+            parte = " " * len(columna.prefijo) + f"{titulo:<{ancho_columna}}"
+            sobrante = len(renglon) - fin_columna
+            if sobrante > 0:
+                parte = parte[min(sobrante, len(parte) - len(parte.lstrip(" "))):]
+            renglon += parte
+            fin_columna += len(columna.prefijo) + ancho_columna
+        return [trans(renglon.rstrip() + "\n")]
+
+
+class Tabla(Elemento):
+    """
+    Un renglón por cada tupla de datos[campo]. 'columnas' es una lista de
+    Columna o directamente una cadena de formato ("{0} x {1:.15} ${2:,.0f}").
+    Al compilar las columnas se convierten en una sola cadena de formato,
+    así cada renglón es un format() y un encode(). Si un valor no cabe
+    (ej. un importe muy largo), la columna flexible se encoge para que el
+    renglón no pase del ancho del papel.
+    """
+
+    def __init__(self, campo, columnas):
+        self.campo = campo
+        self.columnas = columnas
+
+    def _formato(self, anchos):
+        return "".join(c.especificacion(i, a) for i, (c, a) in enumerate(zip(self.columnas, anchos))) + "\n"
+
+    def compilar(self, ancho):
+        campo = self.campo
+        if isinstance(self.columnas, str):
+            formato = (self.columnas + "\n").format
+
+            def escribir_libre(datos, ticket):
+                ticket.texto("".join(formato(*fila) for fila in datos[campo]))
+            return [escribir_libre]
+
+        anchos = _anchos(self.columnas, ancho)
+        formato = self._formato(anchos).format
+        flexible = next((i for i, c in enumerate(self.columnas) if c.flexible), None)
+        largo_maximo = ancho + 1  # Incluye el fin de línea
+        cache_formatos = {}
+
+        def ajustado(exceso):
+            """Cadena de formato con la columna flexible 'exceso' caracteres más angosta"""
+            if exceso not in cache_formatos:
+                nuevos = list(anchos)
+                columna = self.columnas[flexible]
+                nuevos[flexible] = max(nuevos[flexible] - exceso, columna.separacion + 1)
+                cache_formatos[exceso] = self._formato(nuevos).format
+            return cache_formatos[exceso]
+
+        def escribir(datos, ticket):
+            renglones = []
+            for fila in datos[campo]:
+                linea = formato(*fila)
+                if len(linea) > largo_maximo and flexible is not None:
+                    linea = ajustado(len(linea) - largo_maximo)(*fila)
+                renglones.append(linea)
+            ticket.texto("".join(renglones))
+
+        return [escribir]
+
+
+class Si(Elemento):
+    """Los elementos solo se escriben si datos[campo] es verdadero"""
+
+    def __init__(self, campo, *elementos):
+        self.campo = campo
+        self.elementos = elementos
+
+    def compilar(self, ancho):
+        campo = self.campo
+        interna = _compilar(self.elementos, ancho)
+
+        def escribir(datos, ticket):
+            if datos.get(campo):
+                interna.escribir(datos, ticket)
+        return [escribir]
+
+
+# --- PLANTILLA ---
+
+class PlantillaCompilada:
+    """
+    Segmentos listos para un ancho de papel: los fijos consecutivos ya vienen
+    unidos en un solo bloque de bytes; los variables son funciones.
+    """
+
+    __slots__ = ("ancho", "segmentos")
+
+    def __init__(self, ancho, segmentos):
+        self.ancho = ancho
+        self.segmentos = segmentos
+
+    def escribir(self, datos, ticket):
+        for segmento in self.segmentos:
+            if segmento.__class__ is bytes:
+                ticket.crudo(segmento)
+            else:
+                segmento(datos, ticket)
+
+    def generar(self, datos):
+        ticket = TicketBuilder(self.ancho)
+        self.escribir(datos, ticket)
+        return ticket.datos()
+
+
+def _compilar(elementos, ancho):
+    segmentos = []
+    for elemento in elementos:
+        for segmento in elemento.compilar(ancho):
+            if isinstance(segmento, bytes) and segmentos and isinstance(segmentos[-1], bytes):
+                segmentos[-1] += segmento  # Une partes fijas vecinas
+            else:
+                segmentos.append(segmento)
+    return PlantillaCompilada(ancho, segmentos)
+
+
+class Plantilla:
+    """
+    Descripción de un ticket como lista de elementos (cabecera, renglones
+    clave/valor, tabla de artículos, totales, pie). Se compila una vez por
+    ancho de papel y la versión compilada se reutiliza en cada impresión:
+
+        PLANTILLA.generar({"folio": 12, ...}, papel="80mm") -> bytes ESC/POS
+    """
+
+    def __init__(self, nombre, *elementos):
+        self.nombre = nombre
+        self.elementos = elementos
+        self._compiladas = {}  # ancho -> PlantillaCompilada
+        self._candado = threading.Lock()
+
+    def compilada(self, papel=None):
+        ancho = PAPELES[papel or PAPEL_POR_DEFECTO]
+        compilada = self._compiladas.get(ancho)
+        if compilada is None:
+            with self._candado:
+                compilada = self._compiladas.get(ancho)
+                if compilada is None:
+                    compilada = _compilar(self.elementos, ancho)
+                    self._compiladas[ancho] = compilada
+        return compilada
+
+    def generar(self, datos, papel=None):
+        return self.compilada(papel).generar(datos)
@@ -1,386 +1,219 @@
-import win32print
 import datetime
 
-# --- CONFIGURACIÓN ---
-NOMBRE_IMPRESORA = "POS-58"
+# Los tickets se mandan a la cola de impresión (hilo aparte); el destino
+# (win32, red, USB, CUPS, archivo...) se configura en utils.impresoras
+from utils.cola_impresion import cola_impresion
+from utils.escpos import CABECERA_TIENDA
+from utils.plantillas_ticket import (
+    Plantilla, Texto, DosColumnas, Tabla, Titulos, Columna, Si, Crudo,
+    Centrar, Izquierda, Negrita, Doble, Saltos, Divisoria, Avance,
+)
+
+# --- PLANTILLAS ---
+# Cada ticket se describe una vez; se compila por ancho de papel (58/80 mm,
+# ver plantillas_ticket.PAPELES) la primera vez que se imprime.
+# Anchos de columna a 58 mm; la columna flexible crece en papel de 80 mm.
+
+COLUMNAS_VENTA = [Columna(4), Columna(19, separacion=1, flexible=True), Columna(9, ">")]
+COLUMNAS_VENDEDORES = [Columna(16, separacion=1, flexible=True), Columna(10, ">", formato=",.2f", prefijo=" $")]
+COLUMNAS_DETALLE = [Columna(4), Columna(15, prefijo=" ", separacion=1, flexible=True), Columna(4, ">"),
+                    Columna(6, ">", formato=",.0f", prefijo=" $")]
+COLUMNAS_INVENTARIO = [Columna(8, separacion=1), Columna(17, separacion=1, flexible=True), Columna(5, ">")]
+
+TICKET_VENTA = Plantilla(
+    "Ticket Venta",
+    # 1. CABECERA: título dinámico (Original o Copia) y datos de la tienda
+    Centrar(), Texto("{titulo}"), Saltos(),
+    Crudo(CABECERA_TIENDA),
+
+    # 2. DATOS VENTA
+    Izquierda(), Divisoria(),
+    Texto("Folio: {folio}"),
+    Texto("Fecha: {fecha}"),
+    Texto("Cliente: {cliente}"),
+    Si("telefono", Texto("Tel: {telefono}")),
+    Si("direccion", Texto("Dir: {direccion:.32}")),
+    Divisoria(),
+
+    # 3. PRODUCTOS: (cantidad, nombre, importe)
+    Negrita(), Titulos(COLUMNAS_VENTA, ("CANT", " DESCRIPCION", "IMPORTE")), Negrita(False),
+    Divisoria(),
+    Tabla("productos", COLUMNAS_VENTA),
+    Divisoria(),
+
+    # 4. TOTALES
+    Centrar(), Doble(), Negrita(),
+    Texto("TOTAL:"),
+    Texto("${total:,.2f}"),
+    Negrita(False), Doble(False),
+    Izquierda(), Saltos(),
+    DosColumnas("Pago:", "{metodo_pago}"),
+    Si("efectivo",
+       DosColumnas("Recibido:", "${recibio:,.2f}"),
+       DosColumnas("Cambio:", "${cambio:,.2f}")),
+    Saltos(),
+
+    # 5. PIE DE PAGINA
+    Centrar(),
+    Texto("Gracias por su preferencia"),
+    Texto("NOTA: LA GARANTIA CONSISTE EN LA CALIDAD DEL ORO, EN DESCOMPOSTURA NO HAY GARANTIA"),
+    Avance(),
+)
+
+TICKET_APARTADO = Plantilla(
+    "Ticket Apartado",
+    # 1. CABECERA
+    Centrar(), Texto("{titulo}"), Saltos(),
+    Doble(), Negrita(), Texto("JOYERIA\n3 HERMANOS"), Negrita(False), Doble(False),
+    Texto("PLAN DE APARTADO"), Saltos(),
+
+    # 2. DATOS
+    Izquierda(),
+    Texto("Folio Apartado: {folio}"),
+    Texto("Fecha: {fecha}"),
+    Texto("Cliente: {cliente:.22}"),
+    Divisoria(),
+
+    # 3. PRODUCTOS APARTADOS: "1 x Anillo Oro... $1500"
+    Negrita(), Texto("PRODUCTOS APARTADOS"), Negrita(False),
+    Tabla("productos", "{0} x {1:.15} ${2:,.0f}"),
+    Divisoria(),
+
+    # 4. ESTADO DE CUENTA (LO IMPORTANTE)
+    Centrar(), Negrita(),
+    Texto("VALOR TOTAL:  ", salto=False), Texto("${total:,.2f}"), Saltos(),
+    Texto("ABONO INICIAL: ", salto=False), Texto("${abono:,.2f}"),
+    Divisoria(),
+    Doble(),
+    Texto("RESTA:"),
+    Texto("${restante:,.2f}"),
+    Doble(False), Negrita(False),
+    Saltos(),
+
+    # 5. PIE
+    Texto("No hay devolucion en apartados"),
+    Avance(),
+)
+
+CORTE_CAJA = Plantilla(
+    "Corte Caja",
+    # Encabezado
+    Centrar(), Doble(), Negrita(), Texto("CORTE DE CAJA"), Doble(False), Negrita(False),
+    Texto("{fecha}"),
+    Divisoria(),
+
+    # 1. Resumen por Vendedor: (nombre, total)
+    Izquierda(), Negrita(), Texto("VENTAS POR VENDEDOR:"), Negrita(False),
+    Tabla("vendedores", COLUMNAS_VENDEDORES),
+    Divisoria(),
+
+    # 2. Total Global
+    Centrar(), Doble(),
+    Texto("TOTAL DIA:"),
+    Texto("${total:,.2f}"),
+    Doble(False), Divisoria(),
+
+    # 3. Detalle de Productos: (folio, nombre, cantidad, importe)
+    Izquierda(),
+    Texto("DETALLE PRODUCTOS:"),
+    Titulos(COLUMNAS_DETALLE, ("Folio", " Prod", "Cant", "Precio")),
+    Tabla("detalle", COLUMNAS_DETALLE),
+    Saltos(3), Avance(),
+)
+
+INVENTARIO = Plantilla(
+    "Inventario",
+    # Encabezado
+    Centrar(), Negrita(), Texto("INVENTARIO ACTUAL"), Negrita(False),
+    Texto("{fecha}"),
+    Divisoria(),
+
+    # Lista compacta: (clave, nombre, stock)
+    Izquierda(),
+    Titulos(COLUMNAS_INVENTARIO, ("CLAVE", "PRODUCTO", "STOCK")),
+    Tabla("productos", COLUMNAS_INVENTARIO),
+    Divisoria(),
+    Texto("Total Items: {total_items}"),
+    Saltos(3), Avance(),
+)
+
+
+# generar_*: arman el documento ESC/POS y regresan sus bytes (sin impresora).
+# imprimir_*: lo generan y lo encolan; regresan el TrabajoImpresion (su estado
+# se sigue con trabajo.al_terminar o cola_impresion.suscribir) o None si no se pudo encolar.
+# 'papel' ("58mm"/"80mm") es opcional; por defecto plantillas_ticket.PAPEL_POR_DEFECTO.
+
+def _enviar(datos, nombre_trabajo):
+    return cola_impresion.encolar(datos, nombre_trabajo)
+
+# --- GENERACIÓN ---
+
+def generar_ticket_venta(folio, fecha, productos, total, metodo_pago, recibio, cambio, cliente_nombre, cliente_numero, cliente_direccion, titulo_ticket="*** ORIGINAL CLIENTE ***", papel=None):
+    return TICKET_VENTA.generar({
+        "titulo": titulo_ticket,
+        "folio": folio,
+        "fecha": fecha,
+        "cliente": cliente_nombre[:22] if cliente_nombre else "Publico General",
+        "telefono": cliente_numero,
+        "direccion": cliente_direccion,
+        # productos: [(producto_tuple, precio_unitario, cantidad)]
+        "productos": [(cantidad, prod[2], f"${precio * cantidad:,.0f}") for prod, precio, cantidad in productos],
+        "total": total,
+        "metodo_pago": metodo_pago,
+        "efectivo": "Efectivo" in metodo_pago,
+        "recibio": recibio,
+        "cambio": cambio,
+    }, papel)
+
+def generar_ticket_apartado(folio, fecha, productos, total, abono_inicial, restante, cliente_nombre, titulo_ticket="*** TICKET APARTADO ***", papel=None):
+    return TICKET_APARTADO.generar({
+        "titulo": titulo_ticket,
+        "folio": folio,
+        "fecha": fecha,
+        "cliente": cliente_nombre,
+        # Una línea por producto del carrito: (prod, precio_unitario, cantidad)
+        "productos": [(cantidad, prod[2], precio * cantidad) for prod, precio, cantidad in productos],
+        "total": total,
+        "abono": abono_inicial,
+        "restante": restante,
+    }, papel)
+
+def generar_corte_caja(ventas_empleado, total_dia, detalle_productos, papel=None):
+    """
+    Reporte de cierre de día.
+    """
+    return CORTE_CAJA.generar({
+        "fecha": datetime.datetime.now().strftime("%d/%m/%Y %H:%M"),
+        "vendedores": ventas_empleado,
+        "total": total_dia,
+        # item: (Folio, Clave, Nombre, Peso, ImporteLinea, Vendedor, Cantidad)
+        "detalle": [(item[0], item[2], item[6] if len(item) > 6 else 1, item[4]) for item in detalle_productos],
+    }, papel)
+
+def generar_inventario(lista_productos, papel=None):
+    """
+    Lista simple de inventario.
+    lista_productos: [(id, clave, nombre, peso, kilataje, cat, stock)]
+    """
+    return INVENTARIO.generar({
+        "fecha": datetime.datetime.now().strftime("%d/%m/%Y"),
+        "productos": [(p[1], p[2], p[6] if len(p) > 6 else 1) for p in lista_productos],
+        "total_items": len(lista_productos),
+    }, papel)
+
+# --- IMPRESIÓN ---
 
 def imprimir_ticket_venta(folio, fecha, productos, total, metodo_pago, recibio, cambio, cliente_nombre, cliente_numero, cliente_direccion, titulo_ticket="*** ORIGINAL CLIENTE ***"):
-    
-    # --- COMANDOS ESC/POS ---
-    INIT = b'\x1b@'
-    ALIGN_CENTER = b'\x1ba\x01'
-    ALIGN_LEFT = b'\x1ba\x00'
-    BOLD_ON = b'\x1bE\x01'
-    BOLD_OFF = b'\x1bE\x00'
-    FEED_N = b'\x1bd\x04' 
-    
-    SIZE_2X = b'\x1d!\x11'
-    SIZE_NORMAL = b'\x1d!\x00'
-    
-    ANCHO_NORMAL = 32
-    
-    # --- HELPER: Codificación ---
-    def trans(txt):
-        try:
-            return str(txt).encode('cp437', errors='replace')
-        except:
-            return str(txt).encode('utf-8', errors='ignore')
-
-    def texto_dos_cols(izq, der):
-        str_izq = str(izq)[:20]
-        str_der = str(der)[:10]
-        espacios = ANCHO_NORMAL - len(str_izq) - len(str_der)
-        if espacios < 0: espacios = 0
-        linea = str_izq + (" " * espacios) + str_der + "\n"
-        return trans(linea)
-
-    def linea_divisoria():
-        return b"-" * ANCHO_NORMAL + b"\n"
-
-    # --- LÓGICA DE AGRUPACIÓN ---
-    items_agrupados = {}
-    for prod, precio in productos:
-        p_id = prod[0]
-        nombre = prod[2]
-        if p_id in items_agrupados:
-            items_agrupados[p_id]['cantidad'] += 1
-            items_agrupados[p_id]['total_linea'] += precio
-        else:
-            items_agrupados[p_id] = {'nombre': nombre, 'cantidad': 1, 'total_linea': precio}
-
-    # --- IMPRESIÓN ---
-    try:
-        hPrinter = win32print.OpenPrinter(NOMBRE_IMPRESORA)
-        try:
-            hJob = win32print.StartDocPrinter(hPrinter, 1, ("Ticket Venta", None, "RAW"))
-            try:
-                win32print.StartPagePrinter(hPrinter)
-                
-                # 1. CABECERA
-                win32print.WritePrinter(hPrinter, INIT)
-                win32print.WritePrinter(hPrinter, ALIGN_CENTER)
-                
-                # TITULO DINÁMICO (Original o Copia)
-                win32print.WritePrinter(hPrinter, trans(f"{titulo_ticket}\n"))
-                win32print.WritePrinter(hPrinter, b"\n")
-                
-                # Nombre Tienda
-                win32print.WritePrinter(hPrinter, SIZE_2X)
-                win32print.WritePrinter(hPrinter, BOLD_ON)
-                win32print.WritePrinter(hPrinter, trans("JOYERIA\n")) 
-                win32print.WritePrinter(hPrinter, trans("3 HERMANOS\n"))
-                win32print.WritePrinter(hPrinter, BOLD_OFF)
-                win32print.WritePrinter(hPrinter, SIZE_NORMAL) 
-                
-                win32print.WritePrinter(hPrinter, trans("R.F.C DEPN850420N18\n"))
-                win32print.WritePrinter(hPrinter, trans("PLAZA DE LA MUJER LOCAL 118\n"))
-                win32print.WritePrinter(hPrinter, trans("443-312-64-14 COL. CENTRO\n"))
-                win32print.WritePrinter(hPrinter, trans("C.P. 52800 MORELIA, MICH.\n\n"))
-                
-                win32print.WritePrinter(hPrinter, BOLD_ON)
-                win32print.WritePrinter(hPrinter, trans("Extenso surtido en alhajas de oro de 10 y 14 kilates\n"))
-                win32print.WritePrinter(hPrinter, BOLD_OFF)
-
-                # 2. DATOS VENTA
-                win32print.WritePrinter(hPrinter, ALIGN_LEFT)
-                win32print.WritePrinter(hPrinter, linea_divisoria())
-                win32print.WritePrinter(hPrinter, trans(f"Folio: {folio}\n"))
-                win32print.WritePrinter(hPrinter, trans(f"Fecha: {fecha}\n"))
-                
-                cliente_str = cliente_nombre[:22] if cliente_nombre else "Publico General"
-                win32print.WritePrinter(hPrinter, trans(f"Cliente: {cliente_str}\n"))
-                
-                if cliente_numero:
-                    win32print.WritePrinter(hPrinter, trans(f"Tel: {cliente_numero}\n"))
-                if cliente_direccion:
-                    dir_str = cliente_direccion[:32]
-                    win32print.WritePrinter(hPrinter, trans(f"Dir: {dir_str}\n"))
-
-                win32print.WritePrinter(hPrinter, linea_divisoria())
-                
-                # 3. PRODUCTOS
-                win32print.WritePrinter(hPrinter, BOLD_ON)
-                win32print.WritePrinter(hPrinter, trans("CANT DESCRIPCION       IMPORTE\n"))
-                win32print.WritePrinter(hPrinter, BOLD_OFF)
-                win32print.WritePrinter(hPrinter, linea_divisoria())
-                
-                for item in items_agrupados.values():
-                    cant = item['cantidad']
-                    nombre = item['nombre']
-                    importe = item['total_linea']
-                    
-                    str_cant = f"{cant}".ljust(4)
-                    str_nombre = f"{nombre[:18]}".ljust(19)
-                    str_importe = f"${importe:,.0f}"
-                    
-                    linea_final = f"{str_cant}{str_nombre}"
-                    espacio = ANCHO_NORMAL - len(linea_final) - len(str_importe)
-                    if espacio > 0:
-                        linea_final += (" " * espacio) + str_importe + "\n"
-                    else:
-                        linea_final = f"{str_cant}{nombre[:15]:<16}{str_importe:>6}\n"
-
-                    win32print.WritePrinter(hPrinter, trans(linea_final))
-                
-                win32print.WritePrinter(hPrinter, linea_divisoria())
-                
-                # 4. TOTALES
-                win32print.WritePrinter(hPrinter, ALIGN_CENTER)
-                win32print.WritePrinter(hPrinter, SIZE_2X)
-                win32print.WritePrinter(hPrinter, BOLD_ON)
-                win32print.WritePrinter(hPrinter, trans("TOTAL:\n"))
-                win32print.WritePrinter(hPrinter, trans(f"${total:,.2f}\n"))
-                win32print.WritePrinter(hPrinter, BOLD_OFF)
-                win32print.WritePrinter(hPrinter, SIZE_NORMAL)
-                
-                win32print.WritePrinter(hPrinter, ALIGN_LEFT)
-                win32print.WritePrinter(hPrinter, b"\n")
-                win32print.WritePrinter(hPrinter, texto_dos_cols("Pago:", metodo_pago))
-                
-                if "Efectivo" in metodo_pago:
-                    win32print.WritePrinter(hPrinter, texto_dos_cols("Recibido:", f"${recibio:,.2f}"))
-                    win32print.WritePrinter(hPrinter, texto_dos_cols("Cambio:", f"${cambio:,.2f}"))
-                
-                win32print.WritePrinter(hPrinter, b"\n")
-                
-                # 5. PIE DE PAGINA
-                win32print.WritePrinter(hPrinter, ALIGN_CENTER)
-                win32print.WritePrinter(hPrinter, trans("Gracias por su preferencia\n"))
-                win32print.WritePrinter(hPrinter, trans("NOTA: LA GARANTIA CONSISTE EN LA CALIDAD DEL ORO, EN DESCOMPOSTURA NO HAY GARANTIA\n"))
-                
-                win32print.WritePrinter(hPrinter, FEED_N)
-                
-                win32print.EndPagePrinter(hPrinter)
-            finally:
-                win32print.EndDocPrinter(hPrinter)
-        finally:
-            win32print.ClosePrinter(hPrinter)
-            return True
-            
-    except Exception as e:
-        print(f"Error imprimiendo: {e}")
-        return False
-    
+    datos = generar_ticket_venta(folio, fecha, productos, total, metodo_pago, recibio, cambio,
+                                 cliente_nombre, cliente_numero, cliente_direccion, titulo_ticket)
+    return _enviar(datos, "Ticket Venta")
+
 def imprimir_ticket_apartado(folio, fecha, productos, total, abono_inicial, restante, cliente_nombre, titulo_ticket="*** TICKET APARTADO ***"):
-        # --- COMANDOS ESC/POS ---
-    INIT = b'\x1b@'
-    ALIGN_CENTER = b'\x1ba\x01'
-    ALIGN_LEFT = b'\x1ba\x00'
-    BOLD_ON = b'\x1bE\x01'
-    BOLD_OFF = b'\x1bE\x00'
-    FEED_N = b'\x1bd\x04' 
-    
-    SIZE_2X = b'\x1d!\x11'
-    SIZE_NORMAL = b'\x1d!\x00'
-    
-    ANCHO_NORMAL = 32
-
-    def trans(txt):
-        try:
-            return str(txt).encode('cp437', errors='replace')
-        except:
-            return str(txt).encode('utf-8', errors='ignore')
-
-    def linea_divisoria():
-        return b"-" * ANCHO_NORMAL + b"\n"
-
-    try:
-        hPrinter = win32print.OpenPrinter(NOMBRE_IMPRESORA)
-        try:
-            hJob = win32print.StartDocPrinter(hPrinter, 1, ("Ticket Apartado", None, "RAW"))
-            try:
-                win32print.StartPagePrinter(hPrinter)
-                
-                # 1. CABECERA
-                win32print.WritePrinter(hPrinter, INIT)
-                win32print.WritePrinter(hPrinter, ALIGN_CENTER)
-                win32print.WritePrinter(hPrinter, trans(f"{titulo_ticket}\n\n"))
-                
-                win32print.WritePrinter(hPrinter, SIZE_2X)
-                win32print.WritePrinter(hPrinter, BOLD_ON)
-                win32print.WritePrinter(hPrinter, trans("JOYERIA\n3 HERMANOS\n"))
-                win32print.WritePrinter(hPrinter, BOLD_OFF)
-                win32print.WritePrinter(hPrinter, SIZE_NORMAL)
-                
-                win32print.WritePrinter(hPrinter, trans("PLAN DE APARTADO\n\n"))
-
-                # 2. DATOS
-                win32print.WritePrinter(hPrinter, ALIGN_LEFT)
-                win32print.WritePrinter(hPrinter, trans(f"Folio Apartado: {folio}\n"))
-                win32print.WritePrinter(hPrinter, trans(f"Fecha: {fecha}\n"))
-                win32print.WritePrinter(hPrinter, trans(f"Cliente: {cliente_nombre[:22]}\n"))
-                win32print.WritePrinter(hPrinter, linea_divisoria())
-
-                # 3. PRODUCTOS APARTADOS
-                win32print.WritePrinter(hPrinter, BOLD_ON)
-                win32print.WritePrinter(hPrinter, trans("PRODUCTOS APARTADOS\n"))
-                win32print.WritePrinter(hPrinter, BOLD_OFF)
-                
-                # Agrupar productos (Misma lógica que venta)
-                items = {}
-                for prod, precio in productos:
-                    pid = prod[0]
-                    if pid in items: 
-                        items[pid]['cant'] += 1
-                        items[pid]['total'] += precio
-                    else: 
-                        items[pid] = {'nom': prod[2], 'cant': 1, 'total': precio}
-
-                for i in items.values():
-                    # Formato simple: "1 x Anillo Oro... $1500"
-                    linea = f"{i['cant']} x {i['nom'][:15]} ${i['total']:,.0f}\n"
-                    win32print.WritePrinter(hPrinter, trans(linea))
-
-                win32print.WritePrinter(hPrinter, linea_divisoria())
-
-                # 4. ESTADO DE CUENTA (LO IMPORTANTE)
-                win32print.WritePrinter(hPrinter, ALIGN_CENTER)
-                win32print.WritePrinter(hPrinter, BOLD_ON)
-                win32print.WritePrinter(hPrinter, trans("VALOR TOTAL:  "))
-                win32print.WritePrinter(hPrinter, trans(f"${total:,.2f}\n"))
-                win32print.WritePrinter(hPrinter, b"\n")
-                
-                win32print.WritePrinter(hPrinter, trans("ABONO INICIAL: "))
-                win32print.WritePrinter(hPrinter, trans(f"${abono_inicial:,.2f}\n"))
-                win32print.WritePrinter(hPrinter, linea_divisoria())
-                
-                win32print.WritePrinter(hPrinter, SIZE_2X)
-                win32print.WritePrinter(hPrinter, trans("RESTA:\n"))
-                win32print.WritePrinter(hPrinter, trans(f"${restante:,.2f}\n"))
-                win32print.WritePrinter(hPrinter, SIZE_NORMAL)
-                win32print.WritePrinter(hPrinter, BOLD_OFF)
-                
-                win32print.WritePrinter(hPrinter, b"\n")
-                
-                # 5. PIE
-                win32print.WritePrinter(hPrinter, trans("No hay devolucion en apartados\n"))
-                win32print.WritePrinter(hPrinter, FEED_N)
-
-                win32print.EndPagePrinter(hPrinter)
-            finally:
-                win32print.EndDocPrinter(hPrinter)
-        finally:
-            win32print.ClosePrinter(hPrinter)
-            return True
-    except Exception:
-        return False
-    
+    datos = generar_ticket_apartado(folio, fecha, productos, total, abono_inicial, restante, cliente_nombre, titulo_ticket)
+    return _enviar(datos, "Ticket Apartado")
+
 def imprimir_corte_caja(ventas_empleado, total_dia, detalle_productos):
-    """
-    Imprime el reporte de cierre de día.
-    """
-    try:
-        hPrinter = win32print.OpenPrinter(NOMBRE_IMPRESORA)
-        try:
-            hJob = win32print.StartDocPrinter(hPrinter, 1, ("Corte Caja", None, "RAW"))
-            try:
-                win32print.StartPagePrinter(hPrinter)
-                
-                # Encabezado
-                win32print.WritePrinter(hPrinter, b'\x1b@') # Init
-                win32print.WritePrinter(hPrinter, b'\x1ba\x01') # Center
-                win32print.WritePrinter(hPrinter, b'\x1d!\x11') # Doble tamaño
-                win32print.WritePrinter(hPrinter, b'\x1bE\x01') # Bold ON
-                win32print.WritePrinter(hPrinter, b"CORTE DE CAJA\n")
-                win32print.WritePrinter(hPrinter, b'\x1d!\x00') # Normal
-                win32print.WritePrinter(hPrinter, b'\x1bE\x00') # Bold OFF
-                
-                fecha = datetime.datetime.now().strftime("%d/%m/%Y %H:%M")
-                win32print.WritePrinter(hPrinter, f"{fecha}\n".encode('cp437'))
-                win32print.WritePrinter(hPrinter, b"-"*32 + b"\n")
-                
-                # 1. Resumen por Vendedor
-                win32print.WritePrinter(hPrinter, b'\x1ba\x00') # Left
-                win32print.WritePrinter(hPrinter, b'\x1bE\x01') # Bold
-                win32print.WritePrinter(hPrinter, b"VENTAS POR VENDEDOR:\n")
-                win32print.WritePrinter(hPrinter, b'\x1bE\x00')
-                
-                for emp, tot in ventas_empleado:
-                    linea = f"{emp[:15]:<16} ${tot:>10,.2f}\n"
-                    win32print.WritePrinter(hPrinter, linea.encode('cp437'))
-                
-                win32print.WritePrinter(hPrinter, b"-"*32 + b"\n")
-                
-                # 2. Total Global
-                win32print.WritePrinter(hPrinter, b'\x1ba\x01') # Center
-                win32print.WritePrinter(hPrinter, b'\x1d!\x11') # Doble
-                win32print.WritePrinter(hPrinter, b"TOTAL DIA:\n")
-                win32print.WritePrinter(hPrinter, f"${total_dia:,.2f}\n".encode('cp437'))
-                win32print.WritePrinter(hPrinter, b'\x1d!\x00') # Normal
-                win32print.WritePrinter(hPrinter, b"-"*32 + b"\n")
-                
-                # 3. Detalle de Productos
-                win32print.WritePrinter(hPrinter, b'\x1ba\x00') # Left
-                win32print.WritePrinter(hPrinter, b"DETALLE PRODUCTOS:\n")
-                win32print.WritePrinter(hPrinter, b"Folio Prod             Precio\n")
-                
-                for item in detalle_productos:
-                    # item: (Folio, Clave, Nombre, Peso, Precio, Vendedor)
-                    folio = str(item[0])
-                    nombre = item[2][:15] # Truncar nombre
-                    precio = item[4]
-                    
-                    linea = f"{folio:<4} {nombre:<16} ${precio:>6,.0f}\n"
-                    win32print.WritePrinter(hPrinter, linea.encode('cp437'))
-                
-                win32print.WritePrinter(hPrinter, b"\n\n\n")
-                win32print.WritePrinter(hPrinter, b'\x1bd\x04') # Feed 4 lineas
-
-                win32print.EndPagePrinter(hPrinter)
-            finally:
-                win32print.EndDocPrinter(hPrinter)
-        finally:
-            win32print.ClosePrinter(hPrinter)
-            return True
-    except Exception as e:
-        print(e)
-        return False
+    return _enviar(generar_corte_caja(ventas_empleado, total_dia, detalle_productos), "Corte Caja")
 
 def imprimir_inventario(lista_productos):
-    """
-    Imprime lista simple de inventario.
-    lista_productos: [(id, clave, nombre, peso, kilataje, cat, stock)]
-    """
-    try:
-        hPrinter = win32print.OpenPrinter(NOMBRE_IMPRESORA)
-        try:
-            hJob = win32print.StartDocPrinter(hPrinter, 1, ("Inventario", None, "RAW"))
-            try:
-                win32print.StartPagePrinter(hPrinter)
-                
-                # Encabezado
-                win32print.WritePrinter(hPrinter, b'\x1b@')
-                win32print.WritePrinter(hPrinter, b'\x1ba\x01') # Center
-                win32print.WritePrinter(hPrinter, b'\x1bE\x01')
-                win32print.WritePrinter(hPrinter, b"INVENTARIO ACTUAL\n")
-                win32print.WritePrinter(hPrinter, b'\x1bE\x00')
-                win32print.WritePrinter(hPrinter, datetime.datetime.now().strftime("%d/%m/%Y").encode('cp437') + b"\n")
-                win32print.WritePrinter(hPrinter, b"-"*32 + b"\n")
-                
-                # Lista compacta
-                win32print.WritePrinter(hPrinter, b'\x1ba\x00') # Left
-                # Formato: Clave | Nombre | Stock
-                win32print.WritePrinter(hPrinter, b"CLAVE   PRODUCTO         STOCK\n")
-                
-                for p in lista_productos:
-                    # p: (id, clave, nombre, peso, kilataje, cat, stock)
-                    clave = str(p[1])[:7]
-                    nombre = str(p[2])[:16]
-                    stock = str(p[6]) if len(p) > 6 else "1"
-                    
-                    linea = f"{clave:<7} {nombre:<16} {stock:>5}\n"
-                    win32print.WritePrinter(hPrinter, linea.encode('cp437'))
-                
-                win32print.WritePrinter(hPrinter, b"-"*32 + b"\n")
-                win32print.WritePrinter(hPrinter, f"Total Items: {len(lista_productos)}\n".encode('cp437'))
-                win32print.WritePrinter(hPrinter, b"\n\n\n")
-                win32print.WritePrinter(hPrinter, b'\x1bd\x04')
-
-                win32print.EndPagePrinter(hPrinter)
-            finally:
-                win32print.EndDocPrinter(hPrinter)
-        finally:
-            win32print.ClosePrinter(hPrinter)
-            return True
-    except Exception:
-        return False
\ No newline at end of file
+    return _enviar(generar_inventario(lista_productos), "Inventario")
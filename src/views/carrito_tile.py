@@ -0,0 +1,90 @@
+import flet as ft
+
+
+class CarritoTile(ft.Container):
+    """
+    Tile de la sidebar (Carrito Editable): inputs de cantidad y precio (Lógica Cod 2)
+    con estética similar al Código 1.
+    Se crea una vez por línea del carrito; los cambios posteriores solo parchan
+    el input afectado en lugar de reconstruir la sidebar.
+    """
+
+    def __init__(self, linea, on_cantidad, on_precio, on_quitar):
+        super().__init__(
+            padding=ft.padding.symmetric(vertical=5, horizontal=5),
+            border=ft.border.only(bottom=ft.border.BorderSide(1, ft.Colors.GREY_300)),
+        )
+        producto = linea.producto
+        id_producto = linea.id
+
+        # Input de Cantidad (Lógica Cod 2)
+        self.txt_cantidad = ft.TextField(
+            value=str(linea.cantidad),
+            width=50,
+            height=30,
+            text_size=13,
+            content_padding=5,
+            keyboard_type=ft.KeyboardType.NUMBER,
+            text_align=ft.TextAlign.CENTER,
+            dense=True,
+            # Estilo minimalista para que encaje
+            border_color=ft.Colors.GREY_400,
+            on_change=lambda e: on_cantidad(id_producto, e.control.value)
+        )
+
+        # Input de Precio (Lógica Cod 2 - Editable)
+        self.txt_precio = ft.TextField(
+            value=f"{linea.precio:.2f}",
+            prefix_text="$",
+            width=90,
+            height=30,
+            text_size=13,
+            content_padding=5,
+            keyboard_type=ft.KeyboardType.NUMBER,
+            text_align=ft.TextAlign.RIGHT,
+            dense=True,
+            border_color=ft.Colors.GREY_400,
+            on_change=lambda e: on_precio(id_producto, e.control.value)
+        )
+
+        self.content = ft.Column([
+            # Fila Superior: Nombre y Botón Eliminar
+            ft.Row([
+                ft.Text(
+                    f"{producto[2]}",
+                    weight=ft.FontWeight.BOLD,
+                    size=13,
+                    max_lines=2,
+                    overflow=ft.TextOverflow.ELLIPSIS,
+                    expand=True
+                ),
+                ft.IconButton(
+                    icon=ft.Icons.DELETE_OUTLINE,
+                    icon_color=ft.Colors.RED_400,
+                    icon_size=20,
+                    tooltip="Quitar del carrito",
+                    on_click=lambda e: on_quitar(id_producto)
+                )
+            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+
+            # Fila Inferior: Detalles y Controles de Edición
+            ft.Row([
+                ft.Text(f"Cod: {producto[1]}", size=10, color=ft.Colors.GREY_500),
+                ft.Container(expand=True),  # Espaciador
+                ft.Text("Cant:", size=11, color="grey"),
+                self.txt_cantidad,
+                ft.Container(width=5),
+                self.txt_precio
+            ], vertical_alignment=ft.CrossAxisAlignment.CENTER)
+        ])
+
+    def actualizar_cantidad(self, cantidad):
+        """
+        Parcha solo el input de cantidad. Si ya muestra ese valor (el usuario
+        lo acaba de teclear) no se toca, para no mover el cursor.
+        """
+        if self.txt_cantidad.value == str(cantidad):
+            return
+        self.txt_cantidad.value = str(cantidad)
+        if self.txt_cantidad.page:
+            self.txt_cantidad.update()
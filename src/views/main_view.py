@@ -2,8 +2,22 @@ import flet as ft
 from modals.modal_crud_producto import show_modal_editar_producto
 from modals.modal_corte import show_modal_corte
 from modals.modal_pago import show_modal_pago
-from database.manager import obtener_productos, obtener_precios_oro, actualizar_precio_oro
+from views.producto_tile import ProductoTile
+from views.carrito_tile import CarritoTile
+from utils.busqueda import BusquedaDiferida
+from utils.carrito import Carrito
+from database.conexion import cerrar_conexion
+from database.manager import obtener_productos, obtener_productos_pagina, buscar_productos, actualizar_precios_kilates, obtener_precios_vigentes, suscribir_precios
 import logging
+import threading
+
+# Productos por página de la lista principal y distancia (px) al final
+# a la que se pide la siguiente página
+TAMANO_PAGINA = 40
+MARGEN_SCROLL = 300
+
+# Segundos sin teclear antes de lanzar la búsqueda
+RETARDO_BUSQUEDA = 0.25
 
 class MainView(ft.View):
     def __init__(self, page: ft.Page):
@@ -14,15 +28,35 @@ class MainView(ft.View):
         self.page = page
         
         # Variables de estado
-        self.txt_oro_10k = None
-        self.txt_oro_14k = None
-        self.txt_italiano = None
+        self._txt_precios = {}  # kilate_id -> TextField con su precio por gramo
         self.lista = None
         self.filter_text = None
+
+        # Estado de la lista paginada
+        self._texto_busqueda = ""
+        self._criterio_orden = "nombre"
+        self._cursor_pagina = None   # after_key (catálogo) u offset (búsqueda)
+        self._hay_mas = False
+        self._candado_pagina = threading.Lock()
+        self._tiles = {}  # id producto -> ProductoTile (reconciliación por llave)
+
+        # Buscador con debounce: las consultas corren en un solo hilo propio
+        # (con su conexión); el resultado se aplica bajo _candado_pagina
+        self._busqueda = BusquedaDiferida(
+            self._buscar_en_segundo_plano,
+            self._aplicar_busqueda,
+            retardo=RETARDO_BUSQUEDA,
+            al_terminar=cerrar_conexion
+        )
         
-        # --- LÓGICA CÓDIGO 2: Estructura de carrito basada en lista de diccionarios ---
-        # [{'product': db_tuple, 'price': float, 'qty': int}, ...]
-        self.carrito = [] 
+        # Carrito indexado por id de producto; la vista solo reacciona a sus eventos
+        self.carrito = Carrito()
+        self.carrito.suscribir(self._on_carrito_cambio)
+        self._tiles_carrito = {}  # id producto -> CarritoTile
+
+        # Foto versionada de precios por gramo; otra sesión que cambie precios nos avisa
+        self._precios = obtener_precios_vigentes()
+        suscribir_precios(self._on_precios_cambio)
         
         self.sidebar_content = ft.Column(
             controls=[],
@@ -52,50 +86,64 @@ class MainView(ft.View):
         
         self._construir_interfaz()
 
-        self._reconstruir_sidebar_visual()
+        # La cabecera se crea una sola vez; los tiles del carrito se agregan/quitan uno a uno
+        self.sidebar_content.controls = [self._crear_cabecera_carrito()]
         self.actualizar_lista_productos()
 
     # --- LÓGICA DE PRECIOS (Código 2) ---
 
-    def _obtener_precio_gramo(self, kilataje):
-        precio = 0.0
-        kilataje_str = str(kilataje).lower()
-        try:
-            if "10k" in kilataje_str:
-                precio = float(self.txt_oro_10k.value)
-            elif "14k" in kilataje_str:
-                precio = float(self.txt_oro_14k.value)
-            elif "ita" in kilataje_str:
-                precio = float(self.txt_italiano.value)
-        except (ValueError, TypeError):
-            precio = 0.0
-        return precio
-    
     def _calcular_precio_numerico(self, producto):
-        """Calcula el precio sugerido basado en peso * cotización"""
-        try:
-            peso = float(producto[3]) 
-            kilataje = producto[4]
-            precio_gramo = self._obtener_precio_gramo(kilataje)
-            return peso * precio_gramo
-        except (ValueError, TypeError):
-            return 0.0
+        """Calcula el precio sugerido basado en peso * cotización (foto de precios vigente)"""
+        return self._precios.precio(producto)
+
+    def _on_precios_cambio(self, precios):
+        """
+        Nueva versión de precios (de esta u otra sesión). Llega en el hilo de
+        quien detectó el cambio, que puede ser otra sesión: aquí solo se guarda
+        la foto y el repintado se agenda en el hilo de esta página.
+        """
+        self._precios = precios
+        if self.page is not None:
+            self.page.run_thread(self._repintar_precios)
+
+    def _repintar_precios(self):
+        """
+        Se recalculan todos los productos cargados en una pasada agrupada por
+        kilataje y solo se parchan las etiquetas de precio que cambiaron, con la
+        foto más reciente (si llegaron dos cambios seguidos, ambos repintan la
+        última). El carrito conserva sus precios.
+        """
+        precios = self._precios
+
+        for kilate_id, _, _, valor, _, _ in precios.kilates:
+            txt = self._txt_precios.get(kilate_id)
+            if txt is None:
+                continue  # Kilate dado de alta después de abrir la vista
+            try:
+                igual = float(txt.value) == valor
+            except (ValueError, TypeError):
+                igual = False
+            if not igual:
+                txt.value = str(valor)
+                if txt.page:
+                    txt.update()
+
+        with self._candado_pagina:  # La lista puede estar recargándose en el hilo del buscador
+            tiles = list(self._tiles.items())
+            nuevos = precios.precios([t.producto for _, t in tiles])
+            for id_producto, tile in tiles:
+                tile.actualizar_precio(f"${nuevos[id_producto]:,.2f}")
 
     # --- TILES VISUALES (Lista Principal) ---
     # Mantiene el diseño del Codigo 1, pero usa la lógica de stock del Codigo 2
 
-    def _crear_producto_tile(self, producto, on_agregar):
+    def _datos_tile(self, producto):
+        """Valores visibles de un tile; se comparan para saber si hay que parcharlo"""
         # Indices: [0]id, [1]key, [2]name, [3]weight, [4]karat, [5]category, [6]qty
         cantidad_stock = producto[6] if len(producto) > 6 else 1
         
         # --- LÓGICA CÓDIGO 2: Calcular stock visual disponible ---
-        en_carrito = 0
-        for item in self.carrito:
-            if item['product'][0] == producto[0]: # Comparar por ID
-                en_carrito = item['qty']
-                break
-        
-        disponible_visual = cantidad_stock - en_carrito
+        disponible_visual = cantidad_stock - self.carrito.reservado(producto[0])
 
         nombre = producto[2]
         peso_str = producto[3]
@@ -104,9 +152,6 @@ class MainView(ft.View):
         clave = producto[1]
         
         # Etiquetas de stock (Diseño Código 1)
-        texto_stock = ""
-        color_stock = ft.Colors.BLACK
-        
         if cantidad_stock > 1:
             texto_stock = f"Stock: {disponible_visual}" # Muestra el disponible real
             color_stock = ft.Colors.BLUE_GREY
@@ -116,71 +161,27 @@ class MainView(ft.View):
         
         precio_num = self._calcular_precio_numerico(producto)
         texto_precio = f"${precio_num:,.2f}"
-        
-        return ft.Container(
-            padding=ft.padding.all(10),
-            content=ft.Column(
-                spacing=0,
-                controls=[
-                    ft.Row(
-                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                        vertical_alignment=ft.CrossAxisAlignment.START,
-                        controls=[
-                            # --- COLUMNA IZQUIERDA (Info) ---
-                            ft.Column(
-                                spacing=2,
-                                expand=True,
-                                controls=[
-                                    ft.Text(
-                                        f"{nombre} | {peso_str} gr. | {kilataje}", 
-                                        weight=ft.FontWeight.BOLD, 
-                                        color='Black', 
-                                        size=20 
-                                    ),
-                                    ft.Text(
-                                        f"Categoría: {categoria} - Clave: {clave}", 
-                                        size=15, 
-                                        selectable=True,
-                                        color=ft.Colors.GREY_700
-                                    ),
-                                    ft.Text(
-                                        texto_stock, 
-                                        size=12, 
-                                        weight=ft.FontWeight.BOLD, 
-                                        color=color_stock
-                                    )
-                                ]
-                            ),
-                            
-                            # --- COLUMNA DERECHA (Precio y Botón) ---
-                            ft.Column(
-                                horizontal_alignment=ft.CrossAxisAlignment.END,
-                                spacing=5,
-                                controls=[
-                                    ft.Text(
-                                        f"Precio: {texto_precio}", 
-                                        size=15, 
-                                        weight=ft.FontWeight.BOLD
-                                    ),
-                                    ft.ElevatedButton(
-                                        "Agregar",
-                                        color='Black',
-                                        bgcolor='#C39D88',
-                                        style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=7)),
-                                        height=35,
-                                        # Lógica Código 2: Pasamos el producto entero
-                                        on_click=lambda e: on_agregar(producto)
-                                    )
-                                ]
-                            )
-                        ]
-                    ),
-                    ft.Container(height=10),
-                    ft.Divider(height=1, color=ft.Colors.GREY_300)
-                ]
-            )
+
+        return (
+            f"{nombre} | {peso_str} gr. | {kilataje}",
+            f"Categoría: {categoria} - Clave: {clave}",
+            texto_stock,
+            color_stock,
+            texto_precio,
+            disponible_visual > 0  # Filtro de Disponibilidad: sin stock visual se oculta
         )
 
+    def _tile_producto(self, producto):
+        """Reutiliza el tile del producto (parchando solo lo que cambió) o lo crea"""
+        datos = self._datos_tile(producto)
+        tile = self._tiles.get(producto[0])
+        if tile is None:
+            tile = ProductoTile(producto, datos, on_agregar=self._agregar_a_sidebar)
+            self._tiles[producto[0]] = tile
+        else:
+            tile.actualizar(producto, datos)
+        return tile
+
     # --- TILES VISUALES (Sidebar / Carrito Editable) ---
     # Lógica del Código 2 (Inputs editables) con Estética similar al Código 1
 
@@ -219,117 +220,74 @@ class MainView(ft.View):
         # Abrimos el modal pasándole nuestro callback especial
         show_modal_editar_producto(self.page, al_guardar_producto)
 
-    def _crear_sidebar_tile(self, item_carrito):
-        """
-        item_carrito es dict: {'product': p, 'price': float, 'qty': int}
-        Creamos inputs para editar precio y cantidad (Lógica Cod 2)
-        """
-        producto = item_carrito['product']
-        max_stock = producto[6] if len(producto) > 6 else 1
-
-        # Input de Cantidad (Lógica Cod 2)
-        txt_cantidad = ft.TextField(
-            value=str(item_carrito['qty']),
-            width=50,
-            height=30,
-            text_size=13,
-            content_padding=5,
-            keyboard_type=ft.KeyboardType.NUMBER,
-            text_align=ft.TextAlign.CENTER,
-            dense=True,
-            # Estilo minimalista para que encaje
-            border_color=ft.Colors.GREY_400,
-            on_change=lambda e: self._actualizar_cantidad_item(item_carrito, e.control.value, max_stock)
-        )
-
-        # Input de Precio (Lógica Cod 2 - Editable)
-        txt_precio = ft.TextField(
-            value=f"{item_carrito['price']:.2f}",
-            prefix_text="$",
-            width=90,
-            height=30,
-            text_size=13,
-            content_padding=5,
-            keyboard_type=ft.KeyboardType.NUMBER,
-            text_align=ft.TextAlign.RIGHT,
-            dense=True,
-            border_color=ft.Colors.GREY_400,
-            on_change=lambda e: self._actualizar_precio_item(item_carrito, e.control.value)
-        )
-
-        # Contenedor visual (Diseño Cod 1)
-        tile_en_sidebar = ft.Container(
-            padding=ft.padding.symmetric(vertical=5, horizontal=5),
-            border=ft.border.only(bottom=ft.border.BorderSide(1, ft.Colors.GREY_300)),
-            content=ft.Column([
-                # Fila Superior: Nombre y Botón Eliminar
-                ft.Row([
-                    ft.Text(
-                        f"{producto[2]}", 
-                        weight=ft.FontWeight.BOLD, 
-                        size=13, 
-                        max_lines=2, 
-                        overflow=ft.TextOverflow.ELLIPSIS, 
-                        expand=True
-                    ),
-                    ft.IconButton(
-                        icon=ft.Icons.DELETE_OUTLINE,
-                        icon_color=ft.Colors.RED_400,
-                        icon_size=20,
-                        tooltip="Quitar del carrito",
-                        on_click=lambda e: self._remover_de_sidebar(item_carrito)
-                    )
-                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                
-                # Fila Inferior: Detalles y Controles de Edición
-                ft.Row([
-                    ft.Text(f"Cod: {producto[1]}", size=10, color=ft.Colors.GREY_500),
-                    ft.Container(expand=True), # Espaciador
-                    ft.Text("Cant:", size=11, color="grey"),
-                    txt_cantidad,
-                    ft.Container(width=5),
-                    txt_precio
-                ], vertical_alignment=ft.CrossAxisAlignment.CENTER)
-            ])
-        )
-        return tile_en_sidebar
-
     # --- LÓGICA DE CARRITO Y EDICIÓN (Código 2) ---
 
-    def _actualizar_cantidad_item(self, item, valor_str, max_stock):
+    def _actualizar_cantidad_item(self, id_producto, valor_str):
         try:
             if not valor_str: return
             nueva_cant = int(valor_str)
-            
-            if nueva_cant < 1: 
-                nueva_cant = 1
-            
-            if nueva_cant > max_stock:
-                nueva_cant = max_stock
-                self.page.snack_bar = ft.SnackBar(ft.Text(f"Stock máximo es {max_stock}"), bgcolor="red")
-                self.page.snack_bar.open = True
-                self.page.update()
-            
-            item['qty'] = nueva_cant
         except ValueError:
-            pass 
-        
-        # Recalcular totales y refrescar lista principal (el stock visual cambia)
-        self._actualizar_subtotal()
-        self.actualizar_lista_productos() 
+            return
 
-    def _actualizar_precio_item(self, item, valor_str):
+        # El carrito limita la cantidad a [1, stock] y avisa el cambio (ver _on_carrito_cambio)
+        aplicada = self.carrito.fijar_cantidad(id_producto, nueva_cant)
+        if aplicada is not None and nueva_cant > aplicada:
+            self.page.snack_bar = ft.SnackBar(ft.Text(f"Stock máximo es {aplicada}"), bgcolor="red")
+            self.page.snack_bar.open = True
+            self.page.update()
+
+    def _actualizar_precio_item(self, id_producto, valor_str):
         try:
             if not valor_str: return
-            nuevo_precio = float(valor_str)
-            item['price'] = nuevo_precio
+            self.carrito.fijar_precio(id_producto, float(valor_str))
         except ValueError:
             pass
+
+    def _on_carrito_cambio(self, evento, linea):
+        """
+        Aplica a la interfaz solo lo que tocó el cambio: un tile de la sidebar,
+        el subtotal y el stock visual del producto afectado en la lista principal.
+        """
+        afectados = [linea.id] if linea is not None else list(self._tiles_carrito)
+
+        if evento == "agregado":
+            tile = CarritoTile(
+                linea,
+                on_cantidad=self._actualizar_cantidad_item,
+                on_precio=self._actualizar_precio_item,
+                on_quitar=self._remover_de_sidebar
+            )
+            self._tiles_carrito[linea.id] = tile
+            self.sidebar_content.controls.append(tile)
+        elif evento == "quitado":
+            tile = self._tiles_carrito.pop(linea.id, None)
+            if tile is not None:
+                self.sidebar_content.controls.remove(tile)
+        elif evento == "vaciado":
+            self._tiles_carrito = {}
+            del self.sidebar_content.controls[1:]  # Se conserva la cabecera
+        elif evento == "cantidad":
+            self._tiles_carrito[linea.id].actualizar_cantidad(linea.cantidad)
+
+        if evento in ("agregado", "quitado", "vaciado") and self.sidebar_content.page:
+            self.sidebar_content.update()
+
         self._actualizar_subtotal()
+        if evento != "precio":
+            for id_producto in afectados:
+                self._refrescar_tile_producto(id_producto)
+
+    def _refrescar_tile_producto(self, id_producto):
+        """Recalcula el stock visual de un solo tile de la lista (si está cargado)"""
+        tile = self._tiles.get(id_producto)
+        if tile is None:
+            return
+        if tile.actualizar(tile.producto, self._datos_tile(tile.producto)) and tile.page:
+            tile.update()
 
     def _actualizar_subtotal(self):
-        # Total es suma de (precio * cantidad) para cada item
-        total = sum(item['price'] * item['qty'] for item in self.carrito)
+        # El carrito mantiene el subtotal al día; aquí solo se muestra
+        total = self.carrito.subtotal
         self.txt_subtotal.value = f"${total:,.2f}"
         
         self.btn_continuar.disabled = (total == 0)
@@ -339,46 +297,19 @@ class MainView(ft.View):
         self.btn_continuar.update()
 
     def _agregar_a_sidebar(self, producto):
-        # 1. Checar si ya existe en el carrito (Lógica Cod 2)
-        item_existente = next((i for i in self.carrito if i['product'][0] == producto[0]), None)
-        
-        max_stock = producto[6] if len(producto) > 6 else 1
-
-        if item_existente:
-            if item_existente['qty'] < max_stock:
-                item_existente['qty'] += 1
-            else:
-                self.page.snack_bar = ft.SnackBar(ft.Text("No hay más stock disponible"), bgcolor="red")
-                self.page.snack_bar.open = True
-                self.page.update()
-                return 
-        else:
-            # Nuevo item en carrito
-            precio_inicial = self._calcular_precio_numerico(producto)
-            nuevo_item = {
-                'product': producto,
-                'price': precio_inicial,
-                'qty': 1
-            }
-            self.carrito.append(nuevo_item)
-
-        self._reconstruir_sidebar_visual()
-        self._actualizar_subtotal()
-        self.actualizar_lista_productos()
-
-    def _remover_de_sidebar(self, item_a_borrar):
-        if item_a_borrar in self.carrito:
-            self.carrito.remove(item_a_borrar)
-        
-        self._reconstruir_sidebar_visual()
-        self._actualizar_subtotal()
-        self.actualizar_lista_productos()
-
-    def _reconstruir_sidebar_visual(self):
-        """Reconstruye TODA la sidebar (Cabecera + Items)"""
-        
-        # --- 1. Crear la Cabecera con el Botón "+" ---
-        cabecera = ft.Column(
+        # Si ya está en el carrito solo sube la cantidad (hasta el stock)
+        precio_inicial = 0.0 if producto[0] in self.carrito else self._calcular_precio_numerico(producto)
+        if self.carrito.agregar(producto, precio_inicial) is None:
+            self.page.snack_bar = ft.SnackBar(ft.Text("No hay más stock disponible"), bgcolor="red")
+            self.page.snack_bar.open = True
+            self.page.update()
+
+    def _remover_de_sidebar(self, id_producto):
+        self.carrito.quitar(id_producto)
+
+    def _crear_cabecera_carrito(self):
+        """Cabecera fija de la sidebar con el Botón "+" """
+        return ft.Column(
             spacing=0,
             controls=[
                 ft.Row(
@@ -400,18 +331,6 @@ class MainView(ft.View):
                 ft.Divider(height=1, color=ft.Colors.GREY_300)
             ]
         )
-        
-        # --- 2. Crear los tiles de productos ---
-        nuevos_tiles = []
-        for item in self.carrito:
-            nuevos_tiles.append(self._crear_sidebar_tile(item))
-            
-        # --- 3. Juntar todo ---
-        # La lista de controles es: [Cabecera] + [Lista de Productos]
-        self.sidebar_content.controls = [cabecera] + nuevos_tiles
-
-        if self.sidebar_content.page:
-            self.sidebar_content.update()
 
     def _abrir_modal_pago(self, total):
         empleado_id = self.page.session.get('empleado_id')
@@ -420,112 +339,154 @@ class MainView(ft.View):
             return
 
         # ### ADAPTADOR DE DATOS ###
-        # El manager espera una lista de tuplas [(producto, precio)].
-        # Como ahora tenemos cantidades, debemos "aplanar" la lista.
-        
-        lista_para_manager = []
-        for item in self.carrito:
-            prod = item['product']
-            precio = item['price']
-            qty = item['qty']
-            
-            # Añadir el producto N veces a la lista final
-            for _ in range(qty):
-                lista_para_manager.append((prod, precio))
+        # El manager y la impresora reciben las líneas del carrito tal cual:
+        # [(producto, precio_unitario, cantidad)], sin repetir productos.
+        lineas = self.carrito.lineas()
 
         show_modal_pago(
             self.page, 
-            lista_para_manager, # Enviamos la lista aplanada
+            lineas,
             total, 
             empleado_id, 
             self._limpiar_despues_venta 
         )
 
     def _limpiar_despues_venta(self):
-        self.carrito = [] 
-        self._reconstruir_sidebar_visual()
-        self._actualizar_subtotal()
+        self.carrito.vaciar()
+        # La venta descontó stock en la BD: se reconcilia la lista
         self.actualizar_lista_productos()
 
-    # --- FILTRADO Y ACTUALIZACIÓN (Misma lógica, variables adaptadas) ---
+    # --- FILTRADO Y ACTUALIZACIÓN (Paginado con scroll infinito) ---
 
-    def filtrar_productos(self, texto_busqueda="", criterio_orden="nombre"):
-        productos = obtener_productos()
-        
-        # 1. Filtro de Texto
-        if texto_busqueda:
-            texto_busqueda = texto_busqueda.lower()
-            productos = [
-                p for p in productos 
-                if (texto_busqueda in str(p[2]).lower() or
-                    texto_busqueda in str(p[4]).lower() or
-                    texto_busqueda in str(p[5]).lower())
-            ]
-        
-        # 2. Ordenamiento
-        try:
-            if criterio_orden == "nombre":
-                productos.sort(key=lambda x: str(x[2]).lower())
-            elif criterio_orden == "kilataje":
-                productos.sort(key=lambda x: str(x[4]).lower())
-            elif criterio_orden == "categoria":
-                productos.sort(key=lambda x: str(x[5]).lower())
-        except Exception as e:
-            logging.error(f"Error al ordenar: {e}")
-            
-        # 3. Filtro de Disponibilidad (Lógica Cod 2)
-        # Solo mostramos productos que tengan stock visual > 0
-        productos_finales = []
-        for p in productos:
-            en_carrito = 0
-            for item in self.carrito:
-                if item['product'][0] == p[0]:
-                    en_carrito = item['qty']
-                    break
-            
-            stock_bd = p[6] if len(p) > 6 else 1
-            
-            if (stock_bd - en_carrito) > 0:
-                productos_finales.append(p)
-                
-        return productos_finales
+    def _obtener_pagina(self, precargada=None):
+        """
+        Trae la siguiente página del catálogo (o de la búsqueda) y avanza el cursor.
+        precargada: filas de búsqueda ya consultadas por el buscador en segundo plano.
+        """
+        if self._texto_busqueda:
+            # La búsqueda FTS pagina por offset (el orden puede ser por relevancia)
+            desde = self._cursor_pagina or 0
+            productos = precargada
+            if productos is None:
+                productos = buscar_productos(self._texto_busqueda, self._criterio_orden, TAMANO_PAGINA + 1, desde)
+            self._hay_mas = len(productos) > TAMANO_PAGINA
+            productos = productos[:TAMANO_PAGINA]
+            self._cursor_pagina = desde + len(productos)
+        else:
+            # Catálogo completo: paginación por llave, costo constante por página
+            productos, self._cursor_pagina = obtener_productos_pagina(
+                self._cursor_pagina, TAMANO_PAGINA, self._criterio_orden
+            )
+            self._hay_mas = self._cursor_pagina is not None
+        return productos
 
-    def actualizar_lista_productos(self, texto_busqueda="", criterio_orden="nombre"):
+    def _cargar_pagina(self, precargada=None):
+        """Tiles de la siguiente página; sigue pidiendo si todos quedaron ocultos (sin stock visual)"""
+        tiles = []
+        while self._hay_mas and not any(t.visible for t in tiles):
+            try:
+                tiles += [self._tile_producto(p) for p in self._obtener_pagina(precargada)]
+                precargada = None
+            except Exception as e:
+                logging.error(f"Error al cargar productos: {e}")
+                self._hay_mas = False
+        return tiles
+
+    def actualizar_lista_productos(self, texto_busqueda=None, criterio_orden=None, primera_pagina=None):
+        """
+        Refresca la lista reconciliando por id de producto: los tiles existentes
+        se reutilizan y solo se parchan, insertan o quitan los que cambiaron.
+        Sin argumentos conserva la búsqueda, el orden y las páginas ya cargadas.
+        primera_pagina: resultado ya consultado de la búsqueda (ver _aplicar_busqueda).
+        Se llama desde handlers de la UI y desde el hilo del buscador: todo el
+        estado de la lista (consulta, cursor, tiles y controles) cambia bajo
+        _candado_pagina, igual que en el scroll infinito.
+        """
         if not self.lista:
             return
 
-        if self.filter_text:
-            if "Kilataje" in self.filter_text.value: criterio_orden = "kilataje"
-            elif "Categoria" in self.filter_text.value: criterio_orden = "categoria"
+        # Los cambios de precio hechos por otro proceso no avisan: se revisa la
+        # versión (PRAGMA data_version) en cada refresco; si cambió, vigentes()
+        # notifica y los tiles que se reutilizan se repintan en _on_precios_cambio
+        self._precios = obtener_precios_vigentes()
+
+        with self._candado_pagina:
+            misma_consulta = True
+            if texto_busqueda is not None and texto_busqueda.strip() != self._texto_busqueda:
+                self._texto_busqueda = texto_busqueda.strip()
+                misma_consulta = False
+            if criterio_orden is not None and criterio_orden != self._criterio_orden:
+                self._criterio_orden = criterio_orden
+                misma_consulta = False
+
+            # Con la misma consulta recargamos tantas filas como ya se mostraban
+            objetivo = len(self.lista.content.controls) if misma_consulta else 0
+            self._cursor_pagina = None
+            self._hay_mas = True
+            tiles = self._cargar_pagina(primera_pagina)
+            while self._hay_mas and len(tiles) < objetivo:
+                tiles += self._cargar_pagina()
+
+            # Los tiles que ya no aparecen se descartan de la caché
+            ids_visibles = {t.producto[0] for t in tiles}
+            self._tiles = {pid: t for pid, t in self._tiles.items() if pid in ids_visibles}
+            self.lista.content.controls = tiles
+            if self.lista.page:
+                self.lista.update()
+
+    # --- BÚSQUEDA DIFERIDA ---
+
+    def _buscar_en_segundo_plano(self, texto, cancelada):
+        """Corre en el hilo del buscador: consulta la primera página sin tocar controles"""
+        texto = texto.strip()
+        if not texto:
+            return None  # El catálogo completo sale de la caché en memoria
+        return buscar_productos(texto, self._criterio_orden, TAMANO_PAGINA + 1, 0, cancelada=cancelada)
+
+    def _aplicar_busqueda(self, texto, resultado):
+        """
+        Corre en el hilo del buscador, solo con el resultado de la búsqueda más
+        reciente; actualizar_lista_productos toma _candado_pagina.
+        """
+        if texto.strip() and resultado is None:
+            return  # Consulta abortada
+        self.actualizar_lista_productos(texto_busqueda=texto, primera_pagina=resultado)
 
-        productos = self.filtrar_productos(texto_busqueda, criterio_orden)
-        
-        self.lista.content.controls = [
-            self._crear_producto_tile(
-                producto, 
-                on_agregar=self._agregar_a_sidebar
-            )
-            for producto in productos  
-        ]
-        
-        if self.lista.page:
-            self.lista.update()
+    def _on_scroll_lista(self, e: ft.OnScrollEvent):
+        """Scroll infinito: al acercarse al final se agrega la siguiente página"""
+        if not self._hay_mas or e.pixels < e.max_scroll_extent - MARGEN_SCROLL:
+            return
+        # Si ya hay una carga en curso (eventos de scroll seguidos) no duplicamos
+        if not self._candado_pagina.acquire(blocking=False):
+            return
+        try:
+            nuevos = self._cargar_pagina()
+            if nuevos:
+                self.lista.content.controls.extend(nuevos)
+                self.lista.update()
+        finally:
+            self._candado_pagina.release()
 
     def precios_actualizados(self, e):
         # Guardar precios en DB
-        try:
-            p_10k = float(self.txt_oro_10k.value) if self.txt_oro_10k.value else 0.0
-            p_14k = float(self.txt_oro_14k.value) if self.txt_oro_14k.value else 0.0
-            p_ita = float(self.txt_italiano.value) if self.txt_italiano.value else 0.0
-            
-            actualizar_precio_oro(p_10k, p_14k, p_ita)
-            
-        except ValueError:
-            pass
+        actuales = {k[0]: k[3] for k in self._precios.kilates}
+        cambios = {}
+        for kilate_id, txt in self._txt_precios.items():
+            try:
+                valor = float(txt.value) if txt.value else 0.0
+            except ValueError:
+                continue
+            if valor != actuales.get(kilate_id):
+                cambios[kilate_id] = valor
+
+        # on_blur se dispara en cada salida del campo: si nada cambió no escribimos
+        if not cambios:
+            return
 
-        # Solo actualizamos la lista principal (sugeridos)
+        # Al confirmarse, todas las sesiones reciben la nueva versión en _on_precios_cambio.
+        # Solo se reprecia la lista principal (sugeridos);
         # NO sobreescribimos los precios del carrito para respetar ediciones manuales
-        self.actualizar_lista_productos()
+        actualizar_precios_kilates(cambios)
 
     def on_filter_selected(self, e):
         self.filter_text.value = f"Filtrar por: {e.control.text}"
@@ -542,32 +503,16 @@ class MainView(ft.View):
 
     def _construir_interfaz(self):
         
-        precios = obtener_precios_oro()
-
-        self.txt_oro_10k = ft.TextField(
-            value=str(precios[0]),
-            label="Oro 10K",
-            bgcolor="CCCCCC",
-            height=40, width=150, border_radius=7, 
-            prefix_text="$", suffix_text="/gr",
-            on_blur=self.precios_actualizados
-        )
-        self.txt_oro_14k = ft.TextField(
-            value=str(precios[1]),
-            label="Oro 14K",
-            bgcolor="CCCCCC",
-            height=40, width=150, border_radius=7, 
-            prefix_text="$", suffix_text="/gr",
-            on_blur=self.precios_actualizados
-        )
-        self.txt_italiano = ft.TextField(
-            value=str(precios[2]),
-            label="Oro Italiano",
-            bgcolor="CCCCCC",
-            height=40, width=150, border_radius=7, 
-            prefix_text="$", suffix_text="/gr",
-            on_blur=self.precios_actualizados
-        )
+        # Un campo de precio por gramo por cada kilate de la tabla 'kilates'
+        for kilate_id, _, nombre_kilate, precio_gramo, _, _ in self._precios.kilates:
+            self._txt_precios[kilate_id] = ft.TextField(
+                value=str(precio_gramo),
+                label=nombre_kilate,
+                bgcolor="CCCCCC",
+                height=40, width=150, border_radius=7, 
+                prefix_text="$", suffix_text="/gr",
+                on_blur=self.precios_actualizados
+            )
 
         appbar = ft.AppBar(
             shadow_color=ft.Colors.BLACK87,
@@ -587,11 +532,7 @@ class MainView(ft.View):
                     content=ft.Row(
                         spacing=20,
                         vertical_alignment=ft.CrossAxisAlignment.CENTER,
-                        controls=[
-                            self.txt_oro_10k,
-                            self.txt_oro_14k,
-                            self.txt_italiano,
-                        ]
+                        controls=list(self._txt_precios.values())
                     )
                 ),
                 ft.Container(
@@ -624,7 +565,9 @@ class MainView(ft.View):
             expand=7,
             content=ft.ListView(
                 controls=[],
-                spacing=0
+                spacing=0,
+                on_scroll=self._on_scroll_lista,
+                on_scroll_interval=100
             )
         )
 
@@ -695,7 +638,7 @@ class MainView(ft.View):
                         hint_text="Buscar...",
                         border=ft.InputBorder.NONE,
                         expand=True,
-                        on_change=lambda e: self.actualizar_lista_productos(texto_busqueda=e.control.value)
+                        on_change=lambda e: self._busqueda.solicitar(e.control.value)
                     )
                 ]
             )
@@ -0,0 +1,87 @@
+import flet as ft
+
+
+class ProductoTile(ft.Container):
+    """
+    Tile de la lista principal (Diseño Código 1).
+    Se crea una sola vez por producto y se reutiliza entre refrescos:
+    actualizar() solo modifica las propiedades que cambiaron, así Flet
+    envía al cliente únicamente esas diferencias y no el árbol completo.
+    """
+
+    def __init__(self, producto, datos, on_agregar):
+        super().__init__(padding=ft.padding.all(10))
+        self.producto = producto
+        self._datos = None
+
+        self.lbl_titulo = ft.Text(weight=ft.FontWeight.BOLD, color='Black', size=20)
+        self.lbl_detalle = ft.Text(size=15, selectable=True, color=ft.Colors.GREY_700)
+        self.lbl_stock = ft.Text(size=12, weight=ft.FontWeight.BOLD)
+        self.lbl_precio = ft.Text(size=15, weight=ft.FontWeight.BOLD)
+
+        self.content = ft.Column(
+            spacing=0,
+            controls=[
+                ft.Row(
+                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                    vertical_alignment=ft.CrossAxisAlignment.START,
+                    controls=[
+                        # --- COLUMNA IZQUIERDA (Info) ---
+                        ft.Column(
+                            spacing=2,
+                            expand=True,
+                            controls=[self.lbl_titulo, self.lbl_detalle, self.lbl_stock]
+                        ),
+
+                        # --- COLUMNA DERECHA (Precio y Botón) ---
+                        ft.Column(
+                            horizontal_alignment=ft.CrossAxisAlignment.END,
+                            spacing=5,
+                            controls=[
+                                self.lbl_precio,
+                                ft.ElevatedButton(
+                                    "Agregar",
+                                    color='Black',
+                                    bgcolor='#C39D88',
+                                    style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=7)),
+                                    height=35,
+                                    # Siempre pasa la versión más reciente del producto
+                                    on_click=lambda e: on_agregar(self.producto)
+                                )
+                            ]
+                        )
+                    ]
+                ),
+                ft.Container(height=10),
+                ft.Divider(height=1, color=ft.Colors.GREY_300)
+            ]
+        )
+        self.actualizar(producto, datos)
+
+    def actualizar(self, producto, datos):
+        """
+        datos: (titulo, detalle, texto_stock, color_stock, texto_precio, visible)
+        Retorna True si algo cambió.
+        """
+        self.producto = producto
+        if datos == self._datos:
+            return False
+        titulo, detalle, texto_stock, color_stock, texto_precio, visible = datos
+        self.lbl_titulo.value = titulo
+        self.lbl_detalle.value = detalle
+        self.lbl_stock.value = texto_stock
+        self.lbl_stock.color = color_stock
+        self.lbl_precio.value = f"Precio: {texto_precio}"
+        self.visible = visible
+        self._datos = datos
+        return True
+
+    def actualizar_precio(self, texto_precio):
+        """Parcha solo la etiqueta de precio (cambio de precios del oro). Retorna True si cambió."""
+        if self._datos[4] == texto_precio:
+            return False
+        self._datos = self._datos[:4] + (texto_precio,) + self._datos[5:]
+        self.lbl_precio.value = f"Precio: {texto_precio}"
+        if self.lbl_precio.page:
+            self.lbl_precio.update()
+        return True
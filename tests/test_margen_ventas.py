@@ -0,0 +1,114 @@
+"""
+Margen por línea vendida: el kilate se liga con la misma regla (kilates.py)
+en la migración de ventas existentes, al registrar una venta o un apartado,
+al guardar un producto y al cotizarlo en pantalla, así un kilataje como
+"10k Italiano" también tiene costo de oro.
+"""
+import pytest
+
+from database import conexion
+from database import escritor
+from database import manager
+from database import migraciones
+from database.kilates import SQL_KILATE_ID_PARAMETRO
+from database.precios import HistorialPrecios, PreciosOro
+
+FECHA_LEGADA = "2999-01-01 10:00:00"
+
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    monkeypatch.setattr(conexion, "RUTA_BD", str(tmp_path / "inventario.db"))
+    monkeypatch.setattr(manager, "historial_precios", HistorialPrecios())
+    # El hilo escritor conserva su conexión: uno nuevo por prueba abre la base de esta
+    monkeypatch.setattr(escritor, "escritor", escritor.EscritorBD())
+    yield
+    conexion.cerrar_conexion()
+
+
+def _ejecutar(sql, parametros=()):
+    bd = conexion.crear_conexion()
+    with bd:
+        bd.execute(sql, parametros)
+    bd.close()
+
+
+def test_venta_anterior_se_liga_con_la_regla_del_backfill(base, monkeypatch):
+    # Base en la versión anterior a kilate_id en detalles_venta
+    completas = migraciones.MIGRACIONES
+    monkeypatch.setattr(migraciones, "MIGRACIONES", completas[:7])
+    migraciones.migrar()
+    _ejecutar("UPDATE kilates SET precio_gramo = 1000, version = 1 WHERE codigo = '10k'")
+    _ejecutar("INSERT INTO empleados (nombre, password) VALUES ('Pedro', 'x')")
+    _ejecutar("INSERT INTO ventas (id, folio, fecha, total, empleado_id) VALUES (1, 1, ?, 5000, 1)", (FECHA_LEGADA,))
+    _ejecutar("INSERT INTO detalles_venta (venta_id, producto_id_original, nombre, peso, kilataje, categoria, precio_venta) "
+              "VALUES (1, 1, 'Cadena', 2.0, '10k Italiano', 'Cadenas', 5000)")
+    monkeypatch.setattr(migraciones, "MIGRACIONES", completas)
+    migraciones.migrar()
+
+    (_, _, _, kilataje, peso, _, importe, costo, margen), = manager.obtener_margen_ventas(FECHA_LEGADA, "2999-01-02 00:00:00")
+    assert kilataje == "10k Italiano"
+    assert costo == pytest.approx(2.0 * 1000)
+    assert margen == pytest.approx(5000 - 2000)
+
+
+def test_venta_nueva_guarda_el_kilate(base):
+    migraciones.migrar()
+    _ejecutar("UPDATE kilates SET precio_gramo = 1000, version = 1 WHERE codigo = '10k'")
+    _ejecutar("INSERT INTO empleados (nombre, password) VALUES ('Pedro', 'x')")
+    # Capturado por fuera de la app: sin kilate_id y con texto libre
+    _ejecutar("INSERT INTO productos (id, clave, nombre, peso, kilataje, categoria, cantidad) "
+              "VALUES (1, '10CNY22', 'Cadena', 2.0, '10K Italiano', 'Cadenas', 3)")
+    producto = conexion.obtener_conexion().execute("SELECT * FROM productos WHERE id = 1").fetchone()
+
+    bd = conexion.crear_conexion()
+    with bd:
+        venta_id, _ = manager._registrar_venta(bd.cursor(), 1, [(producto, 5000.0, 1)], 5000.0, "Efectivo", {})
+    kilate_id = bd.execute("SELECT kilate_id FROM detalles_venta WHERE venta_id = ?", (venta_id,)).fetchone()[0]
+    assert kilate_id == bd.execute("SELECT id FROM kilates WHERE codigo = '10k'").fetchone()[0]
+    fecha = bd.execute("SELECT fecha FROM ventas WHERE id = ?", (venta_id,)).fetchone()[0]
+    bd.close()
+
+    (*_, costo, margen), = manager.obtener_margen_ventas(fecha, "2999-01-01 00:00:00")
+    assert costo == pytest.approx(2000)
+    assert margen == pytest.approx(3000)
+
+
+def _kilate(codigo):
+    return conexion.obtener_conexion().execute("SELECT id FROM kilates WHERE codigo = ?", (codigo,)).fetchone()[0]
+
+
+@pytest.mark.parametrize("kilataje, codigo", [("10K Italiano", "10k"), ("italiano", "Italiano"), ("Oro 14k", "14k")])
+def test_alta_y_edicion_de_producto_usan_la_regla(base, kilataje, codigo):
+    migraciones.migrar()
+    assert manager.agregar_producto("X1", "Cadena", 2.0, kilataje, "Cadenas", 1)
+    producto = conexion.obtener_conexion().execute("SELECT * FROM productos WHERE clave = 'X1'").fetchone()
+    assert producto[7] == _kilate(codigo)
+
+    assert manager.actualizar_producto(producto[0], "X1", "Cadena", 2.0, "Plata", "Cadenas", 1)
+    assert conexion.obtener_conexion().execute("SELECT kilate_id FROM productos WHERE clave = 'X1'").fetchone()[0] is None
+    assert manager.actualizar_producto(producto[0], "X1", "Cadena", 2.0, kilataje, "Cadenas", 1)
+    assert conexion.obtener_conexion().execute("SELECT kilate_id FROM productos WHERE clave = 'X1'").fetchone()[0] == _kilate(codigo)
+
+
+def test_apartado_guarda_el_kilate(base):
+    migraciones.migrar()
+    _ejecutar("INSERT INTO empleados (nombre, password) VALUES ('Pedro', 'x')")
+    _ejecutar("INSERT INTO productos (id, clave, nombre, peso, kilataje, categoria, cantidad) "
+              "VALUES (1, '14CNY22', 'Cadena', 2.0, 'Oro 14K', 'Cadenas', 3)")
+    producto = conexion.obtener_conexion().execute("SELECT * FROM productos WHERE id = 1").fetchone()
+
+    apartado_id, _ = manager.registrar_apartado(1, [(producto, 5000.0, 1)], 5000.0, 1000.0, "Efectivo", {})
+    kilate_id = conexion.obtener_conexion().execute(
+        "SELECT kilate_id FROM detalles_apartado WHERE apartado_id = ?", (apartado_id,)).fetchone()[0]
+    assert kilate_id == _kilate("14k")
+
+
+@pytest.mark.parametrize("kilataje", ["10k", "10K", "10k Italiano", "ITALIANO", "Oro 14k", "Plata", None])
+def test_cotizacion_en_pantalla_coincide_con_la_base(base, kilataje):
+    migraciones.migrar()
+    kilates = conexion.obtener_conexion().execute(
+        "SELECT id, codigo, nombre, precio_gramo, mano_obra, margen FROM kilates").fetchall()
+    esperado = conexion.obtener_conexion().execute(
+        f"SELECT {SQL_KILATE_ID_PARAMETRO}", (kilataje,)).fetchone()[0]
+    assert PreciosOro(1, kilates).kilate_id((1, "C", "Cadena", 2.0, kilataje, "Cadenas", 1, None)) == esperado
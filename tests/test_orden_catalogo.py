@@ -0,0 +1,41 @@
+"""
+El catálogo en memoria (obtener_productos_pagina) y la consulta SQL
+(buscar_productos, con COLLATE NOCASE y sus índices) ordenan igual,
+también con acentos y eñes, que NOCASE no pliega.
+"""
+import pytest
+
+from database import catalogo
+from database import conexion
+from database import manager
+from database.migraciones import migrar
+
+NOMBRES = ["anillo", "Anillo", "Ámbar", "ámbar", "Zafiro", "ñandú", "Ñandú", "nácar", "Nube", "Éclat", "eslabón", "Esclava"]
+
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    monkeypatch.setattr(conexion, "RUTA_BD", str(tmp_path / "inventario.db"))
+    monkeypatch.setattr(manager, "catalogo", catalogo.CatalogoProductos())
+    migrar()
+    bd = conexion.crear_conexion()
+    with bd:
+        bd.executemany(
+            "INSERT INTO productos (clave, nombre, peso, kilataje, categoria, cantidad) VALUES (?, ?, 1, ?, ?, 1)",
+            [(f"C{i}", nombre, nombre, nombre) for i, nombre in enumerate(NOMBRES)])
+    bd.close()
+    yield
+    conexion.cerrar_conexion()
+
+
+@pytest.mark.parametrize("orden", ["nombre", "kilataje", "categoria"])
+def test_catalogo_y_sql_ordenan_igual(base, orden):
+    en_sql = [p[0] for p in manager.buscar_productos("", orden)]
+
+    en_memoria, siguiente = [], None
+    while True:  # Páginas de 5: el bisect con after_key usa la misma llave
+        pagina, siguiente = manager.obtener_productos_pagina(siguiente, 5, orden)
+        en_memoria += [p[0] for p in pagina]
+        if siguiente is None:
+            break
+    assert en_memoria == en_sql
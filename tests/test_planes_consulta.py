@@ -0,0 +1,141 @@
+"""
+Planes de consulta (EXPLAIN QUERY PLAN) de las lecturas de manager con un
+volumen de datos realista (20k ventas, 40k detalles, 500 productos): cada
+consulta debe resolverse con su índice, nunca recorriendo una tabla completa,
+tanto sin estadísticas como con las que junta PRAGMA optimize.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from database import conexion
+from database import manager
+from database.migraciones import migrar
+from database.precios import HistorialPrecios
+
+VENTAS = 20000
+DETALLES_POR_VENTA = 2
+PRODUCTOS = 500
+RANGO = manager.rango_dia(date(2025, 6, 1))
+
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    monkeypatch.setattr(conexion, "RUTA_BD", str(tmp_path / "inventario.db"))
+    monkeypatch.setattr(manager, "historial_precios", HistorialPrecios())
+    yield
+    conexion.cerrar_conexion()
+
+
+def _poblar(primera=1, ultima=VENTAS):
+    """Ventas con id en [primera, ultima], una cada 26 minutos desde 2025"""
+    bd = conexion.crear_conexion()
+    with bd:
+        if primera == 1:
+            bd.executemany("INSERT INTO empleados (nombre, password) VALUES (?, 'x')",
+                           [(f"Empleado {i}",) for i in range(50)])
+            bd.executemany(
+                "INSERT INTO productos (clave, nombre, peso, kilataje, categoria, cantidad) VALUES (?, ?, 1.5, ?, ?, 3)",
+                [(f"C{i:05d}", f"Producto {i}", ("10k", "14k", "Italiano")[i % 3], f"Categoria {i % 7}")
+                 for i in range(PRODUCTOS)])
+        inicio = datetime(2025, 1, 1, 9)
+        bd.executemany(
+            "INSERT INTO ventas (id, folio, fecha, total, empleado_id) VALUES (?, ?, ?, 1000, ?)",
+            [(i, i, (inicio + timedelta(minutes=26 * i)).strftime("%Y-%m-%d %H:%M:%S"), i % 50 + 1)
+             for i in range(primera, ultima + 1)])
+        bd.executemany(
+            "INSERT INTO detalles_venta (venta_id, producto_id_original, nombre, peso, kilataje, categoria, precio_venta) "
+            "VALUES (?, ?, 'Producto', 1.5, '10k', 'Anillos', 500)",
+            [(i, i % PRODUCTOS + 1) for i in range(primera, ultima + 1) for _ in range(DETALLES_POR_VENTA)])
+    bd.close()
+
+
+def _plan(consulta):
+    """
+    Plan (EXPLAIN QUERY PLAN) de la primera SELECT que ejecuta 'consulta'; se
+    omiten las internas de FTS5, que califican sus tablas con 'main'.
+    """
+    sentencias = []
+    bd = conexion.obtener_conexion()
+    bd.set_trace_callback(sentencias.append)
+    try:
+        consulta()
+    finally:
+        bd.set_trace_callback(None)
+    sentencia = next(s for s in sentencias
+                     if s.lstrip().upper().startswith("SELECT") and "'main'." not in s)
+    return [fila[3] for fila in bd.execute("EXPLAIN QUERY PLAN " + sentencia)]
+
+
+def _assert_usa(plan, *indices):
+    texto = "\n".join(plan)
+    for indice in indices:
+        assert indice in texto, texto
+    # Recorrer un índice o la tabla FTS está bien; recorrer una tabla completa no
+    assert not any(paso.startswith("SCAN") and "USING" not in paso and "VIRTUAL TABLE" not in paso
+                   for paso in plan), texto
+
+
+# consulta -> índices que su plan debe usar
+CONSULTAS = {
+    "validar_empleado": (lambda: manager.validar_empleado("Empleado 7", "x"), ["idx_empleados_nombre"]),
+    "total_ventas": (lambda: manager.obtener_total_ventas(*RANGO), ["idx_ventas_fecha"]),
+    "ventas_por_empleado": (lambda: manager.obtener_ventas_por_empleado(*RANGO), ["idx_ventas_fecha"]),
+    "detalle_ventas": (lambda: manager.obtener_detalle_ventas(*RANGO),
+                       ["idx_ventas_fecha", "idx_detalles_venta_venta"]),
+    "margen_ventas": (lambda: manager.obtener_margen_ventas(*RANGO),
+                      ["idx_ventas_fecha", "idx_detalles_venta_venta"]),
+    "exportar_ventas": (lambda: manager.exportar_ventas_csv(*RANGO),
+                        ["idx_ventas_fecha", "idx_detalles_venta_venta"]),
+    "catalogo_nombre": (lambda: manager.buscar_productos("", "nombre", 41), ["idx_productos_nombre"]),
+    "catalogo_kilataje": (lambda: manager.buscar_productos("", "kilataje", 41), ["idx_productos_kilataje"]),
+    "catalogo_categoria": (lambda: manager.buscar_productos("", "categoria", 41), ["idx_productos_categoria"]),
+    "busqueda_fts": (lambda: manager.buscar_productos("producto 12", "relevancia", 41),
+                     ["productos_fts VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"]),
+    "busqueda_fts_ordenada": (lambda: manager.buscar_productos("producto 12", "nombre", 41),
+                              ["productos_fts VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"]),
+}
+
+
+def _estadisticas():
+    bd = conexion.crear_conexion()
+    try:
+        if not bd.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            return {}
+        return {(tabla, indice): stat for tabla, indice, stat in bd.execute("SELECT tbl, idx, stat FROM sqlite_stat1")}
+    finally:
+        bd.close()
+
+
+def test_migrar_no_congela_estadisticas_de_una_base_vacia(base):
+    migrar()
+    _poblar(ultima=3)
+    migrar()  # Arranque con la base casi vacía
+    assert ("ventas", "idx_ventas_fecha") not in _estadisticas()
+
+
+@pytest.fixture(scope="module")
+def base_poblada(tmp_path_factory):
+    """Una sola base grande por módulo; cada prueba apunta RUTA_BD a ella"""
+    ruta = str(tmp_path_factory.mktemp("planes") / "inventario.db")
+    anterior, conexion.RUTA_BD = conexion.RUTA_BD, ruta
+    try:
+        migrar()
+        _poblar()
+    finally:
+        conexion.RUTA_BD = anterior
+    return ruta
+
+
+@pytest.mark.parametrize("estadisticas", [False, True], ids=["sin_estadisticas", "con_estadisticas"])
+@pytest.mark.parametrize("nombre", list(CONSULTAS))
+def test_consulta_usa_indices(nombre, estadisticas, base_poblada, base, monkeypatch):
+    monkeypatch.setattr(conexion, "RUTA_BD", base_poblada)
+    bd = conexion.crear_conexion()
+    # Estadísticas con el volumen real (las que junta PRAGMA optimize) o ninguna
+    bd.execute("ANALYZE" if estadisticas else "DROP TABLE IF EXISTS sqlite_stat1")
+    bd.commit()
+    bd.close()
+
+    consulta, indices = CONSULTAS[nombre]
+    _assert_usa(_plan(consulta), *indices)
@@ -0,0 +1,57 @@
+"""
+Tickets dibujados por la impresora virtual contra archivos de referencia
+(tests/golden/<ticket>_<columnas>.txt), a 32 columnas (58 mm) y 48 (80 mm).
+
+Los de 32 columnas son la salida del printer anterior a las plantillas
+(cada ticket armado a mano con TicketBuilder), así cualquier diferencia
+de bytes en 58 mm aparece en el diff del cambio que la introduce. Los de
+48 columnas nacieron con las plantillas: antes no había diseño de 80 mm.
+Tras un cambio intencional en un ticket se regeneran con:
+
+    ACTUALIZAR_GOLDEN=1 python -m pytest tests/test_tickets_golden.py
+"""
+import datetime
+import os
+
+import pytest
+
+from utils import printer
+from utils.emulador_escpos import COLUMNAS_58MM, COLUMNAS_80MM, PAPEL_POR_COLUMNAS, _datos_ejemplo, renderizar
+
+CARPETA_GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+ACTUALIZAR = bool(os.environ.get("ACTUALIZAR_GOLDEN"))
+
+
+class _Reloj(datetime.datetime):
+    """Fecha fija para el encabezado del corte y del inventario"""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 1, 2, 18, 30)
+
+
+def _casos():
+    venta, apartado, corte, inventario = _datos_ejemplo(renglones_corte=8)
+    inventario = dict(lista_productos=inventario["lista_productos"][:6])
+    return {
+        "venta": (printer.generar_ticket_venta, venta),
+        "apartado": (printer.generar_ticket_apartado, apartado),
+        "corte": (printer.generar_corte_caja, corte),
+        "inventario": (printer.generar_inventario, inventario),
+    }
+
+
+@pytest.mark.parametrize("columnas", [COLUMNAS_58MM, COLUMNAS_80MM])
+@pytest.mark.parametrize("ticket", ["venta", "apartado", "corte", "inventario"])
+def test_ticket_igual_a_referencia(ticket, columnas, monkeypatch):
+    monkeypatch.setattr(datetime, "datetime", _Reloj)
+    generar, argumentos = _casos()[ticket]
+    render = renderizar(generar(**argumentos, papel=PAPEL_POR_COLUMNAS[columnas]), columnas)
+
+    ruta = os.path.join(CARPETA_GOLDEN, f"{ticket}_{columnas}.txt")
+    if ACTUALIZAR:
+        os.makedirs(CARPETA_GOLDEN, exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(render)
+    with open(ruta, encoding="utf-8") as archivo:
+        assert render == archivo.read()